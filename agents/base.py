@@ -2,28 +2,56 @@
 Base agent class for Healthcare Copilot agents.
 """
 
+import asyncio
+import hashlib
+import json
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import numpy as np
 from loguru import logger
 
 from utils.exceptions import HealthcareCopilotException
 
 
-class AgentState(BaseModel):
+# Maximum reasoning steps retained per agent state
+MAX_REASONING_STEPS = 256
+
+# Weight of an agent's retrieval keywords when blended into a query embedding
+KEYWORD_BOOST_WEIGHT = 0.5
+
+
+@dataclass(slots=True)
+class AgentState:
     """Base state model for agents."""
     
     query: str
-    context: Dict[str, Any] = {}
+    context: Dict[str, Any] = field(default_factory=dict)
     confidence: float = 0.0
-    reasoning: List[str] = []
+    reasoning: Deque[str] = field(default_factory=lambda: deque(maxlen=MAX_REASONING_STEPS))
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    policy_docs: Optional[List[Dict[str, Any]]] = None  # Preloaded retrieval results
+    llm_result: Optional[Dict[str, Any]] = None  # Precomputed LLM response (fused routing)
+    query_embedding: Optional[np.ndarray] = None  # Shared embedding of the raw query
 
 
 class BaseAgent(ABC):
     """Base class for all Healthcare Copilot agents."""
     
+    # Keywords appended to queries for policy retrieval
+    _QUERY_SUFFIX = ""
+    
+    # Number of policy chunks retrieved per query
+    retrieval_max_results = 3
+    
+    # Set by agents that retrieve policies and cache LLM responses
+    vector_service = None
+    policy_cache = None
+    response_cache = None
+    
     def __init__(self, name: str, description: str):
         """
         Initialize base agent.
@@ -35,6 +63,7 @@ class BaseAgent(ABC):
         self.name = name
         self.description = description
         self.logger = logger.bind(agent=name)
+        self._keyword_embedding: Optional[np.ndarray] = None
         
     @abstractmethod
     async def process(self, state: AgentState) -> AgentState:
@@ -58,7 +87,135 @@ class BaseAgent(ABC):
             step: Reasoning step description
         """
         state.reasoning.append(step)
-        self.logger.debug(f"Reasoning: {step}")
+        
+        # Loguru formats the message only if some handler accepts DEBUG records
+        self.logger.debug("Reasoning: {}", step)
+    
+    async def retrieval_embedding(self, vector_service, query_embedding: np.ndarray) -> np.ndarray:
+        """
+        Derive this agent's retrieval embedding from a shared query embedding.
+        
+        Args:
+            vector_service: Vector store service used to embed the retrieval keywords once
+            query_embedding: Embedding of the raw query
+            
+        Returns:
+            Unit-length retrieval embedding
+        """
+        if self._keyword_embedding is None:
+            self._keyword_embedding = await asyncio.to_thread(vector_service.embed, self._QUERY_SUFFIX.strip())
+        return self.boost_query_embedding(query_embedding, self._keyword_embedding)
+    
+    def boost_query_embedding(self, query_embedding: np.ndarray, keyword_embedding: np.ndarray) -> np.ndarray:
+        """
+        Blend retrieval keywords into an already computed query embedding.
+        
+        Approximates embedding the query with the agent's keyword suffix
+        appended, without another embedding model call.
+        
+        Args:
+            query_embedding: Embedding of the raw query
+            keyword_embedding: Embedding of the agent's retrieval keywords
+            
+        Returns:
+            Unit-length retrieval embedding
+        """
+        boosted = np.asarray(query_embedding, dtype=np.float32) + KEYWORD_BOOST_WEIGHT * keyword_embedding
+        norm = float(np.linalg.norm(boosted))
+        return boosted / norm if norm > 0 else boosted
+    
+    def build_retrieval_query(self, query: str) -> str:
+        """Build the enhanced query used for policy retrieval."""
+        return query + self._QUERY_SUFFIX
+    
+    async def _cached_retrieve(
+        self,
+        query: str,
+        policy_docs: Optional[List[Dict[str, Any]]] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve candidate policy chunks for a query through the shared semantic cache.
+        
+        Args:
+            query: User query
+            policy_docs: Preloaded retrieval results, used as-is when given
+            query_embedding: Shared embedding of the raw query, reused instead of
+                embedding the enhanced query
+            
+        Returns:
+            Up to retrieval_max_results chunks, in retrieval order and unfiltered
+        """
+        if policy_docs is None:
+            if query_embedding is not None:
+                retrieval_embedding = await self.retrieval_embedding(self.vector_service, query_embedding)
+            else:
+                enhanced_query = self.build_retrieval_query(query)
+                retrieval_embedding = await asyncio.to_thread(self.vector_service.embed, enhanced_query)
+            
+            # Near-duplicate queries are served from the semantic cache
+            policy_docs = self.policy_cache.get(retrieval_embedding, namespace=self.name)
+            if policy_docs is None:
+                # Vector search is blocking I/O; keep it off the event loop
+                policy_docs = await asyncio.to_thread(
+                    self.vector_service.search_by_vector,
+                    retrieval_embedding,
+                    self.retrieval_max_results
+                )
+                self.policy_cache.set(retrieval_embedding, policy_docs, namespace=self.name)
+        
+        return policy_docs[:self.retrieval_max_results]
+    
+    async def _cached_llm_response(
+        self,
+        state: AgentState,
+        policy_docs: List[Dict[str, Any]],
+        generate: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Get the LLM response for a state, generating it only when not already available.
+        
+        Args:
+            state: Current agent state; fused routing may already carry the response
+            policy_docs: Policy chunks the response is grounded on
+            generate: Zero-argument coroutine function calling the LLM
+            
+        Returns:
+            LLM response dictionary
+        """
+        if state.llm_result is not None:
+            return state.llm_result
+        
+        # Identical query over the same policy chunks and context reuses the LLM response
+        cache_key = self.response_cache_key(state.query, policy_docs, state.context)
+        response = self.response_cache.get(cache_key)
+        if response is None:
+            response = await generate()
+            self.response_cache[cache_key] = response
+        return response
+    
+    def response_cache_key(self, query: str, policy_docs: List[Dict[str, Any]], context: Dict[str, Any]) -> bytes:
+        """
+        Build a stable cache key for an LLM response.
+        
+        Args:
+            query: User query
+            policy_docs: Policy chunks the response is grounded on
+            context: Additional context passed to the LLM
+            
+        Returns:
+            Digest identifying the agent, query, policy chunk set and context
+        """
+        chunk_ids = sorted(
+            f"{doc['metadata'].get('doc_id', doc['source'])}:{doc['metadata'].get('chunk_index', 0)}"
+            for doc in policy_docs
+        )
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.name.encode())
+        digest.update(b"|" + query.encode())
+        digest.update(b"|" + ",".join(chunk_ids).encode())
+        digest.update(b"|" + json.dumps(context, sort_keys=True, default=str).encode())
+        return digest.digest()
     
     def set_confidence(self, state: AgentState, confidence: float, reason: str) -> None:
         """
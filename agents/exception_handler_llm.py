@@ -3,25 +3,84 @@ Exception Handler Agent for Healthcare Copilot.
 Handles exceptions and edge cases using LLM for intelligent problem-solving.
 """
 
-from typing import Dict, List
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Optional
+
+import numpy as np
+from cachetools import TTLCache
 from loguru import logger
 
 from agents.base import BaseAgent, AgentState
 from services.vector_service import VectorStoreService
 from services.llm_service import LLMService
 from utils.exceptions import handle_exceptions
+from utils.semantic_cache import SemanticCache
+
+
+# Risk profile per exception severity
+_RISK_LEVELS = MappingProxyType({
+    "low": MappingProxyType({
+        "risk_score": 2,
+        "monitoring_required": False,
+        "escalation_needed": False
+    }),
+    "medium": MappingProxyType({
+        "risk_score": 5,
+        "monitoring_required": True,
+        "escalation_needed": False
+    }),
+    "high": MappingProxyType({
+        "risk_score": 8,
+        "monitoring_required": True,
+        "escalation_needed": True
+    }),
+    "critical": MappingProxyType({
+        "risk_score": 10,
+        "monitoring_required": True,
+        "escalation_needed": True
+    })
+})
+
+# Confidence adjustment per exception severity
+_SEVERITY_ADJUSTMENT = MappingProxyType({
+    "low": 0.05,
+    "medium": 0.0,
+    "high": -0.05,
+    "critical": -0.1
+})
+
+
+@lru_cache(maxsize=16)
+def _plan_confidence(severity: str, policy_count: int, has_steps: bool) -> float:
+    """Compute exception plan confidence from its few discrete inputs."""
+    base_confidence = 0.75  # Base confidence for LLM-generated content
+    
+    # Boost confidence based on available policies
+    policy_boost = min(0.15, policy_count * 0.05)
+    
+    # Boost for detailed plan
+    detail_boost = 0.05 if has_steps else 0.0
+    
+    return min(0.95, base_confidence + policy_boost + detail_boost + _SEVERITY_ADJUSTMENT.get(severity, 0.0))
 
 
 class ExceptionHandlerAgent(BaseAgent):
     """Agent that handles exceptions and edge cases using LLM."""
     
-    def __init__(self, vector_service: VectorStoreService, llm_service: LLMService):
+    _QUERY_SUFFIX = " exception handling emergency procedure policy"
+    retrieval_max_results = 3
+    
+    def __init__(self, vector_service: VectorStoreService, llm_service: LLMService, policy_cache: SemanticCache,
+                 response_cache: TTLCache):
         """
         Initialize Exception Handler Agent.
         
         Args:
             vector_service: Vector store service for document retrieval
             llm_service: LLM service for intelligent exception handling
+            policy_cache: Semantic cache shared across agents for policy retrieval
+            response_cache: TTL cache shared across agents for LLM responses
         """
         super().__init__(
             name="ExceptionHandler",
@@ -29,6 +88,8 @@ class ExceptionHandlerAgent(BaseAgent):
         )
         self.vector_service = vector_service
         self.llm_service = llm_service
+        self.policy_cache = policy_cache
+        self.response_cache = response_cache
     
     @handle_exceptions
     async def process(self, state: AgentState) -> AgentState:
@@ -45,14 +106,18 @@ class ExceptionHandlerAgent(BaseAgent):
             self.log_reasoning(state, f"Starting LLM-powered exception handling: {state.query[:50]}...")
             
             # Step 1: Get relevant policies for exception handling
-            policy_docs = await self._get_relevant_policies(state.query)
+            policy_docs = await self._get_relevant_policies(state.query, state.policy_docs, state.query_embedding)
             self.log_reasoning(state, f"Retrieved {len(policy_docs)} relevant policies")
             
             # Step 2: Generate exception handling plan using LLM
-            exception_plan = await self.llm_service.generate_exception_handling(
-                query=state.query,
-                policy_docs=policy_docs,
-                context=state.context
+            exception_plan = await self._cached_llm_response(
+                state,
+                policy_docs,
+                lambda: self.llm_service.generate_exception_handling(
+                    query=state.query,
+                    policy_docs=policy_docs,
+                    context=state.context
+                )
             )
             
             # Step 3: Enhance plan with additional details
@@ -71,18 +136,20 @@ class ExceptionHandlerAgent(BaseAgent):
         except Exception as e:
             return self.handle_error(state, e)
     
-    async def _get_relevant_policies(self, query: str) -> List[Dict]:
+    async def _get_relevant_policies(
+        self,
+        query: str,
+        policy_docs: Optional[List[Dict]] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict]:
         """Get policies relevant to exception handling."""
-        enhanced_query = f"{query} exception handling emergency procedure policy"
-        results = self.vector_service.search_similar(enhanced_query, max_results=3)
-        return [result for result in results if result["score"] > 0.2]
+        candidates = await self._cached_retrieve(query, policy_docs, query_embedding)
+        return [doc for doc in candidates if doc["score"] > 0.2]
     
     def _enhance_exception_plan(self, exception_plan: Dict, policy_docs: List[Dict]) -> Dict:
         """Enhance LLM-generated exception plan with additional details."""
-        enhanced = exception_plan.copy()
-        
         # Add policy sources
-        enhanced["policy_sources"] = [
+        policy_sources = [
             {
                 "source": doc["source"],
                 "relevance_score": doc["score"]
@@ -90,13 +157,19 @@ class ExceptionHandlerAgent(BaseAgent):
             for doc in policy_docs
         ]
         
-        # Add timeline summary
-        enhanced["timeline_summary"] = self._create_timeline_summary(exception_plan)
-        
         # Add risk assessment
-        enhanced["risk_assessment"] = self._assess_risk_level(exception_plan)
+        risk_assessment = self._assess_risk_level(exception_plan)
         
-        return enhanced
+        if not exception_plan.get("resolution_steps"):
+            return {**exception_plan, "policy_sources": policy_sources, "risk_assessment": risk_assessment}
+        
+        return {
+            **exception_plan,
+            "policy_sources": policy_sources,
+            # Add timeline summary
+            "timeline_summary": self._create_timeline_summary(exception_plan),
+            "risk_assessment": risk_assessment
+        }
     
     def _create_timeline_summary(self, exception_plan: Dict) -> Dict:
         """Create timeline summary from resolution steps."""
@@ -106,61 +179,25 @@ class ExceptionHandlerAgent(BaseAgent):
             "long_term": []
         }
         
+        append_to = {key: actions.append for key, actions in timeline.items()}
+        append_short_term = append_to["short_term"]
+        
+        # Steps with an unrecognised timeline are treated as short term
         for step in exception_plan.get("resolution_steps", []):
-            timeline_key = step.get("timeline", "short_term")
-            if timeline_key in timeline:
-                timeline[timeline_key].append(step.get("action", ""))
+            append_to.get(step.get("timeline", "short_term"), append_short_term)(step.get("action", ""))
         
         return timeline
     
     def _assess_risk_level(self, exception_plan: Dict) -> Dict:
         """Assess risk level based on exception details."""
         severity = exception_plan.get("severity", "medium")
-        
-        risk_levels = {
-            "low": {
-                "risk_score": 2,
-                "monitoring_required": False,
-                "escalation_needed": False
-            },
-            "medium": {
-                "risk_score": 5,
-                "monitoring_required": True,
-                "escalation_needed": False
-            },
-            "high": {
-                "risk_score": 8,
-                "monitoring_required": True,
-                "escalation_needed": True
-            },
-            "critical": {
-                "risk_score": 10,
-                "monitoring_required": True,
-                "escalation_needed": True
-            }
-        }
-        
-        return risk_levels.get(severity, risk_levels["medium"])
+        return dict(_RISK_LEVELS.get(severity, _RISK_LEVELS["medium"]))
     
     def _calculate_confidence(self, policy_docs: List[Dict], exception_plan: Dict) -> float:
         """Calculate confidence in the exception handling plan."""
-        base_confidence = 0.75  # Base confidence for LLM-generated content
-        
-        # Boost confidence based on available policies
-        policy_boost = min(0.15, len(policy_docs) * 0.05)
-        
-        # Boost for detailed plan
-        detail_boost = 0.0
-        if exception_plan.get("resolution_steps") and len(exception_plan["resolution_steps"]) > 1:
-            detail_boost = 0.05
-        
-        # Severity adjustment
-        severity = exception_plan.get("severity", "medium")
-        severity_adjustment = {
-            "low": 0.05,
-            "medium": 0.0,
-            "high": -0.05,
-            "critical": -0.1
-        }.get(severity, 0.0)
-        
-        return min(0.95, base_confidence + policy_boost + detail_boost + severity_adjustment)
\ No newline at end of file
+        resolution_steps = exception_plan.get("resolution_steps")
+        return _plan_confidence(
+            exception_plan.get("severity", "medium"),
+            len(policy_docs),
+            bool(resolution_steps) and len(resolution_steps) > 1
+        )
\ No newline at end of file
@@ -4,17 +4,36 @@ Coordinates LLM-powered agents using intelligent routing.
 """
 
 import asyncio
-from typing import Dict, Any, Optional
+import hashlib
+import json
+import sys
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
 from loguru import logger
 
 from agents.base import AgentState
+from utils.config import settings
 from utils.exceptions import handle_exceptions
 
 
+# Number of policy chunks retrieved to ground a fused route-and-answer call
+FUSED_ROUTING_MAX_RESULTS = 5
+
+
 class MultiAgentOrchestrator:
     """Orchestrates LLM-powered agents with intelligent routing."""
     
-    def __init__(self, policy_interpreter, workflow_planner, exception_handler, llm_service):
+    def __init__(
+        self,
+        policy_interpreter,
+        workflow_planner,
+        exception_handler,
+        llm_service,
+        vector_service=None,
+        route_cache=None
+    ):
         """
         Initialize multi-agent orchestrator with LLM routing.
         
@@ -23,11 +42,22 @@ class MultiAgentOrchestrator:
             workflow_planner: Workflow planner agent  
             exception_handler: Exception handler agent
             llm_service: LLM service for intelligent routing
+            vector_service: Vector store service for batched policy retrieval
+            route_cache: Semantic cache for routing decisions and fused answers
         """
         self.policy_interpreter = policy_interpreter
         self.workflow_planner = workflow_planner
         self.exception_handler = exception_handler
         self.llm_service = llm_service
+        self.vector_service = vector_service
+        self.route_cache = route_cache
+        
+        # Routing name -> agent dispatch table, keyed by interned names
+        self._agents = {
+            sys.intern("PolicyInterpreter"): policy_interpreter,
+            sys.intern("WorkflowPlanner"): workflow_planner,
+            sys.intern("ExceptionHandler"): exception_handler
+        }
         
         logger.info("Multi-agent orchestrator initialized with LLM routing")
     
@@ -49,41 +79,72 @@ class MultiAgentOrchestrator:
         Returns:
             Comprehensive response from coordinated agents
         """
-        start_time = asyncio.get_event_loop().time()
+        start_ns = time.perf_counter_ns()
         
         logger.info(f"Starting LLM multi-agent processing: {query[:50]}...")
         
         try:
-            # Use LLM to route to appropriate agent
-            agent_name = await self.llm_service.route_query(query, context or {})
+            context = context or {}
+            
+            # Embed the query once; routing caches and every agent's retrieval reuse it
+            query_embedding = None
+            if self.vector_service is not None:
+                query_embedding = await asyncio.to_thread(self.vector_service.embed, query)
             
-            # Process with selected agent
-            state = AgentState(query=query, context=context or {})
+            # Routing decisions are cached per query embedding and context
+            context_key = hashlib.blake2b(
+                json.dumps(context, sort_keys=True, default=str).encode(), digest_size=8
+            ).hexdigest()
             
-            if agent_name == "PolicyInterpreter":
-                result = await self.policy_interpreter.process(state)
-            elif agent_name == "WorkflowPlanner":
-                result = await self.workflow_planner.process(state)
-            elif agent_name == "ExceptionHandler":
-                result = await self.exception_handler.process(state)
+            state = None
+            if (
+                not multi_step
+                and settings.fused_routing_enabled
+                and self.route_cache is not None
+                and query_embedding is not None
+            ):
+                # Route and answer in a single LLM round trip
+                agent_name, state = await self._fused_route(query, context, query_embedding, context_key)
             else:
-                result = await self.policy_interpreter.process(state)  # Default
+                # Use LLM to route to appropriate agent
+                agent_name = await self._route(query, context, query_embedding, context_key)
+            agent_name = sys.intern(agent_name)
+            
+            if multi_step:
+                results = await self._process_multi_step(query, context, query_embedding)
+                result = results.get(agent_name, results["PolicyInterpreter"])  # Default
+            else:
+                # Process with selected agent
+                if state is None:
+                    state = AgentState(query=query, context=context, query_embedding=query_embedding)
+                agent = self._agents.get(agent_name, self.policy_interpreter)  # Default
+                result = await agent.process(state)
             
             # Calculate processing time
-            processing_time = int((asyncio.get_event_loop().time() - start_time) * 1000)
+            processing_time = (time.perf_counter_ns() - start_ns) // 1_000_000
             
             # Format response
             response = {
                 "query": query,
                 "agent_used": agent_name,
                 "confidence": result.confidence,
-                "reasoning": result.reasoning_log,
+                "reasoning": list(result.reasoning),
                 "result": result.result,
                 "error": result.error,
                 "processing_time_ms": processing_time,
                 "llm_routing": True
             }
             
+            if multi_step:
+                response["agent_results"] = {
+                    name: {
+                        "confidence": agent_state.confidence,
+                        "result": agent_state.result,
+                        "error": agent_state.error
+                    }
+                    for name, agent_state in results.items()
+                }
+            
             logger.info(f"LLM multi-agent processing completed in {processing_time}ms")
             return response
             
@@ -93,9 +154,141 @@ class MultiAgentOrchestrator:
                 "query": query,
                 "agent_used": "None",
                 "error": str(e),
-                "processing_time_ms": int((asyncio.get_event_loop().time() - start_time) * 1000)
+                "processing_time_ms": (time.perf_counter_ns() - start_ns) // 1_000_000
             }
     
+    async def _route(
+        self,
+        query: str,
+        context: Dict[str, Any],
+        query_embedding: Optional[np.ndarray],
+        context_key: str
+    ) -> str:
+        """
+        Select the agent for a query, reusing cached routing decisions.
+        
+        Args:
+            query: User query
+            context: Additional context
+            query_embedding: Embedding of the query, or None to bypass the cache
+            context_key: Hash of the context the decision is cached under
+            
+        Returns:
+            Name of the selected agent
+        """
+        use_cache = self.route_cache is not None and query_embedding is not None
+        namespace = "route:" + context_key
+        if use_cache:
+            agent_name = self.route_cache.get(query_embedding, namespace=namespace)
+            if agent_name is not None:
+                return agent_name
+        
+        agent_name = await self.llm_service.route_query(query, context)
+        
+        if use_cache:
+            self.route_cache.set(query_embedding, agent_name, namespace=namespace)
+        return agent_name
+    
+    async def _fused_route(
+        self,
+        query: str,
+        context: Dict[str, Any],
+        query_embedding: np.ndarray,
+        context_key: str
+    ) -> Tuple[str, AgentState]:
+        """
+        Route a query and generate its answer in one LLM call.
+        
+        Falls back to two-step routing when the fused call fails or is not
+        confident enough in its agent choice.
+        
+        Args:
+            query: User query
+            context: Additional context
+            query_embedding: Embedding of the query
+            context_key: Hash of the context the answer is cached under
+            
+        Returns:
+            Selected agent name and the state to process it with
+        """
+        namespace = "fused:" + context_key
+        fused = self.route_cache.get(query_embedding, namespace=namespace)
+        
+        if fused is None:
+            try:
+                policy_docs = await asyncio.to_thread(
+                    self.vector_service.search_by_vector,
+                    query_embedding,
+                    FUSED_ROUTING_MAX_RESULTS
+                )
+                answer = await self.llm_service.route_and_answer(query, policy_docs, context)
+                fused = {**answer, "policy_docs": policy_docs}
+                self.route_cache.set(query_embedding, fused, namespace=namespace)
+            except Exception as e:
+                logger.warning(f"Fused routing failed, falling back to two-step routing: {str(e)}")
+        
+        if fused is None or fused["confidence"] < settings.fused_routing_min_confidence:
+            agent_name = await self._route(query, context, query_embedding, context_key)
+            return agent_name, AgentState(query=query, context=context, query_embedding=query_embedding)
+        
+        return fused["agent"], AgentState(
+            query=query,
+            context=context,
+            policy_docs=fused["policy_docs"],
+            llm_result=fused["result"],
+            query_embedding=query_embedding
+        )
+    
+    async def _process_multi_step(
+        self,
+        query: str,
+        context: Dict[str, Any],
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Dict[str, AgentState]:
+        """
+        Run all agents on a query, sharing one batched policy retrieval.
+        
+        Args:
+            query: User query
+            context: Additional context
+            query_embedding: Shared embedding of the raw query
+            
+        Returns:
+            Final agent state keyed by agent name
+        """
+        agents = list(self._agents.values())
+        
+        # One ANN request for all agents instead of one round trip per agent
+        batched_docs: List[Optional[List[Dict]]] = [None] * len(agents)
+        if self.vector_service is not None and query_embedding is not None:
+            # Agent retrieval vectors are derived from the shared embedding, no re-embedding
+            retrieval_embeddings = await asyncio.gather(
+                *(agent.retrieval_embedding(self.vector_service, query_embedding) for agent in agents)
+            )
+            batched_docs = await asyncio.to_thread(
+                self.vector_service.batch_search_by_vector,
+                retrieval_embeddings,
+                max(agent.retrieval_max_results for agent in agents)
+            )
+        
+        # Agents are independent LLM-bound I/O, so run them concurrently
+        states = await asyncio.gather(
+            *(
+                agent.process(AgentState(query=query, context=context, policy_docs=policy_docs))
+                for agent, policy_docs in zip(agents, batched_docs)
+            ),
+            return_exceptions=True
+        )
+        
+        results = {}
+        for agent, state in zip(agents, states):
+            if isinstance(state, BaseException):
+                logger.error(f"Agent {agent.name} failed during multi-step processing: {str(state)}")
+                state = AgentState(query=query, context=context, error=str(state))
+            results[agent.name] = state
+        
+        return results
+    
     @handle_exceptions
     async def process_workflow_request(self, query: str, context: Optional[Dict] = None) -> Dict[str, Any]:
         """Process workflow planning request directly."""
@@ -106,7 +299,7 @@ class MultiAgentOrchestrator:
             "query": query,
             "agent_used": "WorkflowPlanner",
             "confidence": result_state.confidence,
-            "reasoning": result_state.reasoning_log,
+            "reasoning": list(result_state.reasoning),
             "result": result_state.result,
             "error": result_state.error
         }
@@ -121,7 +314,7 @@ class MultiAgentOrchestrator:
             "query": query,
             "agent_used": "ExceptionHandler", 
             "confidence": result_state.confidence,
-            "reasoning": result_state.reasoning_log,
+            "reasoning": list(result_state.reasoning),
             "result": result_state.result,
             "error": result_state.error
         }
@@ -3,25 +3,49 @@ Policy Interpreter Agent for Healthcare Copilot.
 Interprets healthcare policies using LLM for intelligent responses.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import TTLCache
 from loguru import logger
 
 from agents.base import BaseAgent, AgentState
 from services.vector_service import VectorStoreService
 from services.llm_service import LLMService
 from utils.exceptions import handle_exceptions
+from utils.semantic_cache import SemanticCache
+
+
+# Recommendation emitted for each populated interpretation field
+_FIELD_RECOMMENDATIONS = (
+    ("requirements", "Ensure all listed requirements are met"),
+    ("procedures", "Follow documented procedures in sequence"),
+    ("compliance_notes", "Review compliance requirements carefully")
+)
+
+_STANDARD_NEXT_STEPS = (
+    "Document all actions for audit trail",
+    "Escalate to supervisor if exceptions apply",
+    "Ensure compliance documentation is complete"
+)
 
 
 class PolicyInterpreterAgent(BaseAgent):
     """Agent that interprets healthcare policies using LLM."""
     
-    def __init__(self, vector_service: VectorStoreService, llm_service: LLMService):
+    _QUERY_SUFFIX = " policy procedure healthcare"
+    retrieval_max_results = 5
+    
+    def __init__(self, vector_service: VectorStoreService, llm_service: LLMService, policy_cache: SemanticCache,
+                 response_cache: TTLCache):
         """
         Initialize Policy Interpreter Agent.
         
         Args:
             vector_service: Vector store service for document retrieval
             llm_service: LLM service for intelligent interpretation
+            policy_cache: Semantic cache shared across agents for policy retrieval
+            response_cache: TTL cache shared across agents for LLM responses
         """
         super().__init__(
             name="PolicyInterpreter",
@@ -29,6 +53,8 @@ class PolicyInterpreterAgent(BaseAgent):
         )
         self.vector_service = vector_service
         self.llm_service = llm_service
+        self.policy_cache = policy_cache
+        self.response_cache = response_cache
     
     @handle_exceptions
     async def process(self, state: AgentState) -> AgentState:
@@ -45,7 +71,7 @@ class PolicyInterpreterAgent(BaseAgent):
             self.log_reasoning(state, f"Starting LLM-powered policy interpretation: {state.query[:50]}...")
             
             # Step 1: Retrieve relevant policies
-            policy_docs = await self._retrieve_policies(state.query)
+            policy_docs, scores = await self._retrieve_policies(state.query, state.policy_docs, state.query_embedding)
             
             if not policy_docs:
                 return self._handle_no_policies(state)
@@ -53,18 +79,21 @@ class PolicyInterpreterAgent(BaseAgent):
             self.log_reasoning(state, f"Retrieved {len(policy_docs)} relevant policy documents")
             
             # Step 2: Use LLM for interpretation
-            policy_content = "\n\n".join([doc["content"] for doc in policy_docs])
-            interpretation = await self.llm_service.generate_policy_interpretation(
-                query=state.query,
-                policy_content=policy_content,
-                context=state.context
+            interpretation = await self._cached_llm_response(
+                state,
+                policy_docs,
+                lambda: self.llm_service.generate_policy_interpretation(
+                    query=state.query,
+                    policy_content="\n\n".join([doc["content"] for doc in policy_docs]),
+                    context=state.context
+                )
             )
             
             # Step 3: Structure the response
             structured_response = self._structure_response(interpretation, policy_docs)
             
             # Step 4: Calculate confidence
-            confidence = self._calculate_confidence(policy_docs, interpretation)
+            confidence = self._calculate_confidence(scores, interpretation)
             self.set_confidence(state, confidence, f"LLM interpretation with {len(policy_docs)} policies")
             
             # Update state
@@ -76,76 +105,72 @@ class PolicyInterpreterAgent(BaseAgent):
         except Exception as e:
             return self.handle_error(state, e)
     
-    async def _retrieve_policies(self, query: str) -> List[Dict]:
-        """Retrieve relevant policy documents."""
-        enhanced_query = f"{query} policy procedure healthcare"
-        results = self.vector_service.search_similar(enhanced_query, max_results=5)
-        return [result for result in results if result["score"] > 0.3]
+    async def _retrieve_policies(
+        self,
+        query: str,
+        policy_docs: Optional[List[Dict]] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Tuple[List[Dict], np.ndarray]:
+        """Retrieve relevant policy documents, ranked by score, with their scores."""
+        candidates = await self._cached_retrieve(query, policy_docs, query_embedding)
+        scores = np.fromiter((doc["score"] for doc in candidates), dtype=np.float32, count=len(candidates))
+        
+        # Keep relevant documents, best first
+        relevant = np.flatnonzero(scores > 0.3)
+        ranked = relevant[np.argsort(-scores[relevant], kind="stable")]
+        return [candidates[i] for i in ranked], scores[ranked]
     
     def _structure_response(self, interpretation: Dict, policy_docs: List[Dict]) -> Dict:
         """Structure the final response."""
+        sources = []
+        append_source = sources.append
+        for doc in policy_docs:
+            append_source({
+                "source": doc["source"],
+                "relevance_score": doc["score"],
+                "excerpt": " ".join(doc["content"][:200].split()) + "..."
+            })
+        
         return {
             "policy_summary": interpretation.get("direct_answer", ""),
             "requirements": interpretation.get("requirements", []),
             "procedures": interpretation.get("procedures", []),
             "exceptions": interpretation.get("exceptions", []),
             "compliance_notes": interpretation.get("compliance_notes", []),
-            "sources": [
-                {
-                    "source": doc["source"],
-                    "relevance_score": doc["score"],
-                    "excerpt": " ".join(doc["content"][:200].split()) + "..."
-                }
-                for doc in policy_docs
-            ],
+            "sources": sources,
             "recommendations": self._generate_recommendations(interpretation),
             "next_steps": self._generate_next_steps(interpretation)
         }
     
     def _generate_recommendations(self, interpretation: Dict) -> List[str]:
         """Generate recommendations based on LLM interpretation."""
-        recommendations = []
-        
-        if interpretation.get("requirements"):
-            recommendations.append("Ensure all listed requirements are met")
-        
-        if interpretation.get("procedures"):
-            recommendations.append("Follow documented procedures in sequence")
-        
-        if interpretation.get("compliance_notes"):
-            recommendations.append("Review compliance requirements carefully")
-        
+        recommendations = [
+            recommendation
+            for field, recommendation in _FIELD_RECOMMENDATIONS
+            if interpretation.get(field)
+        ]
         recommendations.append("Consult supervisor if uncertain about any aspect")
         return recommendations
     
     def _generate_next_steps(self, interpretation: Dict) -> List[str]:
         """Generate next steps based on LLM interpretation."""
-        next_steps = []
-        
         if interpretation.get("procedures"):
-            next_steps.append("Begin with the first documented procedure")
-        
-        next_steps.extend([
-            "Document all actions for audit trail",
-            "Escalate to supervisor if exceptions apply",
-            "Ensure compliance documentation is complete"
-        ])
-        
-        return next_steps
+            return ["Begin with the first documented procedure", *_STANDARD_NEXT_STEPS]
+        return list(_STANDARD_NEXT_STEPS)
     
-    def _calculate_confidence(self, policy_docs: List[Dict], interpretation: Dict) -> float:
-        """Calculate confidence score."""
-        if not policy_docs:
+    def _calculate_confidence(self, scores: np.ndarray, interpretation: Dict) -> float:
+        """Calculate confidence score from the retrieved documents' relevance scores."""
+        if not scores.size:
             return 0.1
         
         # Base confidence on document relevance
-        avg_relevance = sum(doc["score"] for doc in policy_docs) / len(policy_docs)
+        avg_relevance = float(scores.mean())
         
         # Boost for LLM-generated content
         llm_boost = 0.2 if interpretation.get("direct_answer") else 0.0
         
         # Source count boost
-        source_boost = min(0.2, len(policy_docs) * 0.05)
+        source_boost = min(0.2, scores.size * 0.05)
         
         return min(0.95, avg_relevance + llm_boost + source_boost)
     
@@ -3,25 +3,35 @@ Workflow Planner Agent for Healthcare Copilot.
 Generates step-by-step workflows using LLM for intelligent planning.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
+from cachetools import TTLCache
 from loguru import logger
 
 from agents.base import BaseAgent, AgentState
 from services.vector_service import VectorStoreService
 from services.llm_service import LLMService
 from utils.exceptions import handle_exceptions
+from utils.semantic_cache import SemanticCache
 
 
 class WorkflowPlannerAgent(BaseAgent):
     """Agent that creates structured workflows using LLM."""
     
-    def __init__(self, vector_service: VectorStoreService, llm_service: LLMService):
+    _QUERY_SUFFIX = " workflow procedure policy healthcare"
+    retrieval_max_results = 3
+    
+    def __init__(self, vector_service: VectorStoreService, llm_service: LLMService, policy_cache: SemanticCache,
+                 response_cache: TTLCache):
         """
         Initialize Workflow Planner Agent.
         
         Args:
             vector_service: Vector store service for document retrieval
             llm_service: LLM service for intelligent workflow generation
+            policy_cache: Semantic cache shared across agents for policy retrieval
+            response_cache: TTL cache shared across agents for LLM responses
         """
         super().__init__(
             name="WorkflowPlanner",
@@ -29,6 +39,8 @@ class WorkflowPlannerAgent(BaseAgent):
         )
         self.vector_service = vector_service
         self.llm_service = llm_service
+        self.policy_cache = policy_cache
+        self.response_cache = response_cache
     
     @handle_exceptions
     async def process(self, state: AgentState) -> AgentState:
@@ -45,14 +57,18 @@ class WorkflowPlannerAgent(BaseAgent):
             self.log_reasoning(state, f"Starting LLM-powered workflow planning: {state.query[:50]}...")
             
             # Step 1: Get relevant policies
-            policy_docs = await self._get_relevant_policies(state.query)
+            policy_docs = await self._get_relevant_policies(state.query, state.policy_docs, state.query_embedding)
             self.log_reasoning(state, f"Retrieved {len(policy_docs)} relevant policies")
             
             # Step 2: Generate workflow using LLM
-            workflow_plan = await self.llm_service.generate_workflow_plan(
-                query=state.query,
-                policy_docs=policy_docs,
-                context=state.context
+            workflow_plan = await self._cached_llm_response(
+                state,
+                policy_docs,
+                lambda: self.llm_service.generate_workflow_plan(
+                    query=state.query,
+                    policy_docs=policy_docs,
+                    context=state.context
+                )
             )
             
             # Step 3: Enhance workflow with additional details
@@ -71,18 +87,20 @@ class WorkflowPlannerAgent(BaseAgent):
         except Exception as e:
             return self.handle_error(state, e)
     
-    async def _get_relevant_policies(self, query: str) -> List[Dict]:
+    async def _get_relevant_policies(
+        self,
+        query: str,
+        policy_docs: Optional[List[Dict]] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict]:
         """Get policies relevant to the workflow."""
-        enhanced_query = f"{query} workflow procedure policy healthcare"
-        results = self.vector_service.search_similar(enhanced_query, max_results=3)
-        return [result for result in results if result["score"] > 0.2]
+        candidates = await self._cached_retrieve(query, policy_docs, query_embedding)
+        return [doc for doc in candidates if doc["score"] > 0.2]
     
     def _enhance_workflow(self, workflow_plan: Dict, policy_docs: List[Dict]) -> Dict:
         """Enhance LLM-generated workflow with additional details."""
-        enhanced = workflow_plan.copy()
-        
         # Add policy sources
-        enhanced["policy_sources"] = [
+        policy_sources = [
             {
                 "source": doc["source"],
                 "relevance_score": doc["score"]
@@ -90,24 +108,22 @@ class WorkflowPlannerAgent(BaseAgent):
             for doc in policy_docs
         ]
         
-        # Add dependencies between steps
-        if "steps" in enhanced:
-            enhanced["dependencies"] = self._identify_dependencies(enhanced["steps"])
+        steps = workflow_plan.get("steps")
+        if not steps:
+            return {**workflow_plan, "policy_sources": policy_sources}
         
-        # Add checkpoints
-        enhanced["checkpoints"] = self._add_checkpoints(enhanced.get("steps", []))
-        
-        return enhanced
+        return {
+            **workflow_plan,
+            "policy_sources": policy_sources,
+            # Add dependencies between steps
+            "dependencies": self._identify_dependencies(steps),
+            # Add checkpoints
+            "checkpoints": self._add_checkpoints(steps)
+        }
     
     def _identify_dependencies(self, steps: List[Dict]) -> List[str]:
         """Identify dependencies between workflow steps."""
-        dependencies = []
-        
-        for i, step in enumerate(steps):
-            if i > 0:
-                dependencies.append(f"Step {i+1} depends on completion of Step {i}")
-        
-        return dependencies
+        return [f"Step {i+1} depends on completion of Step {i}" for i in range(1, len(steps))]
     
     def _add_checkpoints(self, steps: List[Dict]) -> List[Dict]:
         """Add quality checkpoints to workflow."""
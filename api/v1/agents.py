@@ -4,17 +4,22 @@ Agent-based API endpoints for Healthcare Copilot.
 
 from typing import Dict, Optional
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from loguru import logger
 
 from services.agent_service_llm import AgentService
+from utils.config import settings
 from utils.exceptions import QueryProcessingError
+from utils.response_cache import TTLResponseCache
 
 router = APIRouter(prefix="/api/v1", tags=["agents"])
 
 # Service will be injected
 agent_service: AgentService = None
 
+# Agent status is polled frequently but changes rarely
+_status_cache = TTLResponseCache(maxsize=8, ttl=settings.status_cache_ttl_seconds)
+
 
 def init_services(agent_svc: AgentService):
     """Initialize services for this router."""
@@ -25,6 +30,8 @@ def init_services(agent_svc: AgentService):
 class AgentQueryRequest(BaseModel):
     """Request model for agent-based queries."""
     
+    model_config = ConfigDict(frozen=True)
+    
     query: str = Field(..., min_length=1, max_length=1000, description="The question to ask")
     context: Optional[Dict] = Field(default_factory=dict, description="Additional context")
     agent: Optional[str] = Field("policy_interpreter", description="Agent to use for processing")
@@ -42,7 +49,12 @@ class AgentQueryResponse(BaseModel):
     processing_time_ms: int = Field(..., description="Processing time in milliseconds")
 
 
-@router.post("/interpret", response_model=AgentQueryResponse)
+@router.post(
+    "/interpret",
+    # Documented schema only; results come from AgentService and skip re-validation
+    response_model=None,
+    responses={200: {"model": AgentQueryResponse}}
+)
 async def interpret_policy(request: AgentQueryRequest):
     """
     Interpret policy using Policy Interpreter agent.
@@ -53,7 +65,7 @@ async def interpret_policy(request: AgentQueryRequest):
     Returns:
         AgentQueryResponse: Structured policy interpretation
     """
-    logger.info(f"Agent policy interpretation: {request.query[:100]}...")
+    logger.opt(lazy=True).info("Agent policy interpretation: {}...", lambda: request.query[:100])
     
     try:
         result = await agent_service.interpret_policy(
@@ -61,7 +73,7 @@ async def interpret_policy(request: AgentQueryRequest):
             context=request.context
         )
         
-        return AgentQueryResponse(**result)
+        return AgentQueryResponse.model_construct(**result)
         
     except QueryProcessingError as e:
         logger.error(f"Policy interpretation error: {e.message}")
@@ -72,7 +84,12 @@ async def interpret_policy(request: AgentQueryRequest):
         raise HTTPException(status_code=500, detail="Internal server error during policy interpretation")
 
 
-@router.post("/validate", response_model=AgentQueryResponse)
+@router.post(
+    "/validate",
+    # Documented schema only; results come from AgentService and skip re-validation
+    response_model=None,
+    responses={200: {"model": AgentQueryResponse}}
+)
 async def validate_action(request: AgentQueryRequest):
     """
     Validate proposed action against policies.
@@ -83,7 +100,7 @@ async def validate_action(request: AgentQueryRequest):
     Returns:
         AgentQueryResponse: Validation result
     """
-    logger.info(f"Agent action validation: {request.query[:100]}...")
+    logger.opt(lazy=True).info("Agent action validation: {}...", lambda: request.query[:100])
     
     try:
         # Enhance query for validation context
@@ -94,7 +111,7 @@ async def validate_action(request: AgentQueryRequest):
             context={**request.context, "validation_mode": True}
         )
         
-        return AgentQueryResponse(**result)
+        return AgentQueryResponse.model_construct(**result)
         
     except QueryProcessingError as e:
         logger.error(f"Action validation error: {e.message}")
@@ -105,6 +122,18 @@ async def validate_action(request: AgentQueryRequest):
         raise HTTPException(status_code=500, detail="Internal server error during action validation")
 
 
+def _build_agent_status() -> Dict:
+    """Collect agent information and health status."""
+    available_agents = agent_service.get_available_agents()
+    health_status = agent_service.health_check()
+    
+    return {
+        "agents": available_agents,
+        "health": health_status,
+        "total_agents": len(available_agents)
+    }
+
+
 @router.get("/agents/status")
 async def get_agent_status():
     """
@@ -114,14 +143,7 @@ async def get_agent_status():
         Dictionary with agent information and health status
     """
     try:
-        available_agents = agent_service.get_available_agents()
-        health_status = agent_service.health_check()
-        
-        return {
-            "agents": available_agents,
-            "health": health_status,
-            "total_agents": len(available_agents)
-        }
+        return await _status_cache.get_or_compute("agent_status", _build_agent_status)
         
     except Exception as e:
         logger.error(f"Error getting agent status: {str(e)}")
@@ -2,85 +2,114 @@
 Document management API endpoints.
 """
 
+import asyncio
 import time
 from datetime import datetime
+from typing import Dict, List
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, UploadFile
 from loguru import logger
 
-from models.schemas import DocumentUploadResponse, PolicyListResponse
+from models.schemas import (
+    BatchDocumentUploadResponse,
+    DocumentStatusResponse,
+    DocumentUploadResponse,
+    PolicyListResponse
+)
+from services.document_registry import DocumentRegistry
 from services.document_service import DocumentProcessor
 from services.vector_service import VectorStoreService
 from utils.exceptions import DocumentProcessingError
+from utils.tags import parse_tags
 
 router = APIRouter(prefix="/api/v1", tags=["documents"])
 
+# Maximum number of files accepted by a single batch upload
+MAX_BATCH_SIZE = 48
+
 # Services will be injected
 document_processor: DocumentProcessor = None
 vector_service: VectorStoreService = None
+document_registry: DocumentRegistry = None
 
 
-def init_services(doc_proc: DocumentProcessor, vec_svc: VectorStoreService):
+def init_services(doc_proc: DocumentProcessor, vec_svc: VectorStoreService, doc_registry: DocumentRegistry):
     """Initialize services for this router."""
-    global document_processor, vector_service
+    global document_processor, vector_service, document_registry
     document_processor = doc_proc
     vector_service = vec_svc
+    document_registry = doc_registry
 
 
-@router.post("/ingest", response_model=DocumentUploadResponse)
+@router.post("/ingest", response_model=DocumentUploadResponse, status_code=202)
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     category: str = Form(None),
     tags: str = Form("")
 ):
-    """Upload and process a policy document."""
+    """
+    Accept a policy document and process it in the background.
+    
+    The file is validated and saved before responding; extraction and
+    embedding run after the response is sent. Poll
+    /policies/{document_id}/status for the outcome.
+    """
     start_time = time.time()
     
-    logger.info(f"Processing document upload: {file.filename}")
+    logger.info("Processing document upload: {}", file.filename)
     
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Validate file
-        document_processor.validate_file(
-            filename=file.filename,
-            file_size=len(file_content),
-            content_type=file.content_type
+        # Validate and stream the upload to disk without buffering it in memory
+        doc_id, file_size, content_hash = await asyncio.to_thread(
+            document_processor.save_file, file.file, file.filename
         )
         
-        # Save file and get document ID
-        doc_id = document_processor.save_file(file_content, file.filename)
-        
-        # Extract text content
-        text_content = document_processor.extract_text(doc_id, file.filename)
+        # Identical content already ingested: drop the new copy and point at the original
+        existing = await asyncio.to_thread(document_registry.find_by_content_hash, content_hash)
+        if existing is not None:
+            await asyncio.to_thread(document_processor.discard_file, doc_id, file.filename)
+            logger.info("Upload {} duplicates document {}", file.filename, existing["id"])
+            
+            return DocumentUploadResponse(
+                document_id=existing["id"],
+                filename=file.filename,
+                status=existing["status"],
+                message=f"Identical document already ingested as {existing['filename']}.",
+                processing_time_ms=int((time.time() - start_time) * 1000)
+            )
         
         # Parse tags
-        tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
+        tag_list = parse_tags(tags)
         
-        # Add to vector store
         metadata = {
             "category": category,
             "tags": ",".join(tag_list) if tag_list else "",  # Convert list to string
-            "upload_date": datetime.now().isoformat()
+            "upload_date": datetime.now().isoformat(),
+            "content_hash": content_hash
         }
         
-        chunks_added = vector_service.add_document(
-            text=text_content,
+        await asyncio.to_thread(
+            document_registry.register,
             doc_id=doc_id,
             filename=file.filename,
-            metadata=metadata
+            category=category,
+            tags=tag_list,
+            upload_date=metadata["upload_date"],
+            size_bytes=file_size,
+            status="pending",
+            content_hash=content_hash
         )
         
-        processing_time = int((time.time() - start_time) * 1000)
+        background_tasks.add_task(_process_document, doc_id, file.filename, metadata)
         
-        logger.info(f"Document {doc_id} processed successfully in {processing_time}ms")
+        processing_time = int((time.time() - start_time) * 1000)
         
         return DocumentUploadResponse(
             document_id=doc_id,
             filename=file.filename,
-            status="processed",
-            message=f"Document processed successfully. Added {chunks_added} text chunks to knowledge base.",
+            status="pending",
+            message="Document accepted for processing.",
             processing_time_ms=processing_time
         )
         
@@ -93,52 +122,231 @@ async def upload_document(
         raise HTTPException(status_code=500, detail="Internal server error during document processing")
 
 
-@router.get("/policies", response_model=PolicyListResponse)
-async def list_policies():
-    """List all available policy documents."""
-    logger.debug("Listing available policies")
+async def _process_document(doc_id: str, filename: str, metadata: Dict) -> None:
+    """Extract, embed and index a saved upload, recording the outcome in the registry."""
+    start_time = time.time()
     
     try:
-        # Get vector store statistics and documents
-        stats = vector_service.get_collection_stats()
+        text_content = await asyncio.to_thread(document_processor.extract_text, doc_id, filename)
         
-        # Get all documents from vector store with metadata
-        all_docs = vector_service.collection.get(
-            include=["metadatas"]
+        chunks_added = await asyncio.to_thread(
+            vector_service.add_document,
+            text=text_content,
+            doc_id=doc_id,
+            filename=filename,
+            metadata=metadata
         )
         
-        # Group by document ID to avoid duplicates (since we have chunks)
-        doc_map = {}
-        categories_set = set()
+        await asyncio.to_thread(document_registry.set_status, doc_id, "processed")
+        
+        processing_time = int((time.time() - start_time) * 1000)
+        logger.info("Document {} processed successfully with {} chunks in {}ms", doc_id, chunks_added, processing_time)
+        
+    except Exception as e:
+        message = e.message if isinstance(e, DocumentProcessingError) else str(e)
+        logger.error(f"Background processing failed for document {doc_id}: {message}")
+        await asyncio.to_thread(document_registry.set_status, doc_id, "failed")
         
-        for i, doc_id in enumerate(all_docs["ids"]):
-            metadata = all_docs["metadatas"][i] if all_docs["metadatas"] else {}
-            original_doc_id = metadata.get("doc_id")
+        # Failed uploads are never deduplicated against, so keep no copy of their content
+        await asyncio.to_thread(document_processor.discard_file, doc_id, filename)
+
+
+async def _prepare_document(file: UploadFile, metadata: Dict) -> Dict:
+    """Validate, save and extract one file of a batch upload."""
+    upload = await asyncio.to_thread(
+        document_processor.process_upload,
+        file.file,
+        file.filename,
+        document_registry.find_by_content_hash
+    )
+    
+    return {
+        "duplicate_of": upload["duplicate_of"],
+        "text": upload["text"],
+        "doc_id": upload["doc_id"],
+        "filename": file.filename,
+        "metadata": {**metadata, "content_hash": upload["content_hash"]},
+        "size_bytes": upload["size_bytes"]
+    }
+
+
+@router.post("/ingest/batch", response_model=BatchDocumentUploadResponse)
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    category: str = Form(None),
+    tags: str = Form("")
+):
+    """Upload and process several policy documents with a single embedding pass."""
+    start_time = time.time()
+    
+    if len(files) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch of {len(files)} files exceeds maximum of {MAX_BATCH_SIZE}"
+        )
+    
+    logger.info("Processing batch upload of {} documents", len(files))
+    
+    try:
+        # Parse tags
+        tag_list = parse_tags(tags)
+        
+        metadata = {
+            "category": category,
+            "tags": ",".join(tag_list) if tag_list else "",  # Convert list to string
+            "upload_date": datetime.now().isoformat()
+        }
+        
+        # Validate, save and extract every file concurrently; failures are reported per file
+        prepared = await asyncio.gather(
+            *(_prepare_document(file, metadata) for file in files),
+            return_exceptions=True
+        )
+        
+        # Files repeating content seen earlier in this batch are dropped and share its outcome
+        documents = []
+        first_by_hash: Dict[str, Dict] = {}
+        copy_of: Dict[int, Dict] = {}
+        for index, document in enumerate(prepared):
+            if isinstance(document, BaseException) or document["duplicate_of"] is not None:
+                continue
+            content_hash = document["metadata"]["content_hash"]
+            first = first_by_hash.get(content_hash)
+            if first is None:
+                first_by_hash[content_hash] = document
+                documents.append(document)
+            else:
+                copy_of[index] = first
+                await asyncio.to_thread(document_processor.discard_file, document["doc_id"], document["filename"])
+        
+        # One embedding pass and one vector store write for the whole batch
+        try:
+            chunk_counts = await asyncio.to_thread(vector_service.add_documents, documents)
             
-            if original_doc_id and original_doc_id not in doc_map:
-                # Parse tags back to list
-                tags_str = metadata.get("tags", "")
-                tags_list = [tag.strip() for tag in tags_str.split(",") if tag.strip()] if tags_str else []
-                
-                category = metadata.get("category")
-                if category:
-                    categories_set.add(category)
-                
-                doc_map[original_doc_id] = {
-                    "id": original_doc_id,
-                    "filename": metadata.get("filename", f"Document {original_doc_id[:8]}"),
-                    "category": category,
-                    "tags": tags_list,
-                    "upload_date": metadata.get("upload_date", datetime.now().isoformat()),
-                    "size_bytes": metadata.get("char_count", 0),
-                    "status": "processed"
-                }
-        
-        # Convert to list
-        document_infos = list(doc_map.values())
+            await asyncio.to_thread(
+                document_registry.register_many,
+                [
+                    {
+                        "doc_id": document["doc_id"],
+                        "filename": document["filename"],
+                        "category": category,
+                        "tags": tag_list,
+                        "upload_date": metadata["upload_date"],
+                        "size_bytes": document["size_bytes"],
+                        "content_hash": document["metadata"]["content_hash"]
+                    }
+                    for document in documents
+                ]
+            )
+            batch_error = None
+        except Exception as e:
+            batch_error = e.message if isinstance(e, DocumentProcessingError) else str(e)
+            logger.error(f"Batch indexing failed for {len(documents)} documents: {batch_error}")
+            chunk_counts = [0] * len(documents)
+            
+            # Drop whatever part of the batch reached the vector store, so no chunks stay
+            # searchable without a registry entry
+            for document in documents:
+                try:
+                    await asyncio.to_thread(vector_service.remove_document, document["doc_id"])
+                except Exception as cleanup_error:
+                    logger.error(f"Failed to remove chunks of document {document['doc_id']}: {str(cleanup_error)}")
+                await asyncio.to_thread(document_processor.discard_file, document["doc_id"], document["filename"])
+        
+        chunks_by_doc = {document["doc_id"]: count for document, count in zip(documents, chunk_counts)}
+        
+        processing_time = int((time.time() - start_time) * 1000)
+        
+        results = []
+        failed_count = 0
+        for index, (file, document) in enumerate(zip(files, prepared)):
+            if isinstance(document, BaseException):
+                message = document.message if isinstance(document, DocumentProcessingError) else str(document)
+                logger.error(f"Document processing error for {file.filename}: {message}")
+                failed_count += 1
+                results.append(DocumentUploadResponse(
+                    document_id="",
+                    filename=file.filename,
+                    status="failed",
+                    message=message,
+                    processing_time_ms=processing_time
+                ))
+            elif document["duplicate_of"] is not None:
+                existing = document["duplicate_of"]
+                results.append(DocumentUploadResponse(
+                    document_id=existing["id"],
+                    filename=file.filename,
+                    status=existing["status"],
+                    message=f"Identical document already ingested as {existing['filename']}.",
+                    processing_time_ms=processing_time
+                ))
+            elif batch_error is not None:
+                failed_count += 1
+                results.append(DocumentUploadResponse(
+                    document_id="",
+                    filename=file.filename,
+                    status="failed",
+                    message=f"Indexing failed: {batch_error}",
+                    processing_time_ms=processing_time
+                ))
+            elif index in copy_of:
+                first = copy_of[index]
+                results.append(DocumentUploadResponse(
+                    document_id=first["doc_id"],
+                    filename=file.filename,
+                    status="processed",
+                    message=f"Identical to {first['filename']} in this batch.",
+                    processing_time_ms=processing_time
+                ))
+            else:
+                results.append(DocumentUploadResponse(
+                    document_id=document["doc_id"],
+                    filename=file.filename,
+                    status="processed",
+                    message=f"Document processed successfully. Added {chunks_by_doc[document['doc_id']]} text chunks to knowledge base.",
+                    processing_time_ms=processing_time
+                ))
+        
+        processed_count = 0 if batch_error is not None else len(documents)
+        logger.info("Batch of {}/{} documents processed in {}ms", processed_count, len(files), processing_time)
+        
+        return BatchDocumentUploadResponse(
+            documents=results,
+            processed_count=processed_count,
+            failed_count=failed_count,
+            processing_time_ms=processing_time
+        )
+        
+    except Exception as e:
+        logger.error(f"Unexpected error during batch document upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error during document processing")
+
+
+@router.get("/policies/{doc_id}/status", response_model=DocumentStatusResponse)
+async def get_document_status(doc_id: str):
+    """Get the processing status of an uploaded document."""
+    document = await asyncio.to_thread(document_registry.get, doc_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
+    
+    return DocumentStatusResponse(
+        document_id=document["id"],
+        filename=document["filename"],
+        status=document["status"]
+    )
+
+
+@router.get("/policies", response_model=PolicyListResponse)
+async def list_policies():
+    """List all available policy documents."""
+    logger.debug("Listing available policies")
+    
+    try:
+        # One registry row per document; no per-chunk scan of the vector store
+        document_infos = await asyncio.to_thread(document_registry.list_documents)
         
         # Get categories
-        categories = list(categories_set) if categories_set else ["policy", "sop", "insurance", "procedure"]
+        categories = document_registry.list_categories() or ["policy", "sop", "insurance", "procedure"]
         
         return PolicyListResponse(
             documents=document_infos,
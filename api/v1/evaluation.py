@@ -7,10 +7,18 @@ from typing import Dict
 from loguru import logger
 
 from services.llm_service import LLMService
-from services.auth_service import AuthService
+from services.auth_service import auth_service
 
 router = APIRouter(prefix="/api/v1/evaluation", tags=["evaluation"])
-auth_service = AuthService()
+
+# Service will be injected
+llm_service: LLMService = None
+
+
+def init_services(llm_svc: LLMService):
+    """Initialize services for this router."""
+    global llm_service
+    llm_service = llm_svc
 
 
 @router.get("/metrics")
@@ -19,7 +27,6 @@ async def get_evaluation_metrics() -> Dict:
     Get aggregate evaluation metrics.
     """
     try:
-        llm_service = LLMService()
         metrics = llm_service.get_evaluation_metrics()
         
         return {
@@ -37,7 +44,6 @@ async def get_guardrails_status() -> Dict:
     Get guardrails service status.
     """
     try:
-        llm_service = LLMService()
         status = llm_service.get_guardrails_status()
         
         return {
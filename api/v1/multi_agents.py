@@ -4,17 +4,22 @@ Multi-agent API endpoints for Healthcare Copilot Phase 3.
 
 from typing import Dict, Optional
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from loguru import logger
 
 from services.agent_service_llm import AgentService
+from utils.config import settings
 from utils.exceptions import QueryProcessingError
+from utils.response_cache import TTLResponseCache
 
 router = APIRouter(prefix="/api/v1", tags=["multi-agents"])
 
 # Service will be injected
 agent_service: AgentService = None
 
+# Agent information is polled frequently but changes rarely
+_agents_cache = TTLResponseCache(maxsize=8, ttl=settings.status_cache_ttl_seconds)
+
 
 def init_services(agent_svc: AgentService):
     """Initialize services for this router."""
@@ -25,6 +30,8 @@ def init_services(agent_svc: AgentService):
 class WorkflowRequest(BaseModel):
     """Request model for workflow planning."""
     
+    model_config = ConfigDict(frozen=True)
+    
     query: str = Field(..., min_length=1, max_length=1000, description="Workflow planning request")
     context: Optional[Dict] = Field(default_factory=dict, description="Additional context")
 
@@ -32,6 +39,8 @@ class WorkflowRequest(BaseModel):
 class ExceptionRequest(BaseModel):
     """Request model for exception handling."""
     
+    model_config = ConfigDict(frozen=True)
+    
     query: str = Field(..., min_length=1, max_length=1000, description="Exception or problem description")
     context: Optional[Dict] = Field(default_factory=dict, description="Additional context")
 
@@ -39,6 +48,8 @@ class ExceptionRequest(BaseModel):
 class ComplexQueryRequest(BaseModel):
     """Request model for complex multi-agent queries."""
     
+    model_config = ConfigDict(frozen=True)
+    
     query: str = Field(..., min_length=1, max_length=1000, description="Complex query requiring multiple agents")
     context: Optional[Dict] = Field(default_factory=dict, description="Additional context")
     multi_step: bool = Field(False, description="Enable multi-step agent processing")
@@ -55,7 +66,7 @@ async def plan_workflow(request: WorkflowRequest):
     Returns:
         Structured workflow with steps, roles, and timelines
     """
-    logger.info(f"Workflow planning request: {request.query[:100]}...")
+    logger.opt(lazy=True).info("Workflow planning request: {}...", lambda: request.query[:100])
     
     try:
         result = await agent_service.process_workflow_request(
@@ -85,7 +96,7 @@ async def handle_exception(request: ExceptionRequest):
     Returns:
         Exception handling plan with resolution steps and escalation
     """
-    logger.info(f"Exception handling request: {request.query[:100]}...")
+    logger.opt(lazy=True).info("Exception handling request: {}...", lambda: request.query[:100])
     
     try:
         result = await agent_service.process_exception_request(
@@ -115,7 +126,7 @@ async def process_complex_query(request: ComplexQueryRequest):
     Returns:
         Coordinated response from multiple agents
     """
-    logger.info(f"Complex query processing: {request.query[:100]}...")
+    logger.opt(lazy=True).info("Complex query processing: {}...", lambda: request.query[:100])
     
     try:
         result = await agent_service.process_complex_query(
@@ -135,6 +146,25 @@ async def process_complex_query(request: ComplexQueryRequest):
         raise HTTPException(status_code=500, detail="Internal server error during complex query processing")
 
 
+def _build_all_agents() -> Dict:
+    """Collect information and health status for all agents."""
+    available_agents = agent_service.get_available_agents()
+    health_status = agent_service.health_check()
+    
+    return {
+        "agents": available_agents,
+        "health": health_status,
+        "total_agents": len(available_agents),
+        "multi_agent_enabled": True,
+        "capabilities": [
+            "Policy Interpretation",
+            "Workflow Planning", 
+            "Exception Handling",
+            "Multi-Agent Coordination"
+        ]
+    }
+
+
 @router.get("/agents/all")
 async def get_all_agents():
     """
@@ -144,21 +174,7 @@ async def get_all_agents():
         Dictionary with all agent information
     """
     try:
-        available_agents = agent_service.get_available_agents()
-        health_status = agent_service.health_check()
-        
-        return {
-            "agents": available_agents,
-            "health": health_status,
-            "total_agents": len(available_agents),
-            "multi_agent_enabled": True,
-            "capabilities": [
-                "Policy Interpretation",
-                "Workflow Planning", 
-                "Exception Handling",
-                "Multi-Agent Coordination"
-            ]
-        }
+        return await _agents_cache.get_or_compute("all_agents", _build_all_agents)
         
     except Exception as e:
         logger.error(f"Error getting agent information: {str(e)}")
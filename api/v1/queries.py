@@ -24,7 +24,7 @@ def init_services(agent_svc: AgentService):
 @router.post("/query", response_model=QueryResponse)
 async def query_policies(request: QueryRequest):
     """Query policies using LLM-powered agent."""
-    logger.info(f"Processing LLM query: {request.query[:100]}...")
+    logger.opt(lazy=True).info("Processing LLM query: {}...", lambda: request.query[:100])
     
     try:
         # Process with LLM-powered agent
@@ -33,13 +33,14 @@ async def query_policies(request: QueryRequest):
             context=request.context
         )
         
-        return QueryResponse(
-            query=request.query,
-            answer=result.get("result", {}).get("direct_answer", "No answer available"),
-            results=result.get("sources", []),
-            confidence=result.get("confidence", 0.0),
-            processing_time_ms=100
-        )
+        # Validated and serialized once by the route's response_model
+        return {
+            "query": request.query,
+            "answer": result.get("result", {}).get("direct_answer", "No answer available"),
+            "results": result.get("sources", []),
+            "confidence": result.get("confidence", 0.0),
+            "processing_time_ms": result.get("processing_time_ms", 0)
+        }
         
     except QueryProcessingError as e:
         logger.error(f"LLM query processing error: {str(e)}")
@@ -50,16 +51,20 @@ async def query_policies(request: QueryRequest):
         raise HTTPException(status_code=500, detail="Internal server error during query processing")
 
 
+# Query suggestions paired with their lowercase form for case-insensitive matching
+_SUGGESTIONS = (
+    "What is our appointment scheduling policy?",
+    "How do we handle insurance authorization?",
+    "What are the patient discharge procedures?"
+)
+_LOWERCASE_SUGGESTIONS = tuple((suggestion.lower(), suggestion) for suggestion in _SUGGESTIONS)
+
+
 @router.get("/suggestions")
 async def get_query_suggestions(q: str = ""):
     """Get query suggestions."""
-    suggestions = [
-        "What is our appointment scheduling policy?",
-        "How do we handle insurance authorization?",
-        "What are the patient discharge procedures?"
-    ]
-    
-    if q:
-        suggestions = [s for s in suggestions if q.lower() in s.lower()]
+    if not q:
+        return {"suggestions": list(_SUGGESTIONS)}
     
-    return {"suggestions": suggestions}
\ No newline at end of file
+    needle = q.lower()
+    return {"suggestions": [suggestion for lowered, suggestion in _LOWERCASE_SUGGESTIONS if needle in lowered]}
\ No newline at end of file
@@ -2,47 +2,62 @@
 System monitoring and statistics API endpoints.
 """
 
+from typing import Dict
+
 from fastapi import APIRouter, HTTPException
 from loguru import logger
 
+from services.document_registry import DocumentRegistry
 from services.document_service import DocumentProcessor
 from services.vector_service import VectorStoreService
+from utils.config import settings
+from utils.response_cache import TTLResponseCache
 
 router = APIRouter(prefix="/api/v1", tags=["system"])
 
 # Services will be injected
 document_processor: DocumentProcessor = None
 vector_service: VectorStoreService = None
+document_registry: DocumentRegistry = None
+
+# System statistics are polled frequently but change rarely
+_stats_cache = TTLResponseCache(maxsize=8, ttl=settings.status_cache_ttl_seconds)
 
 
-def init_services(doc_proc: DocumentProcessor, vec_svc: VectorStoreService):
+def init_services(doc_proc: DocumentProcessor, vec_svc: VectorStoreService, doc_registry: DocumentRegistry):
     """Initialize services for this router."""
-    global document_processor, vector_service
+    global document_processor, vector_service, document_registry
     document_processor = doc_proc
     vector_service = vec_svc
+    document_registry = doc_registry
+
+
+def _build_system_stats() -> Dict:
+    """Collect vector store and document statistics."""
+    # Get vector store stats
+    vector_stats = vector_service.get_collection_stats()
+    
+    # Count processed documents from the registry instead of scanning the processed directory
+    total_processed = document_registry.count(status="processed")
+    
+    return {
+        "vector_store": vector_stats,
+        "documents": {
+            "total_processed": total_processed,
+            "processing_status": "healthy"
+        },
+        "system": {
+            "uptime": "running",
+            "version": "1.0.0"
+        }
+    }
 
 
 @router.get("/stats")
 async def get_system_stats():
     """Get system statistics and metrics."""
     try:
-        # Get vector store stats
-        vector_stats = vector_service.get_collection_stats()
-        
-        # Get document processor stats
-        documents = document_processor.list_documents()
-        
-        return {
-            "vector_store": vector_stats,
-            "documents": {
-                "total_processed": len(documents),
-                "processing_status": "healthy"
-            },
-            "system": {
-                "uptime": "running",
-                "version": "1.0.0"
-            }
-        }
+        return await _stats_cache.get_or_compute("system_stats", _build_system_stats)
         
     except Exception as e:
         logger.error(f"Error getting system stats: {str(e)}")
@@ -2,25 +2,107 @@
 WebSocket API for real-time Healthcare Copilot communication.
 """
 
-import json
+import asyncio
+import itertools
+import time
 import uuid
-from typing import Dict, Set
+import zlib
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple, Union
+
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 
 from services.agent_service_llm import AgentService
 from services.conversation_service import ConversationMemoryService, ConversationTurn
+from utils.config import settings
 
 router = APIRouter()
 
+# Maximum number of connections a broadcast enqueues to before yielding to the event loop
+BROADCAST_BATCH_SIZE = 64
+
+# Maximum number of unsent messages per connection before it is dropped as too slow
+SEND_QUEUE_SIZE = 256
+
+# Replies faster than this are sent without a preceding typing indicator
+TYPING_INDICATOR_DELAY_SECONDS = 0.15
+
+# Staleness bound of the cached timestamp in outgoing messages
+CLOCK_TICK_SECONDS = 0.05
+
+# Maximum number of conversation turns waiting to be saved before the oldest is dropped
+TURN_QUEUE_SIZE = 1024
+
+# Broadcasts to more connections than this are zlib-compressed once when enabled
+BROADCAST_COMPRESSION_MIN_CONNECTIONS = 8
+
+# First byte of a binary frame carrying a zlib-compressed JSON message
+COMPRESSED_FRAME_PREFIX = b"\x01"
+
+# Close code sent to connections dropped for not keeping up ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
 # Services will be injected
 agent_service: AgentService = None
 conversation_service: ConversationMemoryService = None
 
-# Active WebSocket connections
-active_connections: Dict[str, WebSocket] = {}
-user_sessions: Dict[str, str] = {}  # websocket_id -> session_id
+# Turn IDs are unique per process when prefixed with the connection's UUID
+_turn_counter = itertools.count()
+
+# Conversation turns waiting to be saved by the background writer
+_turn_queue: asyncio.Queue = asyncio.Queue(maxsize=TURN_QUEUE_SIZE)
+_turn_writer_task: Optional[asyncio.Task] = None
+
+
+# Prebuilt frames for fixed-shape messages; only the JSON-escaped values are spliced in
+_WELCOME_FRAME = (
+    '{"type":"connection_established","session_id":%s,'
+    '"message":"Connected to Healthcare Copilot","timestamp":"%s"}'
+)
+_TYPING_FRAME = '{"type":"agent_typing","message":"Agent is processing your request...","timestamp":"%s"}'
+_ERROR_FRAME = '{"type":"error","message":%s,"timestamp":"%s"}'
+_RESPONSE_FRAME = '{"type":"%s","result":%s,"session_context":%s,"timestamp":"%s"}'
+
+
+# Message timestamp refreshed by a ticker task while connections are open
+_now_iso = datetime.now().isoformat()
+_clock_task: Optional[asyncio.Task] = None
+
+
+async def _tick_clock():
+    """Refresh the cached message timestamp until the last connection closes."""
+    global _now_iso, _clock_task
+    while manager.conns:
+        _now_iso = datetime.now().isoformat()
+        await asyncio.sleep(CLOCK_TICK_SECONDS)
+    _clock_task = None
+
+
+def _ensure_clock():
+    """Start the timestamp ticker if it is not running."""
+    global _now_iso, _clock_task
+    if _clock_task is None:
+        _now_iso = datetime.now().isoformat()
+        _clock_task = asyncio.create_task(_tick_clock())
+
+
+def _dumps(message: dict) -> str:
+    """Serialize a WebSocket message; datetimes and numpy values are encoded natively."""
+    return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _json_string(value: str) -> str:
+    """Encode a string as a quoted, escaped JSON string literal."""
+    return orjson.dumps(value).decode()
+
+
+async def _send_error(connection_id: str, message: str):
+    """Queue an error message for a connection."""
+    await manager.send_frame(connection_id, _ERROR_FRAME % (_json_string(message), _now_iso))
 
 
 def init_services(agent_svc: AgentService, conv_svc: ConversationMemoryService):
@@ -30,34 +112,104 @@ def init_services(agent_svc: AgentService, conv_svc: ConversationMemoryService):
     conversation_service = conv_svc
 
 
+@dataclass(slots=True)
+class Conn:
+    """State of one WebSocket connection."""
+    
+    websocket: WebSocket
+    user_id: str
+    queue: asyncio.Queue
+    writer: Optional[asyncio.Task] = None
+    session_id: Optional[str] = None
+
+
 class ConnectionManager:
-    """Manages WebSocket connections."""
+    """Manages WebSocket connections, each drained by its own long-lived writer task."""
     
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        self.conns: Dict[str, Conn] = {}
+        self._closing: Set[asyncio.Task] = set()
     
-    async def connect(self, websocket: WebSocket, connection_id: str):
-        """Accept WebSocket connection."""
+    async def connect(self, websocket: WebSocket, connection_id: str, user_id: str) -> Conn:
+        """Accept WebSocket connection and start its writer."""
         await websocket.accept()
-        self.active_connections[connection_id] = websocket
+        conn = Conn(websocket=websocket, user_id=user_id, queue=asyncio.Queue(maxsize=SEND_QUEUE_SIZE))
+        conn.writer = asyncio.create_task(self._writer(connection_id, websocket, conn.queue))
+        self.conns[connection_id] = conn
+        _ensure_clock()
         logger.info(f"WebSocket connected: {connection_id}")
+        return conn
     
     def disconnect(self, connection_id: str):
-        """Remove WebSocket connection."""
-        if connection_id in self.active_connections:
-            del self.active_connections[connection_id]
+        """Remove WebSocket connection and stop its writer."""
+        conn = self.conns.pop(connection_id, None)
+        if conn is not None:
+            if conn.writer is not None and conn.writer is not asyncio.current_task():
+                conn.writer.cancel()
             logger.info(f"WebSocket disconnected: {connection_id}")
     
     async def send_message(self, connection_id: str, message: dict):
-        """Send message to specific connection."""
-        if connection_id in self.active_connections:
-            websocket = self.active_connections[connection_id]
-            await websocket.send_text(json.dumps(message))
+        """Queue message for a specific connection."""
+        self._enqueue(connection_id, _dumps(message))
+    
+    async def send_frame(self, connection_id: str, frame: str):
+        """Queue an already serialized message for a specific connection."""
+        self._enqueue(connection_id, frame)
     
     async def broadcast(self, message: dict):
-        """Broadcast message to all connections."""
-        for websocket in self.active_connections.values():
-            await websocket.send_text(json.dumps(message))
+        """Queue message for all connections, dropping ones that cannot keep up."""
+        data: Union[str, bytes] = _dumps(message)
+        connection_ids = list(self.conns)
+        
+        # Compress once for all recipients instead of per connection; clients opt in
+        # and recognise compressed binary frames by their prefix byte
+        if settings.ws_broadcast_compression and len(connection_ids) > BROADCAST_COMPRESSION_MIN_CONNECTIONS:
+            data = COMPRESSED_FRAME_PREFIX + zlib.compress(data.encode(), 1)
+        
+        # Enqueue in bounded batches, yielding between them so message handlers keep running
+        for start in range(0, len(connection_ids), BROADCAST_BATCH_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            for connection_id in connection_ids[start:start + BROADCAST_BATCH_SIZE]:
+                self._enqueue(connection_id, data)
+    
+    def _enqueue(self, connection_id: str, data: Union[str, bytes]):
+        """Hand serialized data to a connection's writer without waiting on the socket."""
+        conn = self.conns.get(connection_id)
+        if conn is None:
+            return
+        
+        try:
+            conn.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            logger.warning(f"Send queue full for {connection_id}; dropping slow connection")
+            self.disconnect(connection_id)
+            # Close the socket as well so the endpoint's receive loop ends
+            task = asyncio.create_task(self._close(connection_id, conn.websocket, SLOW_CONSUMER_CLOSE_CODE))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+    
+    async def _close(self, connection_id: str, websocket: WebSocket, code: int):
+        """Close a dropped connection's socket; it may already be closed by the client."""
+        try:
+            await websocket.close(code=code)
+        except Exception as e:
+            logger.debug(f"Closing WebSocket {connection_id} failed: {str(e)}")
+    
+    async def _writer(self, connection_id: str, websocket: WebSocket, queue: asyncio.Queue):
+        """Send queued messages to one connection in order until it closes."""
+        try:
+            while True:
+                data = await queue.get()
+                if isinstance(data, bytes):
+                    await websocket.send_bytes(data)
+                else:
+                    await websocket.send_text(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"WebSocket send to {connection_id} failed: {str(e)}")
+            self.disconnect(connection_id)
 
 
 manager = ConnectionManager()
@@ -69,90 +221,83 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
     connection_id = str(uuid.uuid4())
     
     try:
-        await manager.connect(websocket, connection_id)
+        conn = await manager.connect(websocket, connection_id, user_id)
         
         # Create or get conversation session
-        session_id = f"ws_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        session_id = f"ws_{user_id}_{time.time_ns()}"
         conversation_service.create_session(session_id, user_id)
-        user_sessions[connection_id] = session_id
+        conn.session_id = session_id
         
         # Send welcome message
-        await manager.send_message(connection_id, {
-            "type": "connection_established",
-            "session_id": session_id,
-            "message": "Connected to Healthcare Copilot",
-            "timestamp": datetime.now().isoformat()
-        })
+        await manager.send_frame(
+            connection_id,
+            _WELCOME_FRAME % (_json_string(session_id), _now_iso)
+        )
         
         while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            # Receive message from client; binary frames are parsed without a UTF-8 decode
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            try:
+                message = orjson.loads(frame.get("bytes") or frame.get("text") or "")
+            except orjson.JSONDecodeError:
+                await _send_error(connection_id, "Invalid JSON message")
+                continue
             
             await handle_websocket_message(connection_id, message)
             
     except WebSocketDisconnect:
-        manager.disconnect(connection_id)
-        if connection_id in user_sessions:
-            del user_sessions[connection_id]
-        logger.info(f"WebSocket disconnected: {connection_id}")
+        pass
     
     except Exception as e:
-        logger.error(f"WebSocket error: {str(e)}")
-        await manager.send_message(connection_id, {
-            "type": "error",
-            "message": f"Connection error: {str(e)}",
-            "timestamp": datetime.now().isoformat()
-        })
+        logger.error(f"WebSocket error on {connection_id}: {str(e)}")
+    
+    finally:
+        # Runs for every exit path so the writer task and connection entry never leak
+        manager.disconnect(connection_id)
 
 
 async def handle_websocket_message(connection_id: str, message: dict):
     """Handle incoming WebSocket message."""
     try:
         message_type = message.get("type")
-        session_id = user_sessions.get(connection_id)
+        conn = manager.conns.get(connection_id)
+        session_id = conn.session_id if conn is not None else None
         
         if not session_id:
-            await manager.send_message(connection_id, {
-                "type": "error",
-                "message": "No active session",
-                "timestamp": datetime.now().isoformat()
-            })
+            await _send_error(connection_id, "No active session")
             return
         
-        # Send typing indicator
-        await manager.send_message(connection_id, {
-            "type": "agent_typing",
-            "message": "Agent is processing your request...",
-            "timestamp": datetime.now().isoformat()
-        })
+        route = _MESSAGE_ROUTES.get(message_type)
+        if route is None:
+            await _send_error(connection_id, f"Unknown message type: {message_type}")
+            return
         
-        if message_type == "query":
-            await handle_query_message(connection_id, session_id, message)
-        elif message_type == "workflow_request":
-            await handle_workflow_message(connection_id, session_id, message)
-        elif message_type == "exception_request":
-            await handle_exception_message(connection_id, session_id, message)
-        elif message_type == "complex_query":
-            await handle_complex_message(connection_id, session_id, message)
-        else:
-            await manager.send_message(connection_id, {
-                "type": "error",
-                "message": f"Unknown message type: {message_type}",
-                "timestamp": datetime.now().isoformat()
-            })
+        # Send a typing indicator only if the agent has not answered within the delay
+        typing_indicator = asyncio.get_running_loop().call_later(
+            TYPING_INDICATOR_DELAY_SECONDS,
+            lambda: manager._enqueue(connection_id, _TYPING_FRAME % _now_iso)
+        )
+        try:
+            await handle_agent_message(connection_id, session_id, message, *route)
+        finally:
+            typing_indicator.cancel()
     
     except Exception as e:
         logger.error(f"Error handling WebSocket message: {str(e)}")
-        await manager.send_message(connection_id, {
-            "type": "error",
-            "message": f"Processing error: {str(e)}",
-            "timestamp": datetime.now().isoformat()
-        })
+        await _send_error(connection_id, f"Processing error: {str(e)}")
 
 
-async def handle_query_message(connection_id: str, session_id: str, message: dict):
-    """Handle policy query message."""
+async def handle_agent_message(
+    connection_id: str,
+    session_id: str,
+    message: dict,
+    process: Callable[[str, Dict, dict], Awaitable[Dict]],
+    agent_type: str,
+    response_type: str
+):
+    """Run an agent request with conversation context, record the turn and send the response."""
     query = message.get("query", "")
     context = message.get("context", {})
     
@@ -160,135 +305,91 @@ async def handle_query_message(connection_id: str, session_id: str, message: dic
     conv_context = conversation_service.get_conversation_context(session_id)
     context.update(conv_context)
     
-    # Process query
-    result = await agent_service.process_query(query, context)
+    # Serialized once and spliced into the response frame
+    session_context_json = _dumps(conv_context)
     
-    # Save turn to conversation
-    turn = ConversationTurn(
-        turn_id=str(uuid.uuid4()),
-        user_query=query,
-        agent_response=result,
-        timestamp=datetime.now(),
-        agent_type="PolicyInterpreter",
-        confidence=result.get("confidence", 0.0),
-        context=context
-    )
-    conversation_service.add_turn(session_id, turn)
+    result = await process(query, context, message)
+    
+    # Save turn to conversation in the background, after the response is on its way
+    _enqueue_turn((
+        session_id,
+        f"{connection_id}-{next(_turn_counter)}",
+        query,
+        result,
+        datetime.now(),
+        agent_type,
+        context
+    ))
     
     # Send response
-    await manager.send_message(connection_id, {
-        "type": "query_response",
-        "result": result,
-        "session_context": conv_context,
-        "timestamp": datetime.now().isoformat()
-    })
+    await manager.send_frame(
+        connection_id,
+        _RESPONSE_FRAME % (response_type, _dumps(result), session_context_json, _now_iso)
+    )
 
 
-async def handle_workflow_message(connection_id: str, session_id: str, message: dict):
-    """Handle workflow planning message."""
-    query = message.get("query", "")
-    context = message.get("context", {})
-    
-    # Add conversation context
-    conv_context = conversation_service.get_conversation_context(session_id)
-    context.update(conv_context)
-    
-    # Process workflow request
-    result = await agent_service.process_workflow_request(query, context)
-    
-    # Save turn
-    turn = ConversationTurn(
-        turn_id=str(uuid.uuid4()),
-        user_query=query,
-        agent_response=result,
-        timestamp=datetime.now(),
-        agent_type="WorkflowPlanner",
-        confidence=result.get("confidence", 0.0),
-        context=context
-    )
-    conversation_service.add_turn(session_id, turn)
+def _enqueue_turn(turn_record: Tuple):
+    """Queue a conversation turn for the background writer, dropping the oldest when full."""
+    global _turn_writer_task
+    if _turn_queue.full():
+        _turn_queue.get_nowait()
+        logger.warning("Conversation turn queue full; dropped oldest turn")
+    _turn_queue.put_nowait(turn_record)
     
-    # Send response
-    await manager.send_message(connection_id, {
-        "type": "workflow_response",
-        "result": result,
-        "session_context": conv_context,
-        "timestamp": datetime.now().isoformat()
-    })
+    if _turn_writer_task is None or _turn_writer_task.done():
+        _turn_writer_task = asyncio.create_task(_write_turns())
 
 
-async def handle_exception_message(connection_id: str, session_id: str, message: dict):
-    """Handle exception handling message."""
-    query = message.get("query", "")
-    context = message.get("context", {})
-    
-    # Add conversation context
-    conv_context = conversation_service.get_conversation_context(session_id)
-    context.update(conv_context)
-    
-    # Process exception request
-    result = await agent_service.process_exception_request(query, context)
-    
-    # Save turn
-    turn = ConversationTurn(
-        turn_id=str(uuid.uuid4()),
-        user_query=query,
-        agent_response=result,
-        timestamp=datetime.now(),
-        agent_type="ExceptionHandler",
-        confidence=result.get("confidence", 0.0),
-        context=context
-    )
-    conversation_service.add_turn(session_id, turn)
-    
-    # Send response
-    await manager.send_message(connection_id, {
-        "type": "exception_response",
-        "result": result,
-        "session_context": conv_context,
-        "timestamp": datetime.now().isoformat()
-    })
+async def _write_turns():
+    """Persist queued conversation turns one at a time."""
+    while True:
+        session_id, turn_id, query, result, timestamp, agent_type, context = await _turn_queue.get()
+        try:
+            conversation_service.add_turn(session_id, ConversationTurn(
+                turn_id=turn_id,
+                user_query=query,
+                agent_response=result,
+                timestamp=timestamp,
+                agent_type=agent_type,
+                confidence=result.get("confidence", 0.0),
+                context=context
+            ))
+        except Exception as e:
+            logger.error(f"Failed to save conversation turn {turn_id}: {str(e)}")
 
 
-async def handle_complex_message(connection_id: str, session_id: str, message: dict):
-    """Handle complex multi-agent message."""
-    query = message.get("query", "")
-    context = message.get("context", {})
-    multi_step = message.get("multi_step", False)
-    
-    # Add conversation context
-    conv_context = conversation_service.get_conversation_context(session_id)
-    context.update(conv_context)
-    
-    # Process complex query
-    result = await agent_service.process_complex_query(query, context, multi_step)
-    
-    # Save turn
-    turn = ConversationTurn(
-        turn_id=str(uuid.uuid4()),
-        user_query=query,
-        agent_response=result,
-        timestamp=datetime.now(),
-        agent_type="MultiAgent",
-        confidence=result.get("confidence", 0.0),
-        context=context
+# Message type -> (agent call, agent type recorded on the turn, response message type)
+_MESSAGE_ROUTES: Dict[str, Tuple[Callable[[str, Dict, dict], Awaitable[Dict]], str, str]] = {
+    "query": (
+        lambda query, context, message: agent_service.process_query(query, context),
+        "PolicyInterpreter",
+        "query_response"
+    ),
+    "workflow_request": (
+        lambda query, context, message: agent_service.process_workflow_request(query, context),
+        "WorkflowPlanner",
+        "workflow_response"
+    ),
+    "exception_request": (
+        lambda query, context, message: agent_service.process_exception_request(query, context),
+        "ExceptionHandler",
+        "exception_response"
+    ),
+    "complex_query": (
+        lambda query, context, message: agent_service.process_complex_query(
+            query, context, message.get("multi_step", False)
+        ),
+        "MultiAgent",
+        "complex_response"
     )
-    conversation_service.add_turn(session_id, turn)
-    
-    # Send response
-    await manager.send_message(connection_id, {
-        "type": "complex_response",
-        "result": result,
-        "session_context": conv_context,
-        "timestamp": datetime.now().isoformat()
-    })
+}
 
 
 @router.get("/ws/stats")
 async def get_websocket_stats():
     """Get WebSocket connection statistics."""
-    return {
-        "active_connections": len(manager.active_connections),
-        "active_sessions": len(user_sessions),
+    return ORJSONResponse({
+        "active_connections": len(manager.conns),
+        "active_sessions": sum(1 for conn in manager.conns.values() if conn.session_id),
         "conversation_stats": conversation_service.get_session_stats()
-    }
\ No newline at end of file
+    })
\ No newline at end of file
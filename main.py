@@ -3,16 +3,22 @@ FastAPI application for Healthcare Copilot.
 Main application with basic endpoints and service initialization.
 """
 
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Callable
 
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import ORJSONResponse, Response
 from loguru import logger
 
 from api.v1 import documents, queries, system, agents, multi_agents, evaluation
 from models.schemas import HealthCheckResponse
-from services.document_service import DocumentProcessor
+from services.document_registry import DocumentRegistry
+from services.document_service import DocumentProcessor, shutdown_pdf_pool
 from services.query_service import QueryService
 from services.vector_service import VectorStoreService
 from services.agent_service_llm import AgentService
@@ -26,7 +32,8 @@ app = FastAPI(
     description="AI-powered healthcare operations assistant for non-clinical tasks",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -41,34 +48,66 @@ app.add_middleware(
 # Add global exception handler
 app.add_exception_handler(Exception, global_exception_handler)
 
-# Initialize services
-logger.info("Initializing Healthcare Copilot services...")
-
-try:
-    document_processor = DocumentProcessor()
-    vector_service = VectorStoreService()
-    query_service = QueryService(vector_service)
-    agent_service = AgentService(vector_service)
-    
-    # Initialize API routers with services
-    documents.init_services(document_processor, vector_service)
-    queries.init_services(agent_service)
-    system.init_services(document_processor, vector_service)
-    agents.init_services(agent_service)
-    multi_agents.init_services(agent_service)
+# Include API routers
+app.include_router(documents.router)
+app.include_router(queries.router)
+app.include_router(system.router)
+app.include_router(agents.router)
+app.include_router(multi_agents.router)
+app.include_router(evaluation.router)
+
+# Services are constructed on startup rather than at import, so processes that
+# merely import this module (e.g. PDF extraction workers) stay cheap to start
+document_processor: DocumentProcessor = None
+vector_service: VectorStoreService = None
+document_registry: DocumentRegistry = None
+query_service: QueryService = None
+agent_service: AgentService = None
+
+
+@app.on_event("startup")
+async def initialize_services():
+    """Construct services and inject them into the API routers."""
+    global document_processor, vector_service, document_registry, query_service, agent_service
     
-    # Include API routers
-    app.include_router(documents.router)
-    app.include_router(queries.router)
-    app.include_router(system.router)
-    app.include_router(agents.router)
-    app.include_router(multi_agents.router)
-    app.include_router(evaluation.router)
+    logger.info("Initializing Healthcare Copilot services...")
     
-    logger.info("All services initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize services: {str(e)}")
-    raise
+    try:
+        document_processor = DocumentProcessor()
+        vector_service = VectorStoreService()
+        document_registry = DocumentRegistry()
+        document_registry.backfill_from_vector_store(vector_service)
+        query_service = QueryService(vector_service)
+        agent_service = AgentService(vector_service)
+        
+        # Initialize API routers with services
+        documents.init_services(document_processor, vector_service, document_registry)
+        queries.init_services(agent_service)
+        system.init_services(document_processor, vector_service, document_registry)
+        agents.init_services(agent_service)
+        multi_agents.init_services(agent_service)
+        evaluation.init_services(agent_service.llm_service)
+        
+        logger.info("All services initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize services: {str(e)}")
+        raise
+
+
+@app.on_event("startup")
+async def configure_thread_pool():
+    """Bound the default executor used by asyncio.to_thread for blocking service calls."""
+    max_workers = settings.worker_threads or (os.cpu_count() or 1) * 2
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="copilot-worker")
+    )
+    logger.info(f"Default thread pool configured with {max_workers} workers")
+
+
+@app.on_event("shutdown")
+async def shutdown_worker_pools():
+    """Stop worker process pools so spawned children do not outlive the server."""
+    await asyncio.to_thread(shutdown_pdf_pool)
 
 
 @app.get("/", response_model=dict)
@@ -89,7 +128,26 @@ async def root():
     }
 
 
-@app.get("/health", response_model=HealthCheckResponse)
+async def _probe(check: Callable[[], bool]) -> bool:
+    """Run a blocking health probe in a worker thread, treating timeouts and errors as unhealthy."""
+    try:
+        return bool(await asyncio.wait_for(
+            asyncio.to_thread(check), timeout=settings.health_check_timeout_seconds
+        ))
+    except asyncio.TimeoutError:
+        logger.warning(f"Health probe timed out after {settings.health_check_timeout_seconds}s")
+        return False
+    except Exception as e:
+        logger.error(f"Health probe failed: {str(e)}")
+        return False
+
+
+@app.get(
+    "/health",
+    # Polled by load balancers; the schema is documented but not re-validated per call
+    response_model=None,
+    responses={200: {"model": HealthCheckResponse}}
+)
 async def health_check():
     """
     Health check endpoint to verify all services are running properly.
@@ -99,23 +157,29 @@ async def health_check():
     """
     logger.debug("Performing health check")
     
-    # Check individual components
+    # Probe components concurrently; each probe is bounded so one hung backend cannot stall readiness
+    vector_ok, query_ok, agents_ok = await asyncio.gather(
+        _probe(vector_service.health_check),
+        _probe(query_service.health_check),
+        _probe(lambda: all(agent_service.health_check().values()))
+    )
+    
     components = {
         "document_processor": "healthy",
-        "vector_store": "healthy" if vector_service.health_check() else "unhealthy",
-        "query_service": "healthy" if query_service.health_check() else "unhealthy",
-        "agent_service": "healthy" if all(agent_service.health_check().values()) else "unhealthy"
+        "vector_store": "healthy" if vector_ok else "unhealthy",
+        "query_service": "healthy" if query_ok else "unhealthy",
+        "agent_service": "healthy" if agents_ok else "unhealthy"
     }
     
     # Determine overall status
     overall_status = "healthy" if all(status == "healthy" for status in components.values()) else "unhealthy"
     
-    return HealthCheckResponse(
-        status=overall_status,
-        timestamp=datetime.now(),
-        version="5.0.0",
-        services=components
-    )
+    return ORJSONResponse({
+        "status": overall_status,
+        "timestamp": datetime.now(),
+        "version": "5.0.0",
+        "services": components
+    })
 
 
 @app.get("/api/v1/admin/users")
@@ -134,7 +198,7 @@ async def metrics():
 @app.get("/cache/stats")
 async def cache_stats(user=require_admin):
     """Admin endpoint for cache statistics."""
-    return {"status": "active", "cache_size": 0, "hit_rate": 0.0}
+    return {"status": "active", **agent_service.policy_cache.stats()}
 
 
 if __name__ == "__main__":
@@ -147,5 +211,11 @@ if __name__ == "__main__":
         host=settings.api_host,
         port=settings.api_port,
         reload=settings.api_reload,
-        log_level=settings.log_level.lower()
+        log_level=settings.log_level.lower(),
+        workers=settings.api_workers,
+        # uvloop has no Windows build; fall back to the default asyncio loop there
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=settings.ws_per_message_deflate
     )
\ No newline at end of file
@@ -3,46 +3,32 @@ Pydantic models for Healthcare Copilot API requests and responses.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 
 
 class DocumentUploadRequest(BaseModel):
     """Request model for document upload."""
     
-    filename: str = Field(..., description="Name of the uploaded file")
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+    
+    filename: Annotated[str, StringConstraints(pattern=r"(?i)\.(pdf|txt|docx)$")] = Field(
+        ..., description="Name of the uploaded file (.pdf, .txt or .docx)"
+    )
     content_type: str = Field(..., description="MIME type of the file")
     category: Optional[str] = Field(None, description="Document category (e.g., 'policy', 'sop', 'insurance')")
     tags: Optional[List[str]] = Field(default_factory=list, description="Tags for document classification")
-    
-    @field_validator('filename')
-    @classmethod
-    def validate_filename(cls, v):
-        """Validate filename is not empty and has valid extension."""
-        if not v or not v.strip():
-            raise ValueError("Filename cannot be empty")
-        
-        valid_extensions = ['.pdf', '.txt', '.docx']
-        if not any(v.lower().endswith(ext) for ext in valid_extensions):
-            raise ValueError(f"File must have one of these extensions: {valid_extensions}")
-        
-        return v.strip()
 
 
 class QueryRequest(BaseModel):
     """Request model for policy queries."""
     
+    # Whitespace is stripped before length checks, so blank queries are rejected
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+    
     query: str = Field(..., min_length=1, max_length=1000, description="The question to ask about policies")
     context: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional context for the query")
     max_results: Optional[int] = Field(5, ge=1, le=20, description="Maximum number of results to return")
-    
-    @field_validator('query')
-    @classmethod
-    def validate_query(cls, v):
-        """Validate query is not empty."""
-        if not v or not v.strip():
-            raise ValueError("Query cannot be empty")
-        return v.strip()
 
 
 class DocumentInfo(BaseModel):
@@ -86,6 +72,23 @@ class DocumentUploadResponse(BaseModel):
     processing_time_ms: int = Field(..., description="Time taken to process the document in milliseconds")
 
 
+class DocumentStatusResponse(BaseModel):
+    """Response model for document processing status."""
+    
+    document_id: str = Field(..., description="Unique identifier for the document")
+    filename: str = Field(..., description="Name of the uploaded file")
+    status: str = Field(..., description="Processing status: pending, processed or failed")
+
+
+class BatchDocumentUploadResponse(BaseModel):
+    """Response model for batch document upload."""
+    
+    documents: List[DocumentUploadResponse] = Field(..., description="Per-file upload results, in request order")
+    processed_count: int = Field(..., description="Number of files processed successfully")
+    failed_count: int = Field(..., description="Number of files that failed")
+    processing_time_ms: int = Field(..., description="Time taken to process the batch in milliseconds")
+
+
 class PolicyListResponse(BaseModel):
     """Response model for listing policies."""
     
@@ -116,6 +119,8 @@ class ErrorResponse(BaseModel):
 class AgentQueryRequest(BaseModel):
     """Request model for agent-based queries."""
     
+    model_config = ConfigDict(frozen=True)
+    
     query: str = Field(..., min_length=1, max_length=1000, description="The question to ask")
     context: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional context")
     agent: Optional[str] = Field("policy_interpreter", description="Agent to use for processing")
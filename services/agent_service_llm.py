@@ -3,16 +3,27 @@ Agent Service for Healthcare Copilot with LLM integration.
 Manages all AI agents with Ollama LLM capabilities.
 """
 
-from typing import Dict, List, Optional
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+import orjson
 from loguru import logger
 
+from agents.base import AgentState
 from agents.policy_interpreter import PolicyInterpreterAgent
 from agents.workflow_planner import WorkflowPlannerAgent
 from agents.exception_handler_llm import ExceptionHandlerAgent
 from agents.multi_agent_orchestrator_llm import MultiAgentOrchestrator
 from services.vector_service import VectorStoreService
 from services.llm_service import LLMService
+from utils.config import settings
 from utils.exceptions import QueryProcessingError
+from utils.response_cache import SynchronizedTTLCache
+from utils.semantic_cache import SemanticCache
 
 
 class AgentService:
@@ -35,17 +46,61 @@ class AgentService:
             logger.error(f"Failed to initialize LLM service: {str(e)}")
             raise QueryProcessingError(f"LLM service initialization failed: {str(e)}")
         
+        # Shared semantic cache for policy retrieval, invalidated on corpus changes
+        self.policy_cache = SemanticCache(
+            max_entries=settings.semantic_cache_max_entries,
+            ttl=settings.semantic_cache_ttl_seconds,
+            threshold=settings.semantic_cache_threshold
+        )
+        vector_service.add_change_listener(self.policy_cache.clear)
+        
+        # Shared cache of LLM responses, keyed on query, policy chunks and context;
+        # synchronized because change listeners clear it from worker threads
+        self.response_cache = SynchronizedTTLCache(
+            maxsize=settings.llm_cache_max_entries,
+            ttl=settings.llm_cache_ttl_seconds
+        )
+        vector_service.add_change_listener(self.response_cache.clear)
+        
+        # Routing decisions and fused route-and-answer results, per query embedding
+        self.route_cache = SemanticCache(
+            max_entries=settings.semantic_cache_max_entries,
+            ttl=settings.semantic_cache_ttl_seconds,
+            threshold=settings.semantic_cache_threshold
+        )
+        vector_service.add_change_listener(self.route_cache.clear)
+        
+        # Complete policy interpretation responses, so near-duplicate questions skip the agent
+        self.answer_cache = SemanticCache(
+            max_entries=settings.semantic_cache_max_entries,
+            ttl=settings.semantic_cache_ttl_seconds,
+            threshold=settings.answer_cache_threshold
+        )
+        vector_service.add_change_listener(self.answer_cache.clear)
+        
+        # Complete single-agent responses, keyed on agent, query and canonical context
+        self.agent_response_cache = SynchronizedTTLCache(
+            maxsize=settings.llm_cache_max_entries,
+            ttl=settings.llm_cache_ttl_seconds
+        )
+        vector_service.add_change_listener(self.agent_response_cache.clear)
+        
+        # In-flight interpretations keyed by query and context hash
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        
         # Initialize agents with LLM
-        self.policy_interpreter = PolicyInterpreterAgent(vector_service, self.llm_service)
-        self.workflow_planner = WorkflowPlannerAgent(vector_service, self.llm_service)
-        self.exception_handler = ExceptionHandlerAgent(vector_service, self.llm_service)
+        self.policy_interpreter = PolicyInterpreterAgent(vector_service, self.llm_service, self.policy_cache, self.response_cache)
+        self.workflow_planner = WorkflowPlannerAgent(vector_service, self.llm_service, self.policy_cache, self.response_cache)
+        self.exception_handler = ExceptionHandlerAgent(vector_service, self.llm_service, self.policy_cache, self.response_cache)
         
         # Initialize orchestrator with LLM routing
         self.orchestrator = MultiAgentOrchestrator(
             policy_interpreter=self.policy_interpreter,
             workflow_planner=self.workflow_planner,
             exception_handler=self.exception_handler,
-            llm_service=self.llm_service
+            llm_service=self.llm_service,
+            vector_service=vector_service,
+            route_cache=self.route_cache
         )
         
         logger.info("Agent service initialized with LLM-powered agents")
@@ -53,27 +108,104 @@ class AgentService:
     async def process_query(self, query: str, context: Optional[Dict] = None) -> Dict:
         """Process policy query using LLM-powered agent."""
         try:
-            result = await self.policy_interpreter.process_query(query, context or {})
-            return {
-                "agent_used": "PolicyInterpreter",
-                "result": result.result,
-                "confidence": result.confidence,
-                "reasoning": result.reasoning_log
-            }
+            return await self._run_agent(self.policy_interpreter, query, context or {})
         except Exception as e:
             logger.error(f"Policy query processing failed: {str(e)}")
             raise QueryProcessingError(f"Policy query failed: {str(e)}")
     
-    async def process_workflow_request(self, query: str, context: Optional[Dict] = None) -> Dict:
-        """Process workflow planning using LLM-powered agent."""
+    async def interpret_policy(
+        self,
+        query: str,
+        context: Optional[Dict] = None,
+        user_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Interpret policies for a query, reusing answers to semantically similar queries.
+        
+        Concurrent calls with the same query, context and user share one in-flight
+        interpretation instead of each invoking the agent. Queries whose text or
+        context contains PII are never answered from, or stored in, the cache.
+        
+        Args:
+            query: User query
+            context: Additional context; cached answers only match the same context
+            user_id: Requesting user; cached answers are never shared across users
+            
+        Returns:
+            Interpretation response with query, agent_used, confidence, reasoning,
+            result, sources, error and processing_time_ms
+        """
+        context = context or {}
+        context_json = json.dumps(context, sort_keys=True, default=str)
+        namespace = hashlib.blake2b(
+            f"{user_id or ''}\0{context_json}".encode(), digest_size=8
+        ).hexdigest()
+        cacheable = not self.llm_service.guardrails.contains_pii(f"{query}\n{context_json}")
+        flight_key = (query, namespace)
+        
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.create_task(self._interpret_policy(query, context, namespace, cacheable))
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(flight_key, None))
+        
+        # Shielded so one disconnecting caller does not cancel the shared interpretation;
+        # each caller gets its own copy of the shared response
+        return copy.deepcopy(await asyncio.shield(task))
+    
+    async def _interpret_policy(self, query: str, context: Dict, namespace: str, cacheable: bool) -> Dict:
+        """Run a policy interpretation behind the semantic answer cache."""
+        start_ns = time.perf_counter_ns()
+        
         try:
-            result = await self.workflow_planner.process_query(query, context or {})
-            return {
-                "agent_used": "WorkflowPlanner",
-                "result": result.result,
+            query_embedding = await asyncio.to_thread(self.vector_service.embed, query)
+            
+            cached = self.answer_cache.get(query_embedding, namespace=namespace) if cacheable else None
+            if cached is not None:
+                logger.debug(f"Answer cache hit: {query[:50]}...")
+                return {
+                    **cached,
+                    "query": query,
+                    "processing_time_ms": (time.perf_counter_ns() - start_ns) // 1_000_000
+                }
+            
+            state = AgentState(query=query, context=context, query_embedding=query_embedding)
+            result = await self.policy_interpreter.process(state)
+            
+            interpretation = result.result or {}
+            response = {
+                "query": query,
+                "agent_used": self.policy_interpreter.name,
                 "confidence": result.confidence,
-                "reasoning": result.reasoning_log
+                "reasoning": list(result.reasoning),
+                "result": interpretation,
+                "sources": [
+                    {
+                        "content": source["excerpt"],
+                        "source": source["source"],
+                        "score": source["relevance_score"],
+                        "metadata": {}
+                    }
+                    for source in interpretation.get("sources", [])
+                ],
+                "error": result.error,
+                "processing_time_ms": (time.perf_counter_ns() - start_ns) // 1_000_000
             }
+            
+            # Failed interpretations are not cached so the next request retries
+            if cacheable and result.error is None:
+                self.answer_cache.set(query_embedding, copy.deepcopy(response), namespace=namespace)
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Policy interpretation failed: {str(e)}")
+            raise QueryProcessingError(f"Policy interpretation failed: {str(e)}")
+    
+    async def process_workflow_request(self, query: str, context: Optional[Dict] = None) -> Dict:
+        """Process workflow planning using LLM-powered agent."""
+        try:
+            return await self._run_agent(self.workflow_planner, query, context or {})
         except Exception as e:
             logger.error(f"Workflow planning failed: {str(e)}")
             raise QueryProcessingError(f"Workflow planning failed: {str(e)}")
@@ -81,17 +213,50 @@ class AgentService:
     async def process_exception_request(self, query: str, context: Optional[Dict] = None) -> Dict:
         """Process exception handling using LLM-powered agent."""
         try:
-            result = await self.exception_handler.process_query(query, context or {})
-            return {
-                "agent_used": "ExceptionHandler",
-                "result": result.result,
-                "confidence": result.confidence,
-                "reasoning": result.reasoning_log
-            }
+            return await self._run_agent(self.exception_handler, query, context or {})
         except Exception as e:
             logger.error(f"Exception handling failed: {str(e)}")
             raise QueryProcessingError(f"Exception handling failed: {str(e)}")
     
+    async def _run_agent(self, agent, query: str, context: Dict) -> Dict:
+        """
+        Run a single agent, reusing the response to an identical earlier request.
+        
+        Requests whose query or context contains PII are never cached.
+        
+        Args:
+            agent: Agent to run
+            query: User query
+            context: Additional context
+            
+        Returns:
+            Response with agent_used, result, confidence and reasoning
+        """
+        context_json = orjson.dumps(context, default=str, option=orjson.OPT_SORT_KEYS)
+        cacheable = not self.llm_service.guardrails.contains_pii(f"{query}\n{context_json.decode()}")
+        
+        key = hashlib.blake2b(
+            agent.name.encode() + b"\0" + query.encode() + b"\0" + context_json, digest_size=16
+        ).digest()
+        if cacheable:
+            cached = self.agent_response_cache.get(key)
+            if cached is not None:
+                # Callers own their response; mutating it must not alter the cached entry
+                return copy.deepcopy(cached)
+        
+        result = await agent.process(AgentState(query=query, context=context))
+        response = {
+            "agent_used": agent.name,
+            "result": result.result,
+            "confidence": result.confidence,
+            "reasoning": list(result.reasoning)
+        }
+        
+        # Failed runs are not cached so the next request retries
+        if cacheable and result.error is None:
+            self.agent_response_cache[key] = copy.deepcopy(response)
+        return response
+    
     async def process_complex_query(self, query: str, context: Optional[Dict] = None, multi_step: bool = False) -> Dict:
         """Process complex query using multi-agent orchestration with LLM routing."""
         try:
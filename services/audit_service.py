@@ -3,16 +3,197 @@ Audit Logging Service for Healthcare Copilot.
 Implements comprehensive audit trails for HIPAA compliance.
 """
 
-import json
-from datetime import datetime, UTC
-from typing import Any, Dict, Optional
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
 from pathlib import Path
+
+import orjson
+import zstandard
 from loguru import logger
 
+from utils.config import settings
+
+
+def _compress_rotated_log(path: str) -> None:
+    """Compress a rotated audit log file with zstandard and remove the original."""
+    with open(path, "rb") as source, open(f"{path}.zst", "wb") as target:
+        zstandard.ZstdCompressor(level=3, threads=-1).copy_stream(source, target)
+    os.remove(path)
+
+
+# (epoch second, ISO-8601 prefix for that second), replaced as a whole so readers never see a torn pair
+_second_prefix = (-1, "")
+
+
+def _iso_now() -> str:
+    """Current UTC time as ISO-8601 with microseconds, formatting the date part once per second."""
+    global _second_prefix
+    seconds, nanoseconds = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _second_prefix
+    if seconds != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+        _second_prefix = (seconds, prefix)
+    return f"{prefix}.{nanoseconds // 1000:06d}+00:00"
+
+
+def _truncate_utf8(text: str, max_bytes: int) -> str:
+    """Truncate text to at most max_bytes of UTF-8 without splitting a character."""
+    # ASCII is one byte per character; slicing a short enough string returns it uncopied
+    if text.isascii():
+        return text[:max_bytes]
+    
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode("utf-8", "ignore")
+
+
+def _is_audit_record(record: Dict) -> bool:
+    """Admit only records logged through AuditLogger to the audit sink."""
+    return record["extra"].get("service") == "audit"
+
+
+class _BatchedAuditSink:
+    """
+    Audit log file writer that coalesces entries into batched writes.
+    
+    Pending entries are written and flushed to the OS once max_batch entries
+    accumulate or flush_interval seconds pass, whichever comes first, so no
+    audit record sits in memory for longer than the interval. Rotated files are
+    compressed on a background thread and removed once older than the
+    retention period.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        max_batch: int,
+        flush_interval: float,
+        rotation_bytes: int,
+        retention_seconds: float
+    ):
+        """
+        Initialize batched audit sink.
+        
+        Args:
+            path: Path to audit log file
+            max_batch: Number of pending entries that triggers an immediate flush
+            flush_interval: Maximum seconds an entry stays unflushed
+            rotation_bytes: File size at which the log is rotated
+            retention_seconds: Age after which rotated logs are deleted
+        """
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.rotation_bytes = rotation_bytes
+        self.retention_seconds = retention_seconds
+        
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._compressors: List[threading.Thread] = []
+        self._last_rotation_ns = 0
+        
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="audit-log-flusher", daemon=True
+        )
+        self._flusher.start()
+    
+    def write(self, message: str) -> None:
+        """Queue one formatted entry, flushing when the batch is full."""
+        with self._lock:
+            self._pending.append(message)
+            if len(self._pending) >= self.max_batch:
+                self._flush_locked()
+    
+    def stop(self) -> None:
+        """Flush pending entries and close the file; called by loguru on removal and at exit."""
+        self._stopped.set()
+        self._flusher.join()
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+            compressors = self._compressors
+        for compressor in compressors:
+            compressor.join()
+    
+    def _flush_periodically(self) -> None:
+        """Flush pending entries every flush_interval seconds until stopped."""
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                with self._lock:
+                    self._flush_locked()
+            except OSError as e:
+                logger.error(f"Failed to flush audit log: {str(e)}")
+    
+    def _flush_locked(self) -> None:
+        """Write pending entries in one call and rotate if the file grew too large."""
+        if not self._pending:
+            return
+        
+        data = "".join(self._pending).encode("utf-8")
+        self._file.write(data)
+        self._file.flush()
+        # Cleared only once written, so entries survive a failed write and are retried
+        self._pending.clear()
+        
+        self._size += len(data)
+        if self._size >= self.rotation_bytes:
+            self._rotate()
+    
+    def _rotate(self) -> None:
+        """Move the current file aside and hand it to a compressor thread."""
+        self._file.close()
+        
+        # Stamps strictly increase so a quick second rotation never overwrites a file still being compressed
+        self._last_rotation_ns = max(time.time_ns(), self._last_rotation_ns + 1000)
+        seconds, nanoseconds = divmod(self._last_rotation_ns, 1_000_000_000)
+        stamp = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime(seconds))
+        rotated = self.path.with_name(
+            f"{self.path.stem}.{stamp}_{nanoseconds // 1000:06d}{self.path.suffix}"
+        )
+        os.replace(self.path, rotated)
+        
+        self._file = open(self.path, "ab")
+        self._size = 0
+        
+        # Compress outside the lock so writers are not blocked behind zstandard
+        self._compressors = [thread for thread in self._compressors if thread.is_alive()]
+        compressor = threading.Thread(
+            target=self._compress_and_prune, args=(rotated,), name="audit-log-compressor", daemon=True
+        )
+        compressor.start()
+        self._compressors.append(compressor)
+    
+    def _compress_and_prune(self, rotated: Path) -> None:
+        """Compress a rotated log and drop rotated logs older than the retention period."""
+        try:
+            _compress_rotated_log(str(rotated))
+            
+            cutoff = time.time() - self.retention_seconds
+            for candidate in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}.zst"):
+                if candidate.stat().st_mtime < cutoff:
+                    candidate.unlink(missing_ok=True)
+        except OSError as e:
+            logger.error(f"Failed to compress rotated audit log {rotated}: {str(e)}")
+
+
+def _dumps(entry: Dict) -> str:
+    """Serialize an audit entry; datetimes in event fields are encoded natively as ISO-8601."""
+    return orjson.dumps(entry, default=str).decode()
+
 
 class AuditLogger:
     """Service for comprehensive audit logging."""
     
+    # Sink IDs of registered audit log files, shared by all instances
+    _sinks: Dict[Path, int] = {}
+    _sinks_lock = threading.Lock()
+    
     def __init__(self, audit_log_path: str = "logs/audit.log"):
         """
         Initialize audit logger.
@@ -23,18 +204,49 @@ class AuditLogger:
         self.audit_log_path = Path(audit_log_path)
         self.audit_log_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Configure separate audit logger
-        logger.add(
-            self.audit_log_path,
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-            level="INFO",
-            rotation="100 MB",
-            retention="1 year",
-            compression="zip"
-        )
+        # Configure separate audit logger, once per file however many services construct one
+        with AuditLogger._sinks_lock:
+            sink_key = self.audit_log_path.resolve()
+            if sink_key not in AuditLogger._sinks:
+                # enqueue=True hands records to a background thread, so callers never
+                # wait on file writes or rotation; the sink coalesces entries into
+                # batched writes bounded in both size and age
+                AuditLogger._sinks[sink_key] = logger.add(
+                    _BatchedAuditSink(
+                        self.audit_log_path,
+                        max_batch=settings.audit_flush_max_entries,
+                        flush_interval=settings.audit_flush_interval_seconds,
+                        rotation_bytes=100 * 1024 * 1024,
+                        retention_seconds=365 * 24 * 3600
+                    ),
+                    format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+                    level="INFO",
+                    filter=_is_audit_record,
+                    enqueue=True,
+                    catch=True
+                )
         
         self.logger = logger.bind(service="audit")
     
+    def _audit(self, level: str, event_type: str, **fields: Any) -> None:
+        """
+        Write one audit entry.
+        
+        Serialization is deferred to loguru, so it is skipped entirely when
+        the level is filtered out.
+        
+        Args:
+            level: Log level name
+            event_type: Audit event type
+            **fields: Event-specific entry fields
+        """
+        timestamp = _iso_now()
+        self.logger.opt(lazy=True).log(
+            level,
+            "AUDIT: {}",
+            lambda: _dumps({'event_type': event_type, 'timestamp': timestamp, **fields})
+        )
+    
     def log_query(
         self,
         user_id: str,
@@ -59,20 +271,18 @@ class AuditLogger:
             ip_address: User IP address
             session_id: Session identifier
         """
-        audit_entry = {
-            'event_type': 'QUERY',
-            'timestamp': datetime.now(UTC).isoformat(),
-            'user_id': user_id,
-            'query': query[:200],  # Truncate for privacy
-            'agent_used': agent_used,
-            'response_summary': response_summary[:100],
-            'confidence': confidence,
-            'processing_time_ms': processing_time_ms,
-            'ip_address': ip_address,
-            'session_id': session_id
-        }
-        
-        self.logger.info(f"AUDIT: {json.dumps(audit_entry)}")
+        self._audit(
+            "INFO",
+            "QUERY",
+            user_id=user_id,
+            query=_truncate_utf8(query, 200),  # Truncate for privacy
+            agent_used=agent_used,
+            response_summary=_truncate_utf8(response_summary, 100),
+            confidence=confidence,
+            processing_time_ms=processing_time_ms,
+            ip_address=ip_address,
+            session_id=session_id
+        )
     
     def log_document_access(
         self,
@@ -92,17 +302,15 @@ class AuditLogger:
             action: Action performed (view, download, upload, delete)
             ip_address: User IP address
         """
-        audit_entry = {
-            'event_type': 'DOCUMENT_ACCESS',
-            'timestamp': datetime.now(UTC).isoformat(),
-            'user_id': user_id,
-            'document_id': document_id,
-            'document_name': document_name,
-            'action': action,
-            'ip_address': ip_address
-        }
-        
-        self.logger.info(f"AUDIT: {json.dumps(audit_entry)}")
+        self._audit(
+            "INFO",
+            "DOCUMENT_ACCESS",
+            user_id=user_id,
+            document_id=document_id,
+            document_name=document_name,
+            action=action,
+            ip_address=ip_address
+        )
     
     def log_authentication(
         self,
@@ -122,17 +330,15 @@ class AuditLogger:
             ip_address: User IP address
             failure_reason: Reason for failure if applicable
         """
-        audit_entry = {
-            'event_type': 'AUTHENTICATION',
-            'timestamp': datetime.now(UTC).isoformat(),
-            'user_id': user_id,
-            'action': action,
-            'success': success,
-            'ip_address': ip_address,
-            'failure_reason': failure_reason
-        }
-        
-        self.logger.info(f"AUDIT: {json.dumps(audit_entry)}")
+        self._audit(
+            "INFO",
+            "AUTHENTICATION",
+            user_id=user_id,
+            action=action,
+            success=success,
+            ip_address=ip_address,
+            failure_reason=failure_reason
+        )
     
     def log_authorization(
         self,
@@ -152,17 +358,15 @@ class AuditLogger:
             granted: Whether access was granted
             role: User role
         """
-        audit_entry = {
-            'event_type': 'AUTHORIZATION',
-            'timestamp': datetime.now(UTC).isoformat(),
-            'user_id': user_id,
-            'resource': resource,
-            'action': action,
-            'granted': granted,
-            'role': role
-        }
-        
-        self.logger.info(f"AUDIT: {json.dumps(audit_entry)}")
+        self._audit(
+            "INFO",
+            "AUTHORIZATION",
+            user_id=user_id,
+            resource=resource,
+            action=action,
+            granted=granted,
+            role=role
+        )
     
     def log_data_modification(
         self,
@@ -184,18 +388,16 @@ class AuditLogger:
             changes: Dictionary of changes made
             ip_address: User IP address
         """
-        audit_entry = {
-            'event_type': 'DATA_MODIFICATION',
-            'timestamp': datetime.now(UTC).isoformat(),
-            'user_id': user_id,
-            'entity_type': entity_type,
-            'entity_id': entity_id,
-            'action': action,
-            'changes': changes,
-            'ip_address': ip_address
-        }
-        
-        self.logger.info(f"AUDIT: {json.dumps(audit_entry)}")
+        self._audit(
+            "INFO",
+            "DATA_MODIFICATION",
+            user_id=user_id,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            action=action,
+            changes=changes,
+            ip_address=ip_address
+        )
     
     def log_security_event(
         self,
@@ -217,18 +419,16 @@ class AuditLogger:
             ip_address: IP address if applicable
             additional_data: Additional event data
         """
-        audit_entry = {
-            'event_type': 'SECURITY_EVENT',
-            'timestamp': datetime.now(UTC).isoformat(),
-            'security_event_type': event_type,
-            'severity': severity,
-            'description': description,
-            'user_id': user_id,
-            'ip_address': ip_address,
-            'additional_data': additional_data or {}
-        }
-        
-        self.logger.warning(f"AUDIT: {json.dumps(audit_entry)}")
+        self._audit(
+            "WARNING",
+            "SECURITY_EVENT",
+            security_event_type=event_type,
+            severity=severity,
+            description=description,
+            user_id=user_id,
+            ip_address=ip_address,
+            additional_data=additional_data or {}
+        )
     
     def log_system_event(
         self,
@@ -248,17 +448,15 @@ class AuditLogger:
             status: Event status
             additional_data: Additional event data
         """
-        audit_entry = {
-            'event_type': 'SYSTEM_EVENT',
-            'timestamp': datetime.now(UTC).isoformat(),
-            'system_event_type': event_type,
-            'description': description,
-            'component': component,
-            'status': status,
-            'additional_data': additional_data or {}
-        }
-        
-        self.logger.info(f"AUDIT: {json.dumps(audit_entry)}")
+        self._audit(
+            "INFO",
+            "SYSTEM_EVENT",
+            system_event_type=event_type,
+            description=description,
+            component=component,
+            status=status,
+            additional_data=additional_data or {}
+        )
     
     def log_compliance_check(
         self,
@@ -276,14 +474,12 @@ class AuditLogger:
             details: Check details
             user_id: User identifier if applicable
         """
-        audit_entry = {
-            'event_type': 'COMPLIANCE_CHECK',
-            'timestamp': datetime.now(UTC).isoformat(),
-            'check_type': check_type,
-            'passed': passed,
-            'details': details,
-            'user_id': user_id
-        }
-        
         level = "INFO" if passed else "WARNING"
-        self.logger.log(level, f"AUDIT: {json.dumps(audit_entry)}")
+        self._audit(
+            level,
+            "COMPLIANCE_CHECK",
+            check_type=check_type,
+            passed=passed,
+            details=details,
+            user_id=user_id
+        )
@@ -3,9 +3,21 @@ Authentication and Authorization Service for Healthcare Copilot.
 Provides JWT-based authentication and role-based access control.
 """
 
+import asyncio
+import hashlib
+import heapq
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
 import jwt
+from jwt.algorithms import get_default_algorithms
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Deque, Dict, FrozenSet, List, Optional, Tuple
+from cachetools import TTLCache
 from passlib.context import CryptContext
 from passlib.hash import argon2
 from fastapi import HTTPException, Depends, status
@@ -15,16 +27,28 @@ from loguru import logger
 from utils.config import settings
 
 
+# Hashing is CPU-bound; async callers run it here instead of on the event loop
+_pwd_pool = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="pwd")
+
+
 class AuthService:
     """JWT-based authentication and authorization service."""
     
     def __init__(self):
         """Initialize authentication service."""
-        self.pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+        # OWASP-recommended argon2id minimum: 19 MiB, 2 iterations, 1 lane
+        self.pwd_context = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto",
+            argon2__time_cost=2,
+            argon2__memory_cost=19456,
+            argon2__parallelism=1
+        )
+        
         self.security = HTTPBearer()
         
-        # Role permissions
-        self.role_permissions = {
+        # Role permissions, as frozensets for constant-time membership checks
+        role_permissions = {
             "admin": [
                 "read:all", "write:all", "delete:all",
                 "manage:users", "manage:system", "view:metrics"
@@ -41,6 +65,30 @@ class AuthService:
                 "read:policies", "read:workflows"
             ]
         }
+        self.role_permissions: Dict[str, FrozenSet[str]] = {
+            role: frozenset(permissions) for role, permissions in role_permissions.items()
+        }
+        
+        # jwt.decode expects a list of allowed algorithms; build it once
+        self._jwt_algorithms = [settings.jwt_algorithm]
+        
+        # Convert the secret to the algorithm's key form once rather than on every encode/decode
+        self._jwt_key = get_default_algorithms()[settings.jwt_algorithm].prepare_key(
+            settings.jwt_secret_key
+        )
+        
+        # Verified payloads keyed by token digest, so repeat requests skip jwt.decode
+        # and raw bearer tokens are never held in memory
+        self._token_lock = threading.Lock()
+        self._token_cache = TTLCache(
+            maxsize=settings.token_cache_max_entries,
+            ttl=settings.token_cache_ttl_seconds
+        )
+        
+        # Revoked token digests mapped to their own expiry; an entry is only dropped
+        # once its token has expired, so no revocation is ever forgotten early
+        self._revoked_tokens: Dict[bytes, float] = {}
+        self._revocation_expiries: List[Tuple[float, bytes]] = []
         
         logger.info("Authentication service initialized")
     
@@ -52,6 +100,18 @@ class AuthService:
         """Verify password against hash."""
         return self.pwd_context.verify(plain_password, hashed_password)
     
+    async def ahash_password(self, password: str) -> str:
+        """Hash password using argon2 without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pwd_pool, self.pwd_context.hash, password)
+    
+    async def averify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify password against hash without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _pwd_pool, self.pwd_context.verify, plain_password, hashed_password
+        )
+    
     def create_access_token(self, data: Dict, expires_delta: Optional[timedelta] = None) -> str:
         """Create JWT access token."""
         to_encode = data.copy()
@@ -65,7 +125,7 @@ class AuthService:
         
         encoded_jwt = jwt.encode(
             to_encode, 
-            settings.jwt_secret_key, 
+            self._jwt_key,
             algorithm=settings.jwt_algorithm
         )
         
@@ -79,17 +139,29 @@ class AuthService:
         
         return jwt.encode(
             to_encode,
-            settings.jwt_secret_key,
+            self._jwt_key,
             algorithm=settings.jwt_algorithm
         )
     
     def verify_token(self, token: str) -> Dict:
         """Verify and decode JWT token."""
+        token_key = self._token_key(token)
+        with self._token_lock:
+            if token_key in self._revoked_tokens:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token revoked"
+                )
+            cached = self._token_cache.get(token_key)
+        
+        if cached is not None and cached.get("exp", 0) > time.time():
+            return cached
+        
         try:
             payload = jwt.decode(
                 token,
-                settings.jwt_secret_key,
-                algorithms=[settings.jwt_algorithm]
+                self._jwt_key,
+                algorithms=self._jwt_algorithms
             )
             
             # Check if token is expired
@@ -99,6 +171,8 @@ class AuthService:
                     detail="Token expired"
                 )
             
+            with self._token_lock:
+                self._token_cache[token_key] = payload
             return payload
             
         except jwt.InvalidTokenError:
@@ -107,6 +181,38 @@ class AuthService:
                 detail="Invalid token"
             )
     
+    def revoke_token(self, token: str) -> None:
+        """Revoke a token so it is rejected even while a verified copy is cached."""
+        try:
+            payload = jwt.decode(
+                token,
+                self._jwt_key,
+                algorithms=self._jwt_algorithms,
+                options={"verify_exp": False}
+            )
+        except jwt.InvalidTokenError:
+            # Tokens that fail verification are rejected anyway
+            return
+        
+        # Tokens without an expiry stay revoked for the life of the process
+        expires_at = float(payload.get("exp", math.inf))
+        token_key = self._token_key(token)
+        now = time.time()
+        with self._token_lock:
+            self._token_cache.pop(token_key, None)
+            if token_key not in self._revoked_tokens:
+                self._revoked_tokens[token_key] = expires_at
+                heapq.heappush(self._revocation_expiries, (expires_at, token_key))
+            
+            while self._revocation_expiries and self._revocation_expiries[0][0] <= now:
+                _, expired_key = heapq.heappop(self._revocation_expiries)
+                self._revoked_tokens.pop(expired_key, None)
+    
+    @staticmethod
+    def _token_key(token: str) -> bytes:
+        """Hash a bearer token into a cache key."""
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+    
     def get_current_user(self, credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer())):
         """Get current user from JWT token."""
         token = credentials.credentials
@@ -126,13 +232,13 @@ class AuthService:
             "permissions": self.get_user_permissions(payload.get("role"))
         }
     
-    def get_user_permissions(self, role: str) -> List[str]:
+    def get_user_permissions(self, role: str) -> FrozenSet[str]:
         """Get permissions for user role."""
-        return self.role_permissions.get(role, [])
+        return self.role_permissions.get(role, frozenset())
     
     def check_permission(self, user: Dict, required_permission: str) -> bool:
         """Check if user has required permission."""
-        user_permissions = user.get("permissions", [])
+        user_permissions = user.get("permissions", frozenset())
         
         # Admin has all permissions
         if "write:all" in user_permissions:
@@ -178,30 +284,45 @@ require_staff = Depends(auth_service.require_role(["healthcare_staff", "supervis
 
 
 class RateLimiter:
-    """Simple in-memory rate limiter."""
+    """Simple in-memory sliding-window rate limiter."""
+    
+    # Drop idle keys every this many calls so memory stays bounded
+    SWEEP_INTERVAL = 1000
     
     def __init__(self):
-        self.requests = {}
+        self.requests: Dict[str, Deque[float]] = defaultdict(deque)
+        self._calls = 0
+        self._max_window = 0
     
     def is_allowed(self, key: str, limit: int, window: int) -> bool:
         """Check if request is allowed within rate limit."""
-        now = datetime.now(timezone.utc)
+        now = time.monotonic()
+        self._max_window = max(self._max_window, window)
         
-        if key not in self.requests:
-            self.requests[key] = []
+        self._calls += 1
+        if self._calls % self.SWEEP_INTERVAL == 0:
+            self._sweep(now)
         
-        # Remove old requests outside window
-        self.requests[key] = [
-            req_time for req_time in self.requests[key]
-            if (now - req_time).seconds < window
-        ]
+        # Timestamps are appended in order, so expired ones are always at the front
+        timestamps = self.requests[key]
+        while timestamps and now - timestamps[0] >= window:
+            timestamps.popleft()
         
         # Check if under limit
-        if len(self.requests[key]) < limit:
-            self.requests[key].append(now)
+        if len(timestamps) < limit:
+            timestamps.append(now)
             return True
         
         return False
+    
+    def _sweep(self, now: float) -> None:
+        """Drop keys whose requests have all left the longest window in use."""
+        idle = [
+            key for key, timestamps in self.requests.items()
+            if not timestamps or now - timestamps[-1] >= self._max_window
+        ]
+        for key in idle:
+            del self.requests[key]
 
 
 # Global rate limiter
@@ -0,0 +1,381 @@
+"""
+Document registry for Healthcare Copilot.
+Keeps one row per ingested document so listings never scan vector store chunks.
+"""
+
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from services.vector_service import VectorStoreService
+from utils.config import settings
+from utils.exceptions import DocumentProcessingError, handle_exceptions
+
+
+class DocumentRegistry:
+    """SQLite-backed registry of ingested documents keyed by document ID."""
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize document registry.
+        
+        Args:
+            db_path: Path to the SQLite database file (defaults to settings)
+        """
+        self.db_path = Path(db_path or settings.document_registry_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            self._lock = threading.Lock()
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            
+            # WAL lets readers proceed while a write is in progress; NORMAL sync is
+            # durable across application crashes and avoids an fsync per commit
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    category TEXT,
+                    tags TEXT NOT NULL DEFAULT '',
+                    upload_date TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'processed',
+                    content_hash TEXT
+                )
+                """
+            )
+            
+            # Registries created before content hashes were recorded lack the column
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(documents)")}
+            if "content_hash" not in columns:
+                self._conn.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+            
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_documents_upload_date ON documents (upload_date)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents (content_hash)"
+            )
+            self._conn.commit()
+            
+            # Per-category document counts, kept in step with every write
+            self._category_counts = Counter()
+            self._load_category_counts()
+            
+            logger.info(f"Document registry initialized at {self.db_path}")
+        
+        except Exception as e:
+            raise DocumentProcessingError(f"Failed to initialize document registry: {str(e)}")
+    
+    @handle_exceptions
+    def register(
+        self,
+        doc_id: str,
+        filename: str,
+        category: Optional[str],
+        tags: List[str],
+        upload_date: str,
+        size_bytes: int,
+        status: str = "processed",
+        content_hash: Optional[str] = None
+    ) -> None:
+        """
+        Insert or replace a document entry.
+        
+        Args:
+            doc_id: Document identifier
+            filename: Original filename
+            category: Document category
+            tags: Document tags
+            upload_date: ISO-8601 upload timestamp
+            size_bytes: File size in bytes
+            status: Processing status
+            content_hash: Digest of the uploaded file content
+        """
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT category FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(id, filename, category, tags, upload_date, size_bytes, status, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, filename, category, ",".join(tags), upload_date, size_bytes, status, content_hash)
+            )
+            self._conn.commit()
+            
+            if previous is not None:
+                self._discount_category(previous["category"])
+            if category:
+                self._category_counts[category] += 1
+        
+        logger.debug(f"Registered document {doc_id} ({filename})")
+    
+    @handle_exceptions
+    def register_many(self, documents: List[Dict]) -> None:
+        """
+        Insert or replace several document entries in one transaction.
+        
+        Args:
+            documents: Dictionaries with the keyword arguments of register
+        """
+        if not documents:
+            return
+        
+        with self._lock:
+            try:
+                previous = []
+                for document in documents:
+                    row = self._conn.execute(
+                        "SELECT category FROM documents WHERE id = ?", (document["doc_id"],)
+                    ).fetchone()
+                    if row is not None:
+                        previous.append(row["category"])
+                
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents "
+                    "(id, filename, category, tags, upload_date, size_bytes, status, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            document["doc_id"],
+                            document["filename"],
+                            document.get("category"),
+                            ",".join(document.get("tags") or []),
+                            document["upload_date"],
+                            document.get("size_bytes", 0),
+                            document.get("status", "processed"),
+                            document.get("content_hash")
+                        )
+                        for document in documents
+                    ]
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            
+            for category in previous:
+                self._discount_category(category)
+            for document in documents:
+                if document.get("category"):
+                    self._category_counts[document["category"]] += 1
+        
+        logger.debug(f"Registered {len(documents)} documents")
+    
+    @handle_exceptions
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove a document entry.
+        
+        Args:
+            doc_id: Document identifier
+        
+        Returns:
+            True if an entry was removed
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT category FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            
+            self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            self._conn.commit()
+            self._discount_category(row["category"])
+        return True
+    
+    @handle_exceptions
+    def set_status(self, doc_id: str, status: str) -> bool:
+        """
+        Update the processing status of a document entry.
+        
+        Args:
+            doc_id: Document identifier
+            status: New processing status
+        
+        Returns:
+            True if an entry was updated
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE documents SET status = ? WHERE id = ?", (status, doc_id)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+    
+    @handle_exceptions
+    def get(self, doc_id: str) -> Optional[Dict]:
+        """
+        Get a single document entry.
+        
+        Args:
+            doc_id: Document identifier
+        
+        Returns:
+            Document dictionary or None if not registered
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, filename, category, tags, upload_date, size_bytes, status "
+                "FROM documents WHERE id = ?",
+                (doc_id,)
+            ).fetchone()
+        return self._row_to_dict(row) if row is not None else None
+    
+    @handle_exceptions
+    def find_by_content_hash(self, content_hash: str) -> Optional[Dict]:
+        """
+        Find a pending or processed document with identical content.
+        
+        Args:
+            content_hash: Digest of the uploaded file content
+        
+        Returns:
+            Document dictionary or None if no such content is registered
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, filename, category, tags, upload_date, size_bytes, status "
+                "FROM documents WHERE content_hash = ? AND status != 'failed' "
+                "ORDER BY upload_date LIMIT 1",
+                (content_hash,)
+            ).fetchone()
+        return self._row_to_dict(row) if row is not None else None
+    
+    @handle_exceptions
+    def list_documents(self) -> List[Dict]:
+        """
+        List all registered documents.
+        
+        Returns:
+            List of document dictionaries, oldest upload first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, filename, category, tags, upload_date, size_bytes, status "
+                "FROM documents ORDER BY upload_date"
+            ).fetchall()
+        
+        return [self._row_to_dict(row) for row in rows]
+    
+    @handle_exceptions
+    def list_categories(self) -> List[str]:
+        """
+        List distinct categories of registered documents.
+        
+        Returns:
+            Sorted category names
+        """
+        with self._lock:
+            return sorted(self._category_counts)
+    
+    @handle_exceptions
+    def count(self, status: Optional[str] = None) -> int:
+        """
+        Get number of registered documents.
+        
+        Args:
+            status: Only count documents with this processing status
+        
+        Returns:
+            Number of matching documents
+        """
+        with self._lock:
+            if status is None:
+                return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE status = ?", (status,)
+            ).fetchone()[0]
+    
+    @handle_exceptions
+    def backfill_from_vector_store(self, vector_service: VectorStoreService) -> int:
+        """
+        Populate an empty registry from chunk metadata already in the vector store.
+        
+        Used once for deployments that ingested documents before the registry
+        existed; this is the only place that scans every chunk.
+        
+        Args:
+            vector_service: Vector store service holding the ingested chunks
+        
+        Returns:
+            Number of documents registered
+        """
+        if self.count():
+            return 0
+        
+        all_chunks = vector_service.collection.get(include=["metadatas"])
+        
+        # Fallback date for chunks ingested without one, computed once for the scan
+        now_iso = datetime.now().isoformat()
+        
+        entries = {}
+        for metadata in all_chunks.get("metadatas") or []:
+            doc_id = (metadata or {}).get("doc_id")
+            if not doc_id or doc_id in entries:
+                continue
+            
+            entries[doc_id] = (
+                doc_id,
+                metadata.get("filename", f"Document {doc_id[:8]}"),
+                metadata.get("category"),
+                metadata.get("tags", ""),
+                metadata.get("upload_date") or now_iso,
+                metadata.get("char_count", 0),
+                "processed"
+            )
+        
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO documents "
+                "(id, filename, category, tags, upload_date, size_bytes, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                entries.values()
+            )
+            self._conn.commit()
+            self._load_category_counts()
+        
+        if entries:
+            logger.info(f"Backfilled document registry with {len(entries)} documents")
+        return len(entries)
+    
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        """Convert a documents row to a document dictionary."""
+        return {
+            "id": row["id"],
+            "filename": row["filename"],
+            "category": row["category"],
+            "tags": [tag for tag in row["tags"].split(",") if tag],
+            "upload_date": row["upload_date"],
+            "size_bytes": row["size_bytes"],
+            "status": row["status"]
+        }
+    
+    def _load_category_counts(self) -> None:
+        """Rebuild per-category counts from the database."""
+        rows = self._conn.execute(
+            "SELECT category, COUNT(*) AS total FROM documents "
+            "WHERE category IS NOT NULL AND category != '' GROUP BY category"
+        ).fetchall()
+        self._category_counts = Counter({row["category"]: row["total"] for row in rows})
+    
+    def _discount_category(self, category: Optional[str]) -> None:
+        """Decrement a category count, dropping categories with no documents left."""
+        if not category:
+            return
+        self._category_counts[category] -= 1
+        if self._category_counts[category] <= 0:
+            del self._category_counts[category]
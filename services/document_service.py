@@ -4,13 +4,18 @@ Handles file upload, text extraction, and document management.
 """
 
 import hashlib
+import multiprocessing
 import os
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
 
 import pypdf
+from charset_normalizer import from_bytes
+import pypdfium2 as pdfium
 from pypdf import PdfReader
 from loguru import logger
 
@@ -18,6 +23,93 @@ from utils.config import settings
 from utils.exceptions import DocumentProcessingError, handle_exceptions
 
 
+# Size of each read when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Processed text files are named "<doc_id>" + this suffix
+EXTRACTED_TEXT_SUFFIX = "_extracted.txt"
+
+# PDFs with fewer pages are extracted in-process; process start-up and IPC cost more
+PDF_PARALLEL_MIN_PAGES = 16
+PDF_POOL_WORKERS = min(8, os.cpu_count() or 1)
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+# PDFium is not thread-safe, even across documents; every in-process call is serialized
+_pdfium_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Get the shared PDF extraction process pool, creating it on first use."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Workers are forked from a clean single-threaded fork server rather than
+            # from this heavily threaded server, whose locks could deadlock children.
+            # The fork server imports the main module and this one once, so workers
+            # inherit them instead of each re-running the launching script.
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["__main__", "services.document_service"])
+            else:
+                context = multiprocessing.get_context("spawn")
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_POOL_WORKERS, mp_context=context)
+        return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the shared PDF extraction process pool if it was started."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=True, cancel_futures=True)
+            _pdf_pool = None
+            logger.info("PDF extraction process pool shut down")
+
+
+def _drop_page_cache(file_path: Path) -> None:
+    """Advise the kernel that a file's cached pages will not be needed again."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.debug(f"posix_fadvise failed for {file_path.name}: {str(e)}")
+
+
+def _extract_pdfium_pages(pdf: "pdfium.PdfDocument", start: int, stop: int) -> List[str]:
+    """Extract non-empty texts of pages [start, stop) from an open PDFium document."""
+    text_content = []
+    for page_num in range(start, stop):
+        try:
+            page = pdf[page_num]
+            try:
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_range()
+                textpage.close()
+            finally:
+                page.close()
+            if page_text.strip():
+                text_content.append(page_text)
+        except Exception as e:
+            logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
+    return text_content
+
+
+def _extract_pdfium_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Worker-process entry point: open the PDF independently and extract a page range."""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return _extract_pdfium_pages(pdf, start, stop)
+    finally:
+        pdf.close()
+
+
 class DocumentProcessor:
     """Service for processing and managing documents."""
     
@@ -29,7 +121,9 @@ class DocumentProcessor:
         self.processed_dir.mkdir(parents=True, exist_ok=True)
         
         # Supported file types
-        self.supported_types = settings.supported_file_types.split(",")
+        self.supported_types = frozenset(
+            file_type.strip().lower() for file_type in settings.supported_file_types.split(",")
+        )
         self.max_size_bytes = settings.max_file_size_mb * 1024 * 1024
         
         logger.info("Document processor initialized")
@@ -55,47 +149,71 @@ class DocumentProcessor:
             )
         
         # Check file extension
-        file_ext = Path(filename).suffix.lower().lstrip('.')
+        file_ext = os.path.splitext(filename)[1][1:].lower()
         if file_ext not in self.supported_types:
             raise DocumentProcessingError(
-                f"File type '{file_ext}' not supported. Supported types: {self.supported_types}",
+                f"File type '{file_ext}' not supported. Supported types: {sorted(self.supported_types)}",
                 filename=filename
             )
         
         logger.debug(f"File validation passed for {filename}")
     
     @handle_exceptions
-    def save_file(self, file_content: bytes, filename: str) -> str:
+    def save_file(self, stream: BinaryIO, filename: str) -> Tuple[str, int, str]:
         """
-        Save uploaded file to disk.
+        Stream an uploaded file to disk in fixed-size chunks.
+        
+        The size limit is enforced while copying, so oversized uploads are
+        rejected without ever being held in memory, and PDF uploads are checked
+        for the PDF header rather than trusting the client content type. The
+        content digest is computed over the same chunks as they are written.
         
         Args:
-            file_content: Binary content of the file
+            stream: Readable binary file object positioned at the start of the upload
             filename: Original filename
             
         Returns:
-            str: Unique document ID
+            Tuple of unique document ID, file size in bytes and BLAKE2b content digest
             
         Raises:
-            DocumentProcessingError: If file saving fails
+            DocumentProcessingError: If validation or file saving fails
         """
-        # Generate unique document ID
-        doc_id = str(uuid.uuid4())
+        # Extension is known up front; size is checked as the file is copied
+        self.validate_file(filename=filename, file_size=0, content_type=None)
         
-        # Create safe filename with document ID
-        file_ext = Path(filename).suffix
+        doc_id = str(uuid.uuid4())
         safe_filename = f"{doc_id}_{filename.replace(' ', '_')}"
         file_path = self.upload_dir / safe_filename
         
+        total = 0
+        hasher = hashlib.blake2b()
         try:
-            # Save file to disk
-            with open(file_path, 'wb') as f:
-                f.write(file_content)
+            # Uploads may hold PHI, so they are created readable by the service user only
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+                    if total == 0 and Path(filename).suffix.lower() == '.pdf' and b"%PDF-" not in chunk[:1024]:
+                        raise DocumentProcessingError(
+                            "File content is not a valid PDF document",
+                            filename=filename
+                        )
+                    
+                    total += len(chunk)
+                    if total > self.max_size_bytes:
+                        raise DocumentProcessingError(
+                            f"File size exceeds maximum allowed size of {self.max_size_bytes} bytes",
+                            filename=filename
+                        )
+                    f.write(chunk)
+                    hasher.update(chunk)
             
-            logger.info(f"File saved: {safe_filename} (ID: {doc_id})")
-            return doc_id
+            logger.info(f"File saved: {safe_filename} (ID: {doc_id}, {total} bytes)")
+            return doc_id, total, hasher.hexdigest()
             
         except Exception as e:
+            file_path.unlink(missing_ok=True)
+            if isinstance(e, DocumentProcessingError):
+                raise
             raise DocumentProcessingError(
                 f"Failed to save file: {str(e)}",
                 filename=filename
@@ -116,19 +234,11 @@ class DocumentProcessor:
             DocumentProcessingError: If text extraction fails
         """
         try:
-            text_content = []
-            
-            with open(file_path, 'rb') as file:
-                pdf_reader = PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text.strip():
-                            text_content.append(page_text)
-                    except Exception as e:
-                        logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
-                        continue
+            try:
+                text_content = self._extract_pdf_pages_pdfium(file_path)
+            except pdfium.PdfiumError as e:
+                logger.warning(f"PDFium could not load {file_path.name}, falling back to pypdf: {str(e)}")
+                text_content = self._extract_pdf_pages_pypdf(file_path)
             
             if not text_content:
                 raise DocumentProcessingError(
@@ -149,6 +259,48 @@ class DocumentProcessor:
                 filename=file_path.name
             )
     
+    def _extract_pdf_pages_pdfium(self, file_path: Path) -> List[str]:
+        """
+        Extract non-empty page texts with PDFium, which parses and lays out text natively.
+        
+        Large documents are split into contiguous page ranges extracted in
+        parallel worker processes; results are reassembled in page order.
+        Smaller ones are extracted in-process under a lock, as PDFium cannot
+        be called from several threads at once.
+        """
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                page_count = len(pdf)
+                if page_count < PDF_PARALLEL_MIN_PAGES:
+                    return _extract_pdfium_pages(pdf, 0, page_count)
+            finally:
+                pdf.close()
+        
+        pool = _get_pdf_pool()
+        step = -(-page_count // PDF_POOL_WORKERS)
+        futures = [
+            pool.submit(_extract_pdfium_page_range, str(file_path), start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ]
+        return [page_text for future in futures for page_text in future.result()]
+    
+    def _extract_pdf_pages_pypdf(self, file_path: Path) -> List[str]:
+        """Extract non-empty page texts with pypdf, for files PDFium cannot open."""
+        text_content = []
+        with open(file_path, 'rb') as file:
+            pdf_reader = PdfReader(file)
+            
+            for page_num, page in enumerate(pdf_reader.pages):
+                try:
+                    page_text = page.extract_text()
+                    if page_text.strip():
+                        text_content.append(page_text)
+                except Exception as e:
+                    logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
+                    continue
+        return text_content
+    
     @handle_exceptions
     def extract_text_from_txt(self, file_path: Path) -> str:
         """
@@ -164,22 +316,24 @@ class DocumentProcessor:
             DocumentProcessingError: If text extraction fails
         """
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'utf-16', 'latin-1', 'cp1252']
+            data = file_path.read_bytes()
             
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as file:
-                        content = file.read()
-                        logger.debug(f"Successfully read text file with {encoding} encoding")
-                        return content
-                except UnicodeDecodeError:
-                    continue
+            # Nearly all uploads are UTF-8; only run detection when that fails
+            try:
+                content = data.decode('utf-8')
+                encoding = 'utf-8'
+            except UnicodeDecodeError:
+                best = from_bytes(data).best()
+                if best is not None:
+                    content, encoding = str(best), best.encoding
+                else:
+                    # latin-1 maps every byte, so it is the last resort
+                    content, encoding = data.decode('latin-1'), 'latin-1'
             
-            raise DocumentProcessingError(
-                "Could not decode text file with any supported encoding",
-                filename=file_path.name
-            )
+            logger.debug(f"Successfully read text file with {encoding} encoding")
+            
+            # Match text-mode reads, which translate every newline style to "\n"
+            return content.replace('\r\n', '\n').replace('\r', '\n')
             
         except Exception as e:
             if isinstance(e, DocumentProcessingError):
@@ -219,7 +373,7 @@ class DocumentProcessor:
         
         if file_ext == '.pdf':
             text_content = self.extract_text_from_pdf(file_path)
-        elif file_ext in ['.txt']:
+        elif file_ext == '.txt':
             text_content = self.extract_text_from_txt(file_path)
         else:
             raise DocumentProcessingError(
@@ -227,14 +381,77 @@ class DocumentProcessor:
                 filename=filename
             )
         
+        # The original is not read again once extracted; keep it from crowding the page cache
+        _drop_page_cache(file_path)
+        
         # Save extracted text
-        text_file_path = self.processed_dir / f"{doc_id}_extracted.txt"
+        text_file_path = self.processed_dir / f"{doc_id}{EXTRACTED_TEXT_SUFFIX}"
         with open(text_file_path, 'w', encoding='utf-8') as f:
             f.write(text_content)
         
         logger.info(f"Text extracted and saved for document {doc_id}")
         return text_content
     
+    @handle_exceptions
+    def process_upload(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        find_existing: Optional[Callable[[str], Optional[Dict]]] = None
+    ) -> Dict:
+        """
+        Save an upload and extract its text in one call.
+        
+        Validation, size checking and hashing already happen in the single
+        streaming copy made by save_file; extraction reads the file straight
+        back while it is still in the page cache. When find_existing returns a
+        document for the content digest, the new copy is discarded and
+        extraction is skipped.
+        
+        Args:
+            stream: Readable binary file object positioned at the start of the upload
+            filename: Original filename
+            find_existing: Optional lookup of an already ingested document by content digest
+            
+        Returns:
+            Dict with doc_id, size_bytes, content_hash and text, plus duplicate_of
+            (the existing document) when the content was already ingested
+            
+        Raises:
+            DocumentProcessingError: If validation, saving or extraction fails
+        """
+        doc_id, size_bytes, content_hash = self.save_file(stream, filename)
+        upload = {
+            "doc_id": doc_id,
+            "size_bytes": size_bytes,
+            "content_hash": content_hash,
+            "text": None,
+            "duplicate_of": None
+        }
+        
+        existing = find_existing(content_hash) if find_existing else None
+        if existing is not None:
+            self.discard_file(doc_id, filename)
+            upload["duplicate_of"] = existing
+            return upload
+        
+        upload["text"] = self.extract_text(doc_id, filename)
+        return upload
+    
+    def discard_file(self, doc_id: str, filename: str) -> None:
+        """
+        Delete a saved upload and any text extracted from it, e.g. for one found
+        to duplicate an ingested document or one that failed to index.
+        
+        Args:
+            doc_id: Document ID
+            filename: Original filename
+        """
+        safe_filename = f"{doc_id}_{filename.replace(' ', '_')}"
+        (self.upload_dir / safe_filename).unlink(missing_ok=True)
+        (self.processed_dir / f"{doc_id}{EXTRACTED_TEXT_SUFFIX}").unlink(missing_ok=True)
+        logger.debug(f"Discarded upload {safe_filename}")
+    
     @handle_exceptions
     def get_document_info(self, doc_id: str) -> Optional[Dict]:
         """
@@ -247,7 +464,7 @@ class DocumentProcessor:
             Dict with document information or None if not found
         """
         # This is a simple implementation - in production, you'd use a database
-        text_file_path = self.processed_dir / f"{doc_id}_extracted.txt"
+        text_file_path = self.processed_dir / f"{doc_id}{EXTRACTED_TEXT_SUFFIX}"
         
         if not text_file_path.exists():
             return None
@@ -272,11 +489,19 @@ class DocumentProcessor:
         """
         documents = []
         
-        for text_file in self.processed_dir.glob("*_extracted.txt"):
-            doc_id = text_file.stem.replace("_extracted", "")
-            doc_info = self.get_document_info(doc_id)
-            if doc_info:
-                documents.append(doc_info)
+        # One directory scan; DirEntry.stat() reuses what the scan already read where possible
+        with os.scandir(self.processed_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(EXTRACTED_TEXT_SUFFIX) or not entry.is_file():
+                    continue
+                
+                stat = entry.stat()
+                documents.append({
+                    "id": entry.name[:-len(EXTRACTED_TEXT_SUFFIX)],
+                    "processed_date": datetime.fromtimestamp(stat.st_mtime),
+                    "size_bytes": stat.st_size,
+                    "status": "processed"
+                })
         
         logger.debug(f"Found {len(documents)} processed documents")
         return documents
\ No newline at end of file
@@ -3,18 +3,50 @@ Evaluation Service for Healthcare Copilot.
 Implements RAG evaluation metrics and LLM performance monitoring.
 """
 
+import re
+import threading
 import time
-from typing import Dict, List
+from collections import deque
+from typing import Callable, Dict, FrozenSet, List, Optional
+import numpy as np
+import orjson
+from cachetools import LRUCache
 from loguru import logger
 
+from utils.text import grounded_fraction, tokenize_words
+
+
+# Evaluations kept for aggregate metrics; older ones are dropped as new ones arrive
+MAX_METRICS_HISTORY = 10000
+
+# Scores averaged by get_aggregate_metrics, one column each in the score ring buffer
+_AGGREGATE_FIELDS = ('answer_relevance', 'faithfulness', 'context_precision', 'overall_score')
+
+_PERCENTAGE_RE = re.compile(r'\b\d+%\b')
+
 
 class EvaluationService:
     """Service for evaluating RAG and LLM performance."""
     
+    # Keyword groups matched as substrings of the lowercased output
+    ABSOLUTE_WORDS = ('always', 'never', 'definitely', 'certainly')
+    UNCERTAINTY_WORDS = ('may', 'might', 'could', 'possibly')
+    CONFIDENCE_WORDS = ('will', 'must', 'definitely', 'certainly')
+    HEDGING_WORDS = ('typically', 'generally', 'usually', 'often')
+    
     def __init__(self):
         """Initialize evaluation service."""
         self.logger = logger.bind(service="evaluation")
-        self.metrics_history = []
+        self.metrics_history = deque(maxlen=MAX_METRICS_HISTORY)
+        self.total_evaluations = 0
+        
+        # Aggregated scores mirrored column-wise in a ring buffer aligned with metrics_history,
+        # so window averages are one vectorized reduction instead of per-dict lookups
+        self._score_columns = np.zeros((MAX_METRICS_HISTORY, len(_AGGREGATE_FIELDS)))
+        
+        # Retrieved chunks recur across queries; keep their word sets between evaluations
+        self._doc_words = LRUCache(maxsize=2048)
+        self._doc_words_lock = threading.Lock()
     
     def evaluate_rag_response(
         self,
@@ -35,28 +67,96 @@ class EvaluationService:
         Returns:
             Dictionary with evaluation metrics
         """
+        metrics = self._score_rag(query, answer, retrieved_docs, ground_truth, tokenize_words)
+        
+        # Store metrics for monitoring
+        self._record_metrics(metrics)
+        
+        self.logger.info(f"RAG evaluation completed: overall_score={metrics['overall_score']:.2f}")
+        
+        return metrics
+    
+    def evaluate_rag_batch(
+        self,
+        queries: List[str],
+        answers: List[str],
+        docs_per_query: List[List[Dict]],
+        ground_truths: Optional[List[Optional[str]]] = None
+    ) -> List[Dict]:
+        """
+        Evaluate several RAG responses at once.
+        
+        Each distinct text is tokenized once for the whole batch; retrieved
+        documents additionally share the cross-evaluation document cache.
+        
+        Args:
+            queries: User queries
+            answers: Generated answers, one per query
+            docs_per_query: Retrieved documents for each query
+            ground_truths: Optional ground truth answers, one per query
+            
+        Returns:
+            List of evaluation metric dictionaries, in query order
+        """
+        if ground_truths is None:
+            ground_truths = [None] * len(queries)
+        
+        word_sets: Dict[str, FrozenSet[str]] = {}
+        
+        def words(text: str) -> FrozenSet[str]:
+            cached = word_sets.get(text)
+            if cached is None:
+                cached = word_sets[text] = tokenize_words(text)
+            return cached
+        
+        results = [
+            self._score_rag(query, answer, retrieved_docs, ground_truth, words)
+            for query, answer, retrieved_docs, ground_truth
+            in zip(queries, answers, docs_per_query, ground_truths)
+        ]
+        
+        # Store metrics for monitoring
+        for metrics in results:
+            self._record_metrics(metrics)
+        
+        self.logger.info(f"RAG batch evaluation completed: {len(results)} responses, {len(word_sets)} distinct texts")
+        
+        return results
+    
+    def _score_rag(
+        self,
+        query: str,
+        answer: str,
+        retrieved_docs: List[Dict],
+        ground_truth: Optional[str],
+        words: Callable[[str], FrozenSet[str]]
+    ) -> Dict:
+        """Compute RAG metrics for one response, tokenizing each text once via words()."""
+        query_words = words(query) if query else frozenset()
+        answer_words = words(answer) if answer else frozenset()
+        doc_word_sets = [self._doc_word_set(doc.get('content', '')) for doc in retrieved_docs]
+        
+        # Retrieval scores feed both recall and retrieval quality; collect and average them once
+        scores = [doc.get('score', 0.0) for doc in retrieved_docs]
+        avg_score = sum(scores) / len(scores) if scores else 0.0
+        
         metrics = {
-            'answer_relevance': self._calculate_answer_relevance(query, answer),
-            'faithfulness': self._calculate_faithfulness(answer, retrieved_docs),
-            'context_precision': self._calculate_context_precision(retrieved_docs, answer),
-            'context_recall': self._calculate_context_recall(retrieved_docs, answer),
-            'retrieval_quality': self._evaluate_retrieval_quality(retrieved_docs),
+            'answer_relevance': self._calculate_answer_relevance(query_words, answer_words, len(answer)),
+            'faithfulness': self._calculate_faithfulness(answer_words, doc_word_sets),
+            'context_precision': self._calculate_context_precision(doc_word_sets, answer_words),
+            'context_recall': self._calculate_context_recall(avg_score),
+            'retrieval_quality': self._evaluate_retrieval_quality(scores, avg_score),
             'response_completeness': self._check_response_completeness(answer),
             'timestamp': time.time()
         }
         
         # Add ground truth comparison if available
         if ground_truth:
-            metrics['accuracy'] = self._calculate_accuracy(answer, ground_truth)
+            metrics['accuracy'] = self._calculate_accuracy(answer_words, words(ground_truth))
         
         # Calculate overall score
         metrics['overall_score'] = self._calculate_overall_score(metrics)
         
-        # Store metrics for monitoring
-        self.metrics_history.append(metrics)
-        
-        self.logger.info(f"RAG evaluation completed: overall_score={metrics['overall_score']:.2f}")
-        
         return metrics
     
     def evaluate_llm_output(
@@ -76,12 +176,14 @@ class EvaluationService:
         Returns:
             Evaluation metrics
         """
+        output_lower = output.lower()
+        
         metrics = {
             'output_length': len(output),
             'is_coherent': self._check_coherence(output),
             'format_compliance': self._check_format_compliance(output, expected_format),
-            'contains_hallucination_markers': self._detect_hallucination_markers(output),
-            'confidence_indicators': self._extract_confidence_indicators(output),
+            'contains_hallucination_markers': self._detect_hallucination_markers(output, output_lower),
+            'confidence_indicators': self._extract_confidence_indicators(output_lower),
             'timestamp': time.time()
         }
         
@@ -121,102 +223,115 @@ class EvaluationService:
         if not self.metrics_history:
             return {}
         
-        recent_metrics = self.metrics_history[-window_size:]
+        window = max(0, min(window_size, len(self.metrics_history)))
+        means = [0.0] * len(_AGGREGATE_FIELDS)
+        if window:
+            rows = np.arange(self.total_evaluations - window, self.total_evaluations) % MAX_METRICS_HISTORY
+            means = self._score_columns[rows].mean(axis=0).tolist()
+        
+        averages = dict(zip(_AGGREGATE_FIELDS, means))
         
         return {
-            'avg_answer_relevance': self._avg([m['answer_relevance'] for m in recent_metrics]),
-            'avg_faithfulness': self._avg([m['faithfulness'] for m in recent_metrics]),
-            'avg_context_precision': self._avg([m['context_precision'] for m in recent_metrics]),
-            'avg_overall_score': self._avg([m['overall_score'] for m in recent_metrics]),
-            'total_evaluations': len(self.metrics_history),
-            'window_size': len(recent_metrics)
+            'avg_answer_relevance': averages['answer_relevance'],
+            'avg_faithfulness': averages['faithfulness'],
+            'avg_context_precision': averages['context_precision'],
+            'avg_overall_score': averages['overall_score'],
+            'total_evaluations': self.total_evaluations,
+            'window_size': window
         }
     
-    def _calculate_answer_relevance(self, query: str, answer: str) -> float:
+    def _record_metrics(self, metrics: Dict) -> None:
+        """Append evaluation metrics to the history and the score ring buffer."""
+        row = self.total_evaluations % MAX_METRICS_HISTORY
+        self._score_columns[row] = [metrics[field] for field in _AGGREGATE_FIELDS]
+        self.metrics_history.append(metrics)
+        self.total_evaluations += 1
+    
+    def _doc_word_set(self, content: str) -> FrozenSet[str]:
+        """Word set of a retrieved document's content, cached across evaluations."""
+        with self._doc_words_lock:
+            cached = self._doc_words.get(content)
+        if cached is None:
+            cached = tokenize_words(content)
+            with self._doc_words_lock:
+                self._doc_words[content] = cached
+        return cached
+    
+    def _calculate_answer_relevance(
+        self,
+        query_words: FrozenSet[str],
+        answer_words: FrozenSet[str],
+        answer_length: int
+    ) -> float:
         """
         Calculate how relevant the answer is to the query.
         Uses simple word overlap and length heuristics.
         """
-        if not answer or not query:
+        if not answer_words or not query_words:
             return 0.0
         
-        query_words = set(query.lower().split())
-        answer_words = set(answer.lower().split())
-        
         # Word overlap
-        overlap = len(query_words.intersection(answer_words))
+        overlap = len(query_words & answer_words)
         relevance = overlap / len(query_words) if query_words else 0.0
         
         # Penalize very short answers
-        if len(answer) < 50:
+        if answer_length < 50:
             relevance *= 0.7
         
         return min(relevance, 1.0)
     
-    def _calculate_faithfulness(self, answer: str, retrieved_docs: List[Dict]) -> float:
+    def _calculate_faithfulness(
+        self,
+        answer_words: FrozenSet[str],
+        doc_word_sets: List[FrozenSet[str]]
+    ) -> float:
         """
         Calculate faithfulness: how well answer is grounded in retrieved documents.
         """
-        if not retrieved_docs or not answer:
+        if not doc_word_sets:
             return 0.0
         
-        answer_words = set(answer.lower().split())
-        doc_words = set()
-        
-        for doc in retrieved_docs:
-            content = doc.get('content', '')
-            doc_words.update(content.lower().split())
-        
-        if not answer_words:
-            return 0.0
-        
-        overlap = len(answer_words.intersection(doc_words))
-        faithfulness = overlap / len(answer_words)
-        
-        return min(faithfulness, 1.0)
+        return grounded_fraction(answer_words, doc_word_sets)
     
-    def _calculate_context_precision(self, retrieved_docs: List[Dict], answer: str) -> float:
+    def _calculate_context_precision(
+        self,
+        doc_word_sets: List[FrozenSet[str]],
+        answer_words: FrozenSet[str]
+    ) -> float:
         """
         Calculate context precision: how many retrieved docs are actually relevant.
         """
-        if not retrieved_docs:
+        if not doc_word_sets or not answer_words:
             return 0.0
         
-        answer_words = set(answer.lower().split())
         relevant_count = 0
         
-        for doc in retrieved_docs:
-            content = doc.get('content', '')
-            doc_words = set(content.lower().split())
-            overlap = len(answer_words.intersection(doc_words))
+        for doc_words in doc_word_sets:
+            # Overlap cannot exceed the document's own size, so documents too small
+            # to clear the threshold are rejected without probing any words
+            if len(doc_words) / len(answer_words) <= 0.2:
+                continue
+            
+            overlap = len(answer_words & doc_words)
             
             # Consider doc relevant if >20% word overlap with answer
             if overlap / len(answer_words) > 0.2:
                 relevant_count += 1
         
-        return relevant_count / len(retrieved_docs)
+        return relevant_count / len(doc_word_sets)
     
-    def _calculate_context_recall(self, retrieved_docs: List[Dict], answer: str) -> float:
+    def _calculate_context_recall(self, avg_score: float) -> float:
         """
         Calculate context recall: how much relevant context was retrieved.
+        Uses the average retrieval score as a proxy.
         """
-        if not retrieved_docs:
-            return 0.0
-        
-        # Use retrieval scores as proxy for recall
-        scores = [doc.get('score', 0.0) for doc in retrieved_docs]
-        avg_score = sum(scores) / len(scores) if scores else 0.0
-        
         return min(avg_score, 1.0)
     
-    def _evaluate_retrieval_quality(self, retrieved_docs: List[Dict]) -> Dict:
-        """Evaluate quality of document retrieval."""
-        if not retrieved_docs:
+    def _evaluate_retrieval_quality(self, scores: List[float], avg_score: float) -> Dict:
+        """Evaluate quality of document retrieval from its scores and their average."""
+        if not scores:
             return {'quality': 'poor', 'score': 0.0}
         
-        scores = [doc.get('score', 0.0) for doc in retrieved_docs]
-        avg_score = sum(scores) / len(scores)
-        
         if avg_score > 0.8:
             quality = 'excellent'
         elif avg_score > 0.6:
@@ -229,8 +344,8 @@ class EvaluationService:
         return {
             'quality': quality,
             'score': avg_score,
-            'num_docs': len(retrieved_docs),
-            'top_score': max(scores) if scores else 0.0
+            'num_docs': len(scores),
+            'top_score': max(scores)
         }
     
     def _check_response_completeness(self, answer: str) -> Dict:
@@ -242,15 +357,12 @@ class EvaluationService:
             'is_complete': not answer.endswith('...')
         }
     
-    def _calculate_accuracy(self, answer: str, ground_truth: str) -> float:
+    def _calculate_accuracy(self, answer_words: FrozenSet[str], truth_words: FrozenSet[str]) -> float:
         """Calculate accuracy against ground truth."""
-        answer_words = set(answer.lower().split())
-        truth_words = set(ground_truth.lower().split())
-        
         if not truth_words:
             return 0.0
         
-        overlap = len(answer_words.intersection(truth_words))
+        overlap = len(answer_words & truth_words)
         return overlap / len(truth_words)
     
     def _calculate_overall_score(self, metrics: Dict) -> float:
@@ -288,38 +400,34 @@ class EvaluationService:
             return True
         
         if expected_format == 'json':
-            import json
             try:
-                json.loads(output)
+                orjson.loads(output)
                 return True
-            except:
+            except orjson.JSONDecodeError:
                 return False
         
         return True
     
-    def _detect_hallucination_markers(self, text: str) -> List[str]:
+    def _detect_hallucination_markers(self, text: str, text_lower: str) -> List[str]:
         """Detect markers that might indicate hallucination."""
         markers = []
         
         # Absolute statements
-        if any(word in text.lower() for word in ['always', 'never', 'definitely', 'certainly']):
+        if any(word in text_lower for word in self.ABSOLUTE_WORDS):
             markers.append('absolute_statements')
         
         # Specific numbers without context
-        import re
-        if re.search(r'\b\d+%\b', text):
+        if _PERCENTAGE_RE.search(text):
             markers.append('specific_percentages')
         
         return markers
     
-    def _extract_confidence_indicators(self, text: str) -> Dict:
-        """Extract confidence indicators from text."""
-        text_lower = text.lower()
-        
+    def _extract_confidence_indicators(self, text_lower: str) -> Dict:
+        """Extract confidence indicators from lowercased text."""
         return {
-            'has_uncertainty': any(word in text_lower for word in ['may', 'might', 'could', 'possibly']),
-            'has_confidence': any(word in text_lower for word in ['will', 'must', 'definitely', 'certainly']),
-            'has_hedging': any(word in text_lower for word in ['typically', 'generally', 'usually', 'often'])
+            'has_uncertainty': any(word in text_lower for word in self.UNCERTAINTY_WORDS),
+            'has_confidence': any(word in text_lower for word in self.CONFIDENCE_WORDS),
+            'has_hedging': any(word in text_lower for word in self.HEDGING_WORDS)
         }
     
     def _classify_performance(self, latency_ms: float) -> str:
@@ -332,7 +440,3 @@ class EvaluationService:
             return 'acceptable'
         else:
             return 'poor'
-    
-    def _avg(self, values: List[float]) -> float:
-        """Calculate average of values."""
-        return sum(values) / len(values) if values else 0.0
@@ -7,6 +7,8 @@ import re
 from typing import Dict, List, Tuple
 from loguru import logger
 
+from utils.text import grounded_fraction, tokenize_words
+
 
 class GuardrailsService:
     """Service for implementing AI safety guardrails."""
@@ -28,6 +30,43 @@ class GuardrailsService:
         r'<script[^>]*>.*?</script>',  # XSS
     ]
     
+    # All PII patterns fused into one named-group alternation, so a single scan finds every type
+    _PII_RE = re.compile(
+        '|'.join(f'(?P<{pii_type}>{pattern})' for pii_type, pattern in PII_PATTERNS.items()),
+        re.IGNORECASE
+    )
+    
+    # Each PII pattern on its own; a fused match consumes its span and can hide another
+    # type overlapping it (e.g. the digits of an MRN also form a phone number)
+    _PII_RES = {pii_type: re.compile(pattern, re.IGNORECASE) for pii_type, pattern in PII_PATTERNS.items()}
+    
+    # Every PII pattern needs a digit or "@", so text without one skips the PII scan
+    _PII_TRIGGER_RE = re.compile(r'[\d@]')
+    
+    # Prohibited patterns fused the same way; group p<i> is PROHIBITED_PATTERNS[i]
+    _PROHIBITED_RE = re.compile(
+        '|'.join(f'(?P<p{index}>{pattern})' for index, pattern in enumerate(PROHIBITED_PATTERNS)),
+        re.IGNORECASE
+    )
+    _PROHIBITED_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in PROHIBITED_PATTERNS)
+    
+    # Absolute statements; the alternatives are disjoint whole words, so one fused scan
+    # counts exactly what separate scans would
+    _ABSOLUTE_RE = re.compile(
+        r'\b(always|never|all|none|every|must|cannot)\b'
+        r'|\b(definitely|certainly|absolutely|guaranteed)\b',
+        re.IGNORECASE
+    )
+    
+    # Specific numbers/dates stay separate patterns: they overlap (e.g. "$2023" is both an
+    # amount and a year) and each match counts towards the risk score
+    _SPECIFIC_RES = (
+        re.compile(r'\b\d+%\b'),  # Percentages
+        re.compile(r'\$\d+'),     # Dollar amounts
+        re.compile(r'\b\d{4}\b')  # Years
+    )
+    _DIGIT_RE = re.compile(r'\d')
+    
     # Healthcare-specific sensitive terms
     SENSITIVE_TERMS = [
         'diagnosis', 'treatment', 'medication', 'prescription',
@@ -130,17 +169,13 @@ class GuardrailsService:
         Returns:
             Sanitized text
         """
-        sanitized = text
-        
         # Redact PII patterns
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            sanitized = re.sub(pattern, f'[REDACTED_{pii_type.upper()}]', sanitized, flags=re.IGNORECASE)
+        sanitized = text
+        if self._PII_TRIGGER_RE.search(text):
+            sanitized = self._PII_RE.sub(lambda match: f'[REDACTED_{match.lastgroup.upper()}]', text)
         
         # Remove prohibited content
-        for pattern in self.PROHIBITED_PATTERNS:
-            sanitized = re.sub(pattern, '[REMOVED]', sanitized, flags=re.IGNORECASE)
-        
-        return sanitized
+        return self._PROHIBITED_RE.sub('[REMOVED]', sanitized)
     
     def check_content_safety(self, text: str) -> Dict:
         """
@@ -152,38 +187,61 @@ class GuardrailsService:
         Returns:
             Safety report dictionary
         """
+        # Each detector runs once; the risk level is derived from the same findings
+        pii_found = self._detect_pii(text)
+        prohibited = self._detect_prohibited_content(text)
+        sensitive = self._detect_sensitive_terms(text)
+        
         return {
             'is_safe': True,
-            'pii_detected': bool(self._detect_pii(text)),
-            'prohibited_content': bool(self._detect_prohibited_content(text)),
-            'sensitive_terms': self._detect_sensitive_terms(text),
-            'risk_level': self._calculate_risk_level(text)
+            'pii_detected': bool(pii_found),
+            'prohibited_content': bool(prohibited),
+            'sensitive_terms': sensitive,
+            'risk_level': self._calculate_risk_level(pii_found, prohibited, sensitive)
         }
     
+    def contains_pii(self, text: str) -> bool:
+        """
+        Check whether text contains any PII/PHI pattern.
+        
+        Args:
+            text: Text to check
+            
+        Returns:
+            True if at least one PII/PHI pattern matches
+        """
+        return self._PII_TRIGGER_RE.search(text) is not None and self._PII_RE.search(text) is not None
+    
     def _detect_pii(self, text: str) -> List[str]:
         """Detect PII/PHI in text."""
-        found = []
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                found.append(pii_type)
-        return found
+        if not self._PII_TRIGGER_RE.search(text):
+            return []
+        
+        hits = {match.lastgroup for match in self._PII_RE.finditer(text)}
+        if not hits:
+            return []
+        
+        # Types the fused scan missed may still overlap a match it found; check them alone
+        return [
+            pii_type for pii_type, pattern in self._PII_RES.items()
+            if pii_type in hits or pattern.search(text)
+        ]
     
     def _detect_prohibited_content(self, text: str) -> List[str]:
         """Detect prohibited content patterns."""
-        found = []
-        for pattern in self.PROHIBITED_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                found.append(pattern)
-        return found
+        hits = {match.lastgroup for match in self._PROHIBITED_RE.finditer(text)}
+        if not hits:
+            return []
+        
+        return [
+            pattern for index, (pattern, regex) in enumerate(zip(self.PROHIBITED_PATTERNS, self._PROHIBITED_RES))
+            if f'p{index}' in hits or regex.search(text)
+        ]
     
     def _detect_sensitive_terms(self, text: str) -> List[str]:
         """Detect healthcare-specific sensitive terms."""
-        found = []
         text_lower = text.lower()
-        for term in self.SENSITIVE_TERMS:
-            if term in text_lower:
-                found.append(term)
-        return found
+        return [term for term in self.SENSITIVE_TERMS if term in text_lower]
     
     def _assess_hallucination_risk(self, output: str, source_docs: List[str]) -> str:
         """
@@ -195,27 +253,14 @@ class GuardrailsService:
             return 'high'  # No source documents = high risk
         
         # Check for absolute statements without source support
-        absolute_patterns = [
-            r'\b(always|never|all|none|every|must|cannot)\b',
-            r'\b(definitely|certainly|absolutely|guaranteed)\b'
-        ]
-        
-        absolute_count = sum(
-            len(re.findall(pattern, output, re.IGNORECASE))
-            for pattern in absolute_patterns
-        )
+        absolute_count = sum(1 for _ in self._ABSOLUTE_RE.finditer(output))
         
         # Check for specific numbers/dates without source
-        specific_patterns = [
-            r'\b\d+%\b',  # Percentages
-            r'\$\d+',     # Dollar amounts
-            r'\b\d{4}\b'  # Years
-        ]
-        
-        specific_count = sum(
-            len(re.findall(pattern, output))
-            for pattern in specific_patterns
-        )
+        specific_count = 0
+        if self._DIGIT_RE.search(output):
+            specific_count = sum(
+                1 for pattern in self._SPECIFIC_RES for _ in pattern.finditer(output)
+            )
         
         # Simple heuristic
         if absolute_count > 5 or specific_count > 3:
@@ -234,26 +279,15 @@ class GuardrailsService:
         if not source_docs:
             return 0.0
         
-        # Simple word overlap metric
-        output_words = set(output.lower().split())
-        source_words = set()
-        for doc in source_docs:
-            source_words.update(doc.lower().split())
-        
-        if not output_words:
-            return 0.0
-        
-        overlap = len(output_words.intersection(source_words))
-        faithfulness = overlap / len(output_words)
-        
-        return min(faithfulness, 1.0)
+        # Simple word overlap metric; sources are tokenized lazily, so none past
+        # the point of full coverage are split
+        return grounded_fraction(
+            tokenize_words(output),
+            (tokenize_words(doc) for doc in source_docs)
+        )
     
-    def _calculate_risk_level(self, text: str) -> str:
-        """Calculate overall risk level."""
-        pii_found = self._detect_pii(text)
-        prohibited = self._detect_prohibited_content(text)
-        sensitive = self._detect_sensitive_terms(text)
-        
+    def _calculate_risk_level(self, pii_found: List[str], prohibited: List[str], sensitive: List[str]) -> str:
+        """Calculate overall risk level from detector findings."""
         if pii_found or prohibited:
             return 'high'
         elif len(sensitive) > 3:
@@ -3,6 +3,7 @@ LLM Service for Healthcare Copilot using Ollama.
 Provides LLM integration for intelligent agent responses with guardrails and evaluation.
 """
 
+import asyncio
 import json
 import time
 from typing import Dict, List, Optional
@@ -18,6 +19,51 @@ from services.evaluation_service import EvaluationService
 from services.audit_service import AuditLogger
 
 
+# Agents the router can dispatch to
+_AGENT_NAMES = ("PolicyInterpreter", "WorkflowPlanner", "ExceptionHandler")
+
+# JSON structures each agent's LLM response must follow
+_POLICY_INTERPRETATION_FORMAT = """{
+    "direct_answer": "Clear answer to the query",
+    "requirements": ["requirement1", "requirement2"],
+    "procedures": ["step1", "step2"],
+    "exceptions": ["exception1", "exception2"],
+    "compliance_notes": ["note1", "note2"]
+}"""
+
+_WORKFLOW_PLAN_FORMAT = """{
+    "workflow_type": "type_of_workflow",
+    "steps": [
+        {
+            "step_number": 1,
+            "description": "Step description",
+            "estimated_time": "5-10 minutes",
+            "responsible_role": "Role name",
+            "requirements": ["req1", "req2"]
+        }
+    ],
+    "total_duration": "30-45 minutes",
+    "required_roles": ["role1", "role2"],
+    "compliance_requirements": ["req1", "req2"]
+}"""
+
+_EXCEPTION_PLAN_FORMAT = """{
+    "exception_type": "type_of_exception",
+    "severity": "low|medium|high|critical",
+    "immediate_actions": ["action1", "action2"],
+    "resolution_steps": [
+        {
+            "step": 1,
+            "action": "Action description",
+            "responsible": "Role",
+            "timeline": "immediate|1 hour|4 hours|24 hours"
+        }
+    ],
+    "escalation_path": ["level1", "level2"],
+    "prevention_measures": ["measure1", "measure2"]
+}"""
+
+
 class LLMService:
     """Service for LLM operations using Ollama."""
     
@@ -36,6 +82,9 @@ class LLMService:
             self.evaluator = EvaluationService()
             self.audit_logger = AuditLogger()
             
+            # Caps in-flight requests so concurrent agents stay within the model server's capacity
+            self._llm_slots = asyncio.Semaphore(settings.ollama_max_concurrency)
+            
             logger.info(f"LLM service initialized with Ollama model: {settings.ollama_model}")
         except Exception as e:
             logger.error(f"Failed to initialize LLM service: {str(e)}")
@@ -46,13 +95,7 @@ class LLMService:
         system_prompt = """You are a healthcare operations policy interpreter. Analyze policy content and provide structured responses.
 
 Return your response as valid JSON with this exact structure:
-{
-    "direct_answer": "Clear answer to the query",
-    "requirements": ["requirement1", "requirement2"],
-    "procedures": ["step1", "step2"],
-    "exceptions": ["exception1", "exception2"],
-    "compliance_notes": ["note1", "note2"]
-}"""
+""" + _POLICY_INTERPRETATION_FORMAT
         
         user_prompt = f"""Query: {query}
 
@@ -69,7 +112,7 @@ Analyze the policy content and provide a structured interpretation."""
                 HumanMessage(content=user_prompt)
             ]
             
-            response = await self.llm.ainvoke(messages)
+            response = await self._ainvoke(messages)
             
             # Parse JSON response
             try:
@@ -88,21 +131,7 @@ Analyze the policy content and provide a structured interpretation."""
         system_prompt = """You are a healthcare workflow planner. Create detailed step-by-step workflows.
 
 Return your response as valid JSON with this exact structure:
-{
-    "workflow_type": "type_of_workflow",
-    "steps": [
-        {
-            "step_number": 1,
-            "description": "Step description",
-            "estimated_time": "5-10 minutes",
-            "responsible_role": "Role name",
-            "requirements": ["req1", "req2"]
-        }
-    ],
-    "total_duration": "30-45 minutes",
-    "required_roles": ["role1", "role2"],
-    "compliance_requirements": ["req1", "req2"]
-}"""
+""" + _WORKFLOW_PLAN_FORMAT
         
         policy_content = "\n\n".join([doc["content"] for doc in policy_docs])
         
@@ -121,7 +150,7 @@ Create a detailed workflow plan with specific steps, timelines, and role assignm
                 HumanMessage(content=user_prompt)
             ]
             
-            response = await self.llm.ainvoke(messages)
+            response = await self._ainvoke(messages)
             
             try:
                 result = json.loads(response.content)
@@ -138,21 +167,7 @@ Create a detailed workflow plan with specific steps, timelines, and role assignm
         system_prompt = """You are a healthcare exception handler. Provide solutions for problems and edge cases.
 
 Return your response as valid JSON with this exact structure:
-{
-    "exception_type": "type_of_exception",
-    "severity": "low|medium|high|critical",
-    "immediate_actions": ["action1", "action2"],
-    "resolution_steps": [
-        {
-            "step": 1,
-            "action": "Action description",
-            "responsible": "Role",
-            "timeline": "immediate|1 hour|4 hours|24 hours"
-        }
-    ],
-    "escalation_path": ["level1", "level2"],
-    "prevention_measures": ["measure1", "measure2"]
-}"""
+""" + _EXCEPTION_PLAN_FORMAT
         
         policy_content = "\n\n".join([doc["content"] for doc in policy_docs])
         
@@ -171,7 +186,7 @@ Provide a comprehensive exception handling plan with immediate actions and resol
                 HumanMessage(content=user_prompt)
             ]
             
-            response = await self.llm.ainvoke(messages)
+            response = await self._ainvoke(messages)
             
             try:
                 result = json.loads(response.content)
@@ -205,12 +220,11 @@ Which agent should handle this query?"""
                 HumanMessage(content=user_prompt)
             ]
             
-            response = await self.llm.ainvoke(messages)
+            response = await self._ainvoke(messages)
             agent_name = response.content.strip()
             
             # Validate agent name
-            valid_agents = ["PolicyInterpreter", "WorkflowPlanner", "ExceptionHandler"]
-            if agent_name in valid_agents:
+            if agent_name in _AGENT_NAMES:
                 return agent_name
             else:
                 # Fallback to keyword-based routing
@@ -220,6 +234,84 @@ Which agent should handle this query?"""
             logger.error(f"LLM routing failed: {str(e)}")
             return self._fallback_routing(query)
     
+    async def route_and_answer(self, query: str, policy_docs: List[Dict], context: Dict) -> Dict:
+        """
+        Route a query and generate the selected agent's response in one LLM call.
+        
+        Args:
+            query: User query
+            policy_docs: Relevant policy chunks to ground the response on
+            context: Additional context
+            
+        Returns:
+            Dictionary with the selected "agent", the routing "confidence" (0-1)
+            and the agent "result" in that agent's response structure
+            
+        Raises:
+            QueryProcessingError: If the LLM call fails or the response is unusable
+        """
+        system_prompt = """You are a query router and responder for healthcare operations. Decide which agent should handle the query, then respond as that agent.
+
+Available agents and the JSON structure of their result:
+- PolicyInterpreter: For policy questions, compliance, regulations
+""" + _POLICY_INTERPRETATION_FORMAT + """
+- WorkflowPlanner: For creating step-by-step procedures, workflows
+""" + _WORKFLOW_PLAN_FORMAT + """
+- ExceptionHandler: For problems, errors, edge cases, emergencies
+""" + _EXCEPTION_PLAN_FORMAT + """
+
+Return your response as valid JSON with this exact structure:
+{
+    "agent": "PolicyInterpreter|WorkflowPlanner|ExceptionHandler",
+    "confidence": 0.9,
+    "result": {"...": "result in the selected agent's structure"}
+}
+where confidence is how certain you are (0-1) that the selected agent is correct."""
+        
+        policy_content = "\n\n".join([doc["content"] for doc in policy_docs])
+        
+        user_prompt = f"""Query: {query}
+
+Relevant Policies:
+{policy_content}
+
+Context: {json.dumps(context)}
+
+Select the agent and provide its structured response."""
+        
+        try:
+            messages = [
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=user_prompt)
+            ]
+            
+            response = await self._ainvoke(messages)
+            answer = json.loads(response.content)
+            
+        except Exception as e:
+            logger.error(f"LLM fused routing failed: {str(e)}")
+            raise QueryProcessingError(f"Fused routing failed: {str(e)}")
+        
+        agent_name = answer.get("agent") if isinstance(answer, dict) else None
+        if agent_name not in _AGENT_NAMES or not isinstance(answer.get("result"), dict):
+            raise QueryProcessingError("Fused routing returned an unusable response")
+        
+        try:
+            confidence = min(1.0, max(0.0, float(answer.get("confidence", 0.0))))
+        except (TypeError, ValueError):
+            confidence = 0.0
+        
+        return {
+            "agent": agent_name,
+            "confidence": confidence,
+            "result": answer["result"]
+        }
+    
+    async def _ainvoke(self, messages: List) -> object:
+        """Invoke the LLM, waiting for a free concurrency slot first."""
+        async with self._llm_slots:
+            return await self.llm.ainvoke(messages)
+    
     def _parse_fallback_response(self, content: str) -> Dict:
         """Fallback parsing for malformed JSON responses."""
         return {
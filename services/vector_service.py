@@ -4,10 +4,12 @@ Handles document embeddings, storage, and similarity search using ChromaDB.
 """
 
 import uuid
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
+from chromadb.utils import embedding_functions
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from loguru import logger
@@ -16,6 +18,10 @@ from utils.config import settings
 from utils.exceptions import VectorStoreError, handle_exceptions
 
 
+# Maximum number of chunks sent to the embedding model in one call
+EMBEDDING_BATCH_SIZE = 96
+
+
 class VectorStoreService:
     """Service for managing document embeddings and similarity search."""
     
@@ -31,15 +37,24 @@ class VectorStoreService:
                 )
             )
             
+            # Use ChromaDB's default embedding function (no external downloads).
+            # Held explicitly so query embeddings can be reused by callers (e.g. semantic cache).
+            logger.info("Using ChromaDB default embedding function")
+            self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+            self.embeddings = None  # ChromaDB will handle document embeddings internally
+            
             # Get or create collection
             self.collection = self.client.get_or_create_collection(
                 name=settings.chroma_collection_name,
-                metadata={"description": "Healthcare policies and procedures"}
+                metadata={"description": "Healthcare policies and procedures"},
+                embedding_function=self.embedding_function
             )
             
-            # Use ChromaDB's default embedding function (no external downloads)
-            logger.info("Using ChromaDB default embedding function")
-            self.embeddings = None  # ChromaDB will handle embeddings internally
+            # Largest number of records the client accepts in one write
+            self.max_write_batch_size = self.client.get_max_batch_size()
+            
+            # Callbacks fired whenever the policy corpus changes
+            self._change_listeners: List[Callable[[], None]] = []
             
             # Initialize text splitter
             self.text_splitter = RecursiveCharacterTextSplitter(
@@ -122,30 +137,67 @@ class VectorStoreService:
         Raises:
             VectorStoreError: If document addition fails
         """
-        try:
-            # Split text into chunks
-            chunk_docs = self.split_text(text, doc_id, filename)
+        return self.add_documents([{
+            "text": text,
+            "doc_id": doc_id,
+            "filename": filename,
+            "metadata": metadata
+        }])[0]
+    
+    @handle_exceptions
+    def add_documents(self, documents: List[Dict]) -> List[int]:
+        """
+        Add several documents to vector store with one embedding pass and one write.
+        
+        Args:
+            documents: Dictionaries with "text", "doc_id", "filename" and optional "metadata"
             
-            # Prepare data for ChromaDB
-            ids = [chunk["id"] for chunk in chunk_docs]
-            documents = [chunk["text"] for chunk in chunk_docs]
-            metadatas = []
+        Returns:
+            Number of chunks added per document, in input order
             
-            for chunk in chunk_docs:
-                chunk_metadata = chunk["metadata"].copy()
-                if metadata:
-                    chunk_metadata.update(metadata)
-                metadatas.append(chunk_metadata)
-            
-            # Add to ChromaDB collection (ChromaDB will generate embeddings automatically)
-            self.collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
+        Raises:
+            VectorStoreError: If document addition fails
+        """
+        if not documents:
+            return []
+        
+        try:
+            ids = []
+            texts = []
+            metadatas = []
+            chunk_counts = []
+            
+            for document in documents:
+                # Split text into chunks
+                chunk_docs = self.split_text(document["text"], document["doc_id"], document["filename"])
+                
+                # Prepare data for ChromaDB
+                for chunk in chunk_docs:
+                    chunk_metadata = chunk["metadata"].copy()
+                    if document.get("metadata"):
+                        chunk_metadata.update(document["metadata"])
+                    ids.append(chunk["id"])
+                    texts.append(chunk["text"])
+                    metadatas.append(chunk_metadata)
+                
+                chunk_counts.append(len(chunk_docs))
+            
+            # Embed all chunks in bounded mini-batches, then write them in as few
+            # bulk adds as the client allows (one for all but very large batches)
+            embeddings = self.embed_documents(texts)
+            step = self.max_write_batch_size
+            for start in range(0, len(ids), step):
+                self.collection.add(
+                    ids=ids[start:start + step],
+                    embeddings=embeddings[start:start + step],
+                    documents=texts[start:start + step],
+                    metadatas=metadatas[start:start + step]
+                )
             
-            logger.info(f"Added document {doc_id} with {len(chunk_docs)} chunks to vector store")
-            return len(chunk_docs)
+            for document, chunk_count in zip(documents, chunk_counts):
+                logger.info(f"Added document {document['doc_id']} with {chunk_count} chunks to vector store")
+            self._notify_change()
+            return chunk_counts
             
         except Exception as e:
             raise VectorStoreError(
@@ -153,14 +205,89 @@ class VectorStoreService:
                 operation="add_document"
             )
     
+    def add_change_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback invoked whenever documents are added or removed.
+        
+        Args:
+            callback: Zero-argument callable, e.g. a cache invalidation hook
+        """
+        self._change_listeners.append(callback)
+    
+    def _notify_change(self) -> None:
+        """Notify registered listeners that the policy corpus changed."""
+        for callback in self._change_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Vector store change listener failed: {str(e)}")
+    
+    @handle_exceptions
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed document chunks in mini-batches of at most EMBEDDING_BATCH_SIZE.
+        
+        Args:
+            texts: Chunk texts
+            
+        Returns:
+            One embedding per chunk, in input order
+            
+        Raises:
+            VectorStoreError: If embedding fails
+        """
+        try:
+            embeddings = []
+            for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+                batch = texts[start:start + EMBEDDING_BATCH_SIZE]
+                embeddings.extend(
+                    [float(value) for value in embedding] for embedding in self.embedding_function(batch)
+                )
+            return embeddings
+            
+        except Exception as e:
+            raise VectorStoreError(
+                f"Document embedding failed: {str(e)}",
+                operation="embed_documents"
+            )
+    
     @handle_exceptions
-    def search_similar(self, query: str, max_results: int = 5) -> List[Dict]:
+    def embed(self, query: str) -> np.ndarray:
+        """
+        Embed a query with the collection's embedding function.
+        
+        Args:
+            query: Query text
+            
+        Returns:
+            Query embedding as a float32 vector
+            
+        Raises:
+            VectorStoreError: If embedding fails
+        """
+        try:
+            return np.asarray(self.embedding_function([query])[0], dtype=np.float32)
+            
+        except Exception as e:
+            raise VectorStoreError(
+                f"Query embedding failed: {str(e)}",
+                operation="embed"
+            )
+    
+    @handle_exceptions
+    def search_similar(
+        self,
+        query: str,
+        max_results: int = 5,
+        query_embedding: Optional[Sequence[float]] = None
+    ) -> List[Dict]:
         """
         Search for similar documents using semantic similarity.
         
         Args:
             query: Search query
             max_results: Maximum number of results to return
+            query_embedding: Precomputed embedding of the query, skips re-embedding
             
         Returns:
             List of similar document chunks with scores
@@ -168,29 +295,18 @@ class VectorStoreService:
         Raises:
             VectorStoreError: If search fails
         """
+        if query_embedding is not None:
+            return self.search_by_vector(query_embedding, max_results)
+        
         try:
-            # Search in ChromaDB (ChromaDB will generate query embedding automatically)
+            # Search in ChromaDB (ChromaDB generates the query embedding)
             results = self.collection.query(
                 query_texts=[query],
                 n_results=max_results,
                 include=["documents", "metadatas", "distances"]
             )
             
-            # Format results
-            formatted_results = []
-            if results["documents"] and results["documents"][0]:
-                for i in range(len(results["documents"][0])):
-                    # Convert distance to similarity score (0-1, higher is better)
-                    distance = results["distances"][0][i]
-                    similarity_score = max(0.0, 1.0 - distance)
-                    
-                    formatted_results.append({
-                        "content": results["documents"][0][i],
-                        "metadata": results["metadatas"][0][i],
-                        "score": similarity_score,
-                        "source": results["metadatas"][0][i].get("filename", "unknown")
-                    })
-            
+            formatted_results = self._format_results(results, 0)
             logger.debug(f"Found {len(formatted_results)} similar documents for query")
             return formatted_results
             
@@ -200,6 +316,108 @@ class VectorStoreService:
                 operation="search_similar"
             )
     
+    @handle_exceptions
+    def search_by_vector(self, vector: Sequence[float], max_results: int = 5) -> List[Dict]:
+        """
+        Search for similar documents using a precomputed query embedding.
+        
+        Args:
+            vector: Query embedding
+            max_results: Maximum number of results to return
+            
+        Returns:
+            List of similar document chunks with scores
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        return self.batch_search_by_vector([vector], max_results)[0]
+    
+    @handle_exceptions
+    def batch_search_similar(self, queries: List[str], max_results: int = 5) -> List[List[Dict]]:
+        """
+        Search for similar documents for several queries in one round trip.
+        
+        All queries are embedded in a single model call and sent to ChromaDB
+        as one multi-query request.
+        
+        Args:
+            queries: Search queries
+            max_results: Maximum number of results to return per query
+            
+        Returns:
+            One list of similar document chunks with scores per query, in input order
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        if not queries:
+            return []
+        
+        try:
+            embeddings = self.embedding_function(queries)
+        except Exception as e:
+            raise VectorStoreError(
+                f"Batch query embedding failed: {str(e)}",
+                operation="batch_search_similar"
+            )
+        
+        return self.batch_search_by_vector(embeddings, max_results)
+    
+    @handle_exceptions
+    def batch_search_by_vector(self, vectors: Sequence[Sequence[float]], max_results: int = 5) -> List[List[Dict]]:
+        """
+        Search for similar documents for several query embeddings in one request.
+        
+        Args:
+            vectors: Query embeddings
+            max_results: Maximum number of results to return per query
+            
+        Returns:
+            One list of similar document chunks with scores per query, in input order
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        if not len(vectors):
+            return []
+        
+        try:
+            results = self.collection.query(
+                query_embeddings=[[float(value) for value in vector] for vector in vectors],
+                n_results=max_results,
+                include=["documents", "metadatas", "distances"]
+            )
+            
+            batched_results = [self._format_results(results, q) for q in range(len(vectors))]
+            logger.debug(f"Batch search completed for {len(vectors)} queries")
+            return batched_results
+            
+        except Exception as e:
+            raise VectorStoreError(
+                f"Batch similarity search failed: {str(e)}",
+                operation="batch_search_by_vector"
+            )
+    
+    def _format_results(self, results: Dict, query_index: int) -> List[Dict]:
+        """Format the ChromaDB results of one query as scored document chunks."""
+        documents = results["documents"][query_index] if results["documents"] else []
+        
+        formatted_results = []
+        for i in range(len(documents)):
+            # Convert distance to similarity score (0-1, higher is better)
+            distance = results["distances"][query_index][i]
+            similarity_score = max(0.0, 1.0 - distance)
+            
+            formatted_results.append({
+                "content": documents[i],
+                "metadata": results["metadatas"][query_index][i],
+                "score": similarity_score,
+                "source": results["metadatas"][query_index][i].get("filename", "unknown")
+            })
+        
+        return formatted_results
+    
     @handle_exceptions
     def remove_document(self, doc_id: str) -> int:
         """
@@ -230,6 +448,7 @@ class VectorStoreService:
             
             chunks_removed = len(results["ids"])
             logger.info(f"Removed document {doc_id} with {chunks_removed} chunks from vector store")
+            self._notify_change()
             
             return chunks_removed
             
@@ -0,0 +1,56 @@
+"""
+Tests for the batched audit log sink.
+"""
+
+import pytest
+
+from services.audit_service import _BatchedAuditSink
+
+
+@pytest.fixture
+def make_sink(tmp_path):
+    """Build sinks writing into a scratch directory and stop them afterwards."""
+    sinks = []
+    
+    def make(**overrides):
+        options = {
+            "max_batch": 1000,
+            "flush_interval": 60,
+            "rotation_bytes": 1 << 20,
+            "retention_seconds": 3600,
+        }
+        options.update(overrides)
+        sink = _BatchedAuditSink(tmp_path / "audit.log", **options)
+        sinks.append(sink)
+        return sink
+    
+    yield make
+    for sink in sinks:
+        if not sink._file.closed:
+            sink.stop()
+
+
+class TestBatchedAuditSink:
+    """Batched writes, failure handling and rotation."""
+    
+    def test_failed_write_keeps_pending_entries(self, make_sink, monkeypatch):
+        sink = make_sink()
+        sink.write("first\n")
+        
+        def fail(data):
+            raise OSError("disk full")
+        
+        monkeypatch.setattr(sink, "_file", type("Broken", (), {"write": staticmethod(fail), "closed": False})())
+        with pytest.raises(OSError):
+            with sink._lock:
+                sink._flush_locked()
+        assert sink._pending == ["first\n"]
+    
+    def test_rotated_logs_are_compressed(self, make_sink, tmp_path):
+        sink = make_sink(max_batch=1, rotation_bytes=32)
+        for index in range(10):
+            sink.write(f"entry {index:02d} " + "x" * 40 + "\n")
+        sink.stop()
+        
+        assert list(tmp_path.glob("audit.*.log")) == []
+        assert len(list(tmp_path.glob("audit.*.log.zst"))) == 10
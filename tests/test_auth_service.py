@@ -0,0 +1,52 @@
+"""
+Tests for token verification and revocation.
+"""
+
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from services.auth_service import AuthService
+
+
+@pytest.fixture
+def auth():
+    return AuthService()
+
+
+class TestTokenRevocation:
+    """Revoked tokens stay rejected until they expire."""
+    
+    def test_revoked_token_is_rejected_even_when_cached(self, auth):
+        token = auth.create_access_token({"sub": "user1"})
+        assert auth.verify_token(token)["sub"] == "user1"
+        
+        auth.revoke_token(token)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            auth.verify_token(token)
+        assert exc_info.value.detail == "Token revoked"
+    
+    def test_revocations_are_not_evicted_by_volume(self, auth):
+        first = auth.create_refresh_token({"sub": "user0"})
+        auth.revoke_token(first)
+        
+        for index in range(1, 50):
+            auth.revoke_token(auth.create_refresh_token({"sub": f"user{index}"}))
+        
+        with pytest.raises(HTTPException):
+            auth.verify_token(first)
+        assert len(auth._revoked_tokens) == 50
+    
+    def test_expired_revocations_are_pruned(self, auth):
+        expired = auth.create_access_token({"sub": "old"}, expires_delta=timedelta(seconds=-1))
+        auth.revoke_token(expired)
+        auth.revoke_token(auth.create_access_token({"sub": "new"}))
+        
+        assert len(auth._revoked_tokens) == 1
+    
+    def test_invalid_token_is_not_recorded(self, auth):
+        auth.revoke_token("not-a-jwt")
+        
+        assert auth._revoked_tokens == {}
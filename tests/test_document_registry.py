@@ -0,0 +1,123 @@
+"""
+Tests for the SQLite document registry.
+"""
+
+import sqlite3
+
+import pytest
+
+from services.document_registry import DocumentRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Registry backed by a fresh database file."""
+    return DocumentRegistry(str(tmp_path / "registry.db"))
+
+
+def _register(registry, doc_id, **overrides):
+    """Register a document with default fields."""
+    fields = {
+        "doc_id": doc_id,
+        "filename": f"{doc_id}.pdf",
+        "category": "policy",
+        "tags": ["billing", "insurance"],
+        "upload_date": "2024-01-01T00:00:00",
+        "size_bytes": 1024,
+        "content_hash": f"hash-{doc_id}",
+    }
+    fields.update(overrides)
+    registry.register(**fields)
+
+
+class TestDocumentRegistry:
+    """Round-trips and bookkeeping of document entries."""
+    
+    def test_register_and_get_round_trip(self, registry):
+        _register(registry, "doc1")
+        
+        assert registry.get("doc1") == {
+            "id": "doc1",
+            "filename": "doc1.pdf",
+            "category": "policy",
+            "tags": ["billing", "insurance"],
+            "upload_date": "2024-01-01T00:00:00",
+            "size_bytes": 1024,
+            "status": "processed",
+        }
+        assert registry.get("missing") is None
+    
+    def test_list_documents_oldest_first(self, registry):
+        _register(registry, "newer", upload_date="2024-02-01T00:00:00")
+        _register(registry, "older", upload_date="2024-01-01T00:00:00")
+        
+        assert [document["id"] for document in registry.list_documents()] == ["older", "newer"]
+    
+    def test_register_many_in_one_call(self, registry):
+        registry.register_many([
+            {"doc_id": "a", "filename": "a.pdf", "category": "sop", "tags": [], "upload_date": "2024-01-01"},
+            {"doc_id": "b", "filename": "b.pdf", "category": "policy", "tags": ["x"], "upload_date": "2024-01-02"},
+        ])
+        
+        assert registry.count() == 2
+        assert registry.get("b")["tags"] == ["x"]
+        assert registry.list_categories() == ["policy", "sop"]
+    
+    def test_set_status_and_count_by_status(self, registry):
+        _register(registry, "doc1", status="pending")
+        _register(registry, "doc2")
+        
+        assert registry.count(status="pending") == 1
+        assert registry.set_status("doc1", "processed") is True
+        assert registry.set_status("missing", "processed") is False
+        assert registry.count(status="processed") == 2
+    
+    def test_remove_updates_categories(self, registry):
+        _register(registry, "doc1", category="policy")
+        _register(registry, "doc2", category="sop")
+        
+        assert registry.remove("doc1") is True
+        assert registry.remove("doc1") is False
+        assert registry.list_categories() == ["sop"]
+        assert registry.count() == 1
+    
+    def test_reregister_moves_category(self, registry):
+        _register(registry, "doc1", category="policy")
+        _register(registry, "doc1", category="sop")
+        
+        assert registry.list_categories() == ["sop"]
+        assert registry.count() == 1
+    
+    def test_find_by_content_hash_skips_failed(self, registry):
+        _register(registry, "failed", content_hash="same", status="failed")
+        assert registry.find_by_content_hash("same") is None
+        
+        _register(registry, "ok", content_hash="same", upload_date="2024-03-01T00:00:00")
+        assert registry.find_by_content_hash("same")["id"] == "ok"
+    
+    def test_state_persists_across_instances(self, tmp_path):
+        db_path = str(tmp_path / "registry.db")
+        _register(DocumentRegistry(db_path), "doc1", category="policy")
+        
+        reopened = DocumentRegistry(db_path)
+        
+        assert reopened.get("doc1")["filename"] == "doc1.pdf"
+        assert reopened.list_categories() == ["policy"]
+    
+    def test_migrates_registry_without_content_hash(self, tmp_path):
+        db_path = tmp_path / "legacy.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE documents (id TEXT PRIMARY KEY, filename TEXT NOT NULL, category TEXT, "
+            "tags TEXT NOT NULL DEFAULT '', upload_date TEXT NOT NULL, "
+            "size_bytes INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL DEFAULT 'processed')"
+        )
+        conn.execute("INSERT INTO documents (id, filename, upload_date) VALUES ('old', 'old.pdf', '2023-01-01')")
+        conn.commit()
+        conn.close()
+        
+        registry = DocumentRegistry(str(db_path))
+        _register(registry, "new", content_hash="abc")
+        
+        assert registry.get("old")["filename"] == "old.pdf"
+        assert registry.find_by_content_hash("abc")["id"] == "new"
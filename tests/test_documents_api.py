@@ -0,0 +1,122 @@
+"""
+Tests for the document ingestion endpoints.
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.v1 import documents
+from services.document_registry import DocumentRegistry
+from services.document_service import DocumentProcessor
+
+
+@pytest.fixture
+def vector_service():
+    """Vector store double reporting three chunks per document."""
+    service = MagicMock()
+    service.add_documents.side_effect = lambda docs: [3] * len(docs)
+    service.add_document.return_value = 3
+    return service
+
+
+@pytest.fixture
+def services(tmp_path, monkeypatch, vector_service):
+    """Real processor and registry in a scratch directory, injected into the router."""
+    monkeypatch.chdir(tmp_path)
+    processor = DocumentProcessor()
+    registry = DocumentRegistry(str(tmp_path / "registry.db"))
+    monkeypatch.setattr(documents, "document_processor", processor)
+    monkeypatch.setattr(documents, "vector_service", vector_service)
+    monkeypatch.setattr(documents, "document_registry", registry)
+    return processor, registry, vector_service
+
+
+@pytest.fixture
+def client(services):
+    app = FastAPI()
+    app.include_router(documents.router)
+    return TestClient(app)
+
+
+def _stored_files(processor):
+    """Names of all saved uploads and extracted texts."""
+    return sorted(
+        [path.name for path in processor.upload_dir.iterdir()]
+        + [path.name for path in processor.processed_dir.iterdir()]
+    )
+
+
+class TestBatchUpload:
+    """Batch ingestion deduplication and failure cleanup."""
+    
+    def test_identical_files_in_batch_are_indexed_once(self, client, services):
+        processor, registry, vector_service = services
+        files = [
+            ("files", ("a.txt", b"prior authorization policy", "text/plain")),
+            ("files", ("b.txt", b"prior authorization policy", "text/plain")),
+            ("files", ("c.txt", b"billing procedure", "text/plain")),
+        ]
+        
+        response = client.post("/api/v1/ingest/batch", files=files).json()
+        
+        indexed = vector_service.add_documents.call_args.args[0]
+        assert [document["filename"] for document in indexed] == ["a.txt", "c.txt"]
+        assert response["processed_count"] == 2
+        assert response["documents"][1]["document_id"] == response["documents"][0]["document_id"]
+        assert registry.count() == 2
+        assert len(list(processor.upload_dir.iterdir())) == 2
+    
+    def test_indexing_failure_reports_each_file_and_cleans_up(self, client, services):
+        processor, registry, vector_service = services
+        vector_service.add_documents.side_effect = RuntimeError("vector store down")
+        files = [
+            ("files", ("a.txt", b"first", "text/plain")),
+            ("files", ("b.txt", b"second", "text/plain")),
+        ]
+        
+        response = client.post("/api/v1/ingest/batch", files=files)
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert [document["status"] for document in body["documents"]] == ["failed", "failed"]
+        assert body["failed_count"] == 2
+        assert _stored_files(processor) == []
+        assert registry.count() == 0
+    
+    def test_registration_failure_removes_indexed_chunks(self, client, services, monkeypatch):
+        processor, registry, vector_service = services
+        monkeypatch.setattr(registry, "register_many", MagicMock(side_effect=RuntimeError("disk full")))
+        files = [
+            ("files", ("a.txt", b"first", "text/plain")),
+            ("files", ("b.txt", b"second", "text/plain")),
+        ]
+        
+        body = client.post("/api/v1/ingest/batch", files=files).json()
+        
+        removed = sorted(call.args[0] for call in vector_service.remove_document.call_args_list)
+        indexed = sorted(document["doc_id"] for document in vector_service.add_documents.call_args.args[0])
+        assert removed == indexed
+        assert body["failed_count"] == 2
+        assert _stored_files(processor) == []
+
+
+
+class TestSingleUpload:
+    """Background ingestion of a single upload."""
+    
+    def test_failed_processing_discards_saved_content(self, client, services):
+        processor, registry, vector_service = services
+        vector_service.add_document.side_effect = RuntimeError("vector store down")
+        
+        response = client.post(
+            "/api/v1/ingest",
+            files={"file": ("a.txt", b"patient policy text", "text/plain")}
+        )
+        
+        assert response.status_code == 202
+        doc_id = response.json()["document_id"]
+        assert registry.get(doc_id)["status"] == "failed"
+        assert _stored_files(processor) == []
@@ -0,0 +1,84 @@
+"""
+Tests for guardrails PII and prohibited-content detection.
+"""
+
+import re
+
+import pytest
+
+from services.guardrails_service import GuardrailsService
+
+
+SAMPLES = [
+    "",
+    "What is the prior authorization policy for MRI?",
+    "MRN: 1234567890",
+    "Medical Record Number 123456",
+    "Patient SSN 123-45-6789 is covered",
+    "Call 555-123-4567 or 555.123.4567",
+    "Email jane.doe@example.com for details",
+    "DOB 01/02/1980 and visit 3-4-22",
+    "Card 1234 5678 9012 3456 on file",
+    "SSN 123-45-6789, phone 5551234567, MRN 12345678, jane@example.org",
+    "Never share your password or api_key",
+    "'; DROP TABLE users; -- union select *",
+    "<script>steal(token)</script>",
+    "Coverage is 80% up to $1500 since 2023",
+]
+
+
+def _sequential_pii(text):
+    """Baseline detection: each PII pattern searched on its own."""
+    return [
+        pii_type for pii_type, pattern in GuardrailsService.PII_PATTERNS.items()
+        if re.search(pattern, text, re.IGNORECASE)
+    ]
+
+
+def _sequential_prohibited(text):
+    """Baseline detection: each prohibited pattern searched on its own."""
+    return [
+        pattern for pattern in GuardrailsService.PROHIBITED_PATTERNS
+        if re.search(pattern, text, re.IGNORECASE)
+    ]
+
+
+@pytest.fixture
+def guardrails():
+    return GuardrailsService()
+
+
+class TestFusedDetection:
+    """Fused scans report exactly what the per-pattern scans report."""
+    
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_pii_matches_sequential_detection(self, guardrails, text):
+        assert guardrails._detect_pii(text) == _sequential_pii(text)
+    
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_contains_pii_matches_sequential_detection(self, guardrails, text):
+        assert guardrails.contains_pii(text) == bool(_sequential_pii(text))
+    
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_prohibited_matches_sequential_detection(self, guardrails, text):
+        assert guardrails._detect_prohibited_content(text) == _sequential_prohibited(text)
+    
+    def test_overlapping_types_are_all_reported(self, guardrails):
+        assert guardrails._detect_pii("MRN: 1234567890") == ["phone", "mrn"]
+        assert guardrails._detect_prohibited_content("<script>token</script>") == [
+            GuardrailsService.PROHIBITED_PATTERNS[0],
+            GuardrailsService.PROHIBITED_PATTERNS[2],
+        ]
+
+
+class TestSanitizeOutput:
+    """Redaction of PII and removal of prohibited content."""
+    
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_no_pii_survives_sanitization(self, guardrails, text):
+        assert _sequential_pii(guardrails.sanitize_output(text)) == []
+    
+    def test_redaction_labels(self, guardrails):
+        sanitized = guardrails.sanitize_output("SSN 123-45-6789, email jane@example.com")
+        
+        assert sanitized == "SSN [REDACTED_SSN], email [REDACTED_EMAIL]"
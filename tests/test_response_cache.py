@@ -0,0 +1,41 @@
+"""
+Tests for the synchronized response cache.
+"""
+
+import threading
+
+from utils.response_cache import SynchronizedTTLCache
+
+
+class TestSynchronizedTTLCache:
+    """Concurrent clears never corrupt reads and writes."""
+    
+    def test_basic_operations(self):
+        cache = SynchronizedTTLCache(maxsize=2, ttl=60)
+        cache["a"] = 1
+        
+        assert cache.get("a") == 1
+        assert "a" in cache
+        assert cache.pop("a") == 1
+        assert cache.pop("a", None) is None
+        assert cache.get("a") is None
+    
+    def test_clear_from_other_thread_while_writing(self):
+        cache = SynchronizedTTLCache(maxsize=64, ttl=60)
+        stop = threading.Event()
+        
+        def clear_repeatedly():
+            while not stop.is_set():
+                cache.clear()
+        
+        clearer = threading.Thread(target=clear_repeatedly)
+        clearer.start()
+        try:
+            for index in range(20000):
+                cache[index % 128] = index
+                cache.get(index % 128)
+        finally:
+            stop.set()
+            clearer.join()
+        
+        assert len(cache) <= 64
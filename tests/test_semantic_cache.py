@@ -0,0 +1,114 @@
+"""
+Tests for the embedding-keyed semantic cache.
+"""
+
+import numpy as np
+import pytest
+
+from utils import semantic_cache
+from utils.semantic_cache import SemanticCache
+
+DIMENSION = 64
+
+
+def _vector(seed: int) -> np.ndarray:
+    """Random unit vector, reproducible per seed."""
+    vector = np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _near(vector: np.ndarray, cosine: float, seed: int = 99) -> np.ndarray:
+    """Unit vector with the given cosine similarity to vector."""
+    noise = np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+    noise -= noise.dot(vector) * vector
+    noise /= np.linalg.norm(noise)
+    return cosine * vector + np.sqrt(1 - cosine ** 2) * noise
+
+
+class TestSemanticCache:
+    """Lookup, scoping, expiry and eviction behaviour."""
+    
+    def test_miss_on_empty_cache(self):
+        cache = SemanticCache()
+        
+        assert cache.get(_vector(1)) is None
+        assert cache.stats()["misses"] == 1
+    
+    def test_hit_on_identical_embedding(self):
+        cache = SemanticCache()
+        cache.set(_vector(1), "answer")
+        
+        assert cache.get(_vector(1)) == "answer"
+        assert cache.stats()["hits"] == 1
+    
+    def test_hit_on_near_duplicate_embedding(self):
+        cache = SemanticCache(threshold=0.95)
+        cache.set(_vector(1), "answer")
+        
+        assert cache.get(_near(_vector(1), 0.99)) == "answer"
+    
+    def test_miss_on_unrelated_embedding(self):
+        cache = SemanticCache()
+        cache.set(_vector(1), "answer")
+        
+        assert cache.get(_vector(2)) is None
+    
+    def test_threshold_controls_hit(self):
+        cache = SemanticCache(threshold=0.95)
+        cache.set(_vector(1), "answer")
+        query = _near(_vector(1), 0.99)
+        
+        assert cache.get(query, threshold=0.995) is None
+        assert cache.get(query, threshold=0.98) == "answer"
+    
+    def test_namespaces_are_isolated(self):
+        cache = SemanticCache()
+        cache.set(_vector(1), "first", namespace="a")
+        cache.set(_vector(1), "second", namespace="b")
+        
+        assert cache.get(_vector(1), namespace="a") == "first"
+        assert cache.get(_vector(1), namespace="b") == "second"
+        assert cache.get(_vector(1)) is None
+    
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+        cache = SemanticCache(ttl=10.0)
+        cache.set(_vector(1), "answer")
+        
+        now[0] += 9.0
+        assert cache.get(_vector(1)) == "answer"
+        
+        now[0] += 2.0
+        assert cache.get(_vector(1)) is None
+        assert cache.stats()["cache_size"] == 0
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SemanticCache(max_entries=2)
+        cache.set(_vector(1), "one")
+        cache.set(_vector(2), "two")
+        
+        # Touch the first entry so the second becomes least recently used
+        assert cache.get(_vector(1)) == "one"
+        cache.set(_vector(3), "three")
+        
+        assert cache.get(_vector(2)) is None
+        assert cache.get(_vector(1)) == "one"
+        assert cache.get(_vector(3)) == "three"
+        assert cache.stats()["evictions"] == 1
+    
+    def test_clear_drops_entries(self):
+        cache = SemanticCache()
+        cache.set(_vector(1), "answer")
+        cache.clear()
+        
+        assert cache.get(_vector(1)) is None
+        assert cache.stats()["cache_size"] == 0
+    
+    def test_dimension_change_resets_index(self):
+        cache = SemanticCache()
+        cache.set(_vector(1), "answer")
+        cache.set(np.ones(DIMENSION // 2, dtype=np.float32), "other")
+        
+        assert cache.stats()["cache_size"] == 1
+        assert cache.get(_vector(1)) is None
@@ -0,0 +1,60 @@
+"""
+Tests for tag parsing and word-overlap helpers.
+"""
+
+import pytest
+
+from utils.tags import parse_tags
+from utils.text import covered_count, grounded_fraction, tokenize_words
+
+
+class TestParseTags:
+    """Comma-separated tag parsing."""
+    
+    @pytest.mark.parametrize("raw, expected", [
+        ("", []),
+        ("   ", []),
+        ("billing", ["billing"]),
+        ("billing, insurance", ["billing", "insurance"]),
+        (" billing ,insurance , ", ["billing", "insurance"]),
+        ("billing,,insurance", ["billing", "insurance"]),
+        (",billing, ,insurance,", ["billing", "insurance"]),
+        ("prior authorization, billing", ["prior authorization", "billing"]),
+    ])
+    def test_parse_tags(self, raw, expected):
+        assert parse_tags(raw) == expected
+
+
+class TestWordOverlap:
+    """Word tokenization and coverage counting."""
+    
+    def test_tokenize_words_lowercases_and_dedupes(self):
+        assert tokenize_words("Prior prior AUTHORIZATION.") == frozenset({"prior", "authorization."})
+    
+    def test_covered_count_matches_union_intersection(self):
+        words = tokenize_words("insurance requires prior authorization for imaging")
+        word_sets = [
+            tokenize_words("prior authorization policy"),
+            tokenize_words("imaging insurance coverage"),
+            tokenize_words("unrelated text"),
+        ]
+        
+        assert covered_count(words, word_sets) == len(words & frozenset().union(*word_sets)) == 4
+    
+    def test_covered_count_without_sets(self):
+        assert covered_count(frozenset({"a", "b"}), []) == 0
+    
+    def test_covered_count_accepts_iterators(self):
+        word_sets = iter([frozenset({"a"}), frozenset({"b"})])
+        
+        assert covered_count(frozenset({"a", "b", "c"}), word_sets) == 2
+    
+    def test_grounded_fraction(self):
+        words = frozenset({"a", "b", "c", "d"})
+        
+        assert grounded_fraction(words, [frozenset({"a"}), frozenset({"b", "x"})]) == 0.5
+        assert grounded_fraction(words, [words]) == 1.0
+        assert grounded_fraction(words, []) == 0.0
+    
+    def test_grounded_fraction_of_no_words(self):
+        assert grounded_fraction(frozenset(), [frozenset({"a"})]) == 0.0
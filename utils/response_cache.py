@@ -0,0 +1,112 @@
+"""
+Short-lived response cache for Healthcare Copilot read-mostly endpoints.
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from cachetools import TTLCache
+
+
+_MISSING = object()
+
+
+class SynchronizedTTLCache(TTLCache):
+    """
+    TTLCache safe to use from several threads at once.
+    
+    cachetools caches are not thread-safe; these are read and written on the
+    event loop but cleared from worker threads by vector store change listeners.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initialize synchronized cache.
+        
+        Args:
+            maxsize: Maximum number of cached entries
+            ttl: Time-to-live for entries in seconds
+        """
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+    
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            return super().__getitem__(key)
+    
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            super().__setitem__(key, value)
+    
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            super().__delitem__(key)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return super().__contains__(key)
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return super().get(key, default)
+    
+    def pop(self, key: Hashable, default: Any = _MISSING) -> Any:
+        with self._lock:
+            if default is _MISSING:
+                return super().pop(key)
+            return super().pop(key, default)
+    
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+
+
+class TTLResponseCache:
+    """In-process TTL cache that computes each missing key once, even under concurrent requests."""
+    
+    def __init__(self, maxsize: int = 8, ttl: float = 5.0):
+        """
+        Initialize response cache.
+        
+        Args:
+            maxsize: Maximum number of cached responses
+            ttl: Time-to-live for cached responses in seconds
+        """
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+    
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached response for a key, computing it on miss.
+        
+        Concurrent misses for the same key wait on one computation instead of
+        all recomputing it.
+        
+        Args:
+            key: Cache key
+            compute: Zero-argument callable producing the response; coroutine
+                functions are awaited, blocking callables run in a worker thread
+        
+        Returns:
+            Cached or freshly computed response
+        """
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                if asyncio.iscoroutinefunction(compute):
+                    value = await compute()
+                else:
+                    value = await asyncio.to_thread(compute)
+                self._cache[key] = value
+        
+        return value
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        self._cache.clear()
@@ -0,0 +1,236 @@
+"""
+Semantic cache for Healthcare Copilot.
+Caches results keyed by query embeddings so near-duplicate queries skip vector search.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+@dataclass
+class _CacheEntry:
+    """Single cached value with its normalized query embedding."""
+    
+    embedding: np.ndarray
+    value: Any
+    namespace: str
+    expires_at: float
+    signatures: Tuple[int, ...]
+
+
+class SemanticCache:
+    """Thread-safe LRU cache with cosine-similarity lookup over query embeddings."""
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 300.0,
+        threshold: float = 0.95,
+        num_tables: int = 8,
+        bits_per_table: int = 16,
+        max_hamming_distance: int = 32,
+        seed: int = 42
+    ):
+        """
+        Initialize semantic cache.
+        
+        Args:
+            max_entries: Maximum number of cached entries before LRU eviction
+            ttl: Default time-to-live for entries in seconds
+            threshold: Default cosine similarity required for a cache hit
+            num_tables: Number of LSH hash tables
+            bits_per_table: Signature width of each LSH table (max 64)
+            max_hamming_distance: Maximum differing signature bits (across all tables)
+                for a candidate to be scored by cosine similarity
+            seed: Seed for the random projection matrix
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.num_tables = num_tables
+        self.bits_per_table = bits_per_table
+        self.max_hamming_distance = max_hamming_distance
+        self.seed = seed
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(num_tables)]
+        self._keys = itertools.count()
+        self._projection: Optional[np.ndarray] = None
+        self._bit_weights = np.left_shift(
+            np.uint64(1), np.arange(bits_per_table, dtype=np.uint64)
+        )
+    
+    def get(
+        self,
+        query_embedding: Sequence[float],
+        threshold: Optional[float] = None,
+        namespace: str = ""
+    ) -> Optional[Any]:
+        """
+        Look up the cached value for the most similar query embedding.
+        
+        Args:
+            query_embedding: Embedding of the incoming query
+            threshold: Minimum cosine similarity for a hit (defaults to instance threshold)
+            namespace: Cache namespace; entries only match within the same namespace
+        
+        Returns:
+            Cached value or None on miss
+        """
+        threshold = self.threshold if threshold is None else threshold
+        
+        with self._lock:
+            query = self._normalize(query_embedding)
+            if self._projection is None or query.shape[0] != self._projection.shape[0]:
+                self.misses += 1
+                return None
+            
+            signatures = self._signatures(query)
+            candidates: Set[int] = set()
+            for table, signature in zip(self._buckets, signatures):
+                candidates.update(table.get(signature, ()))
+            
+            now = time.monotonic()
+            expired = []
+            keys = []
+            embeddings = []
+            
+            for key in candidates:
+                entry = self._entries[key]
+                if entry.expires_at <= now:
+                    expired.append(key)
+                    continue
+                if entry.namespace != namespace:
+                    continue
+                
+                # Full-signature Hamming distance rules out clearly different queries
+                # before any floating point work
+                distance = sum(
+                    (a ^ b).bit_count() for a, b in zip(signatures, entry.signatures)
+                )
+                if distance <= self.max_hamming_distance:
+                    keys.append(key)
+                    embeddings.append(entry.embedding)
+            
+            best_key = None
+            if keys:
+                scores = np.stack(embeddings) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= threshold:
+                    best_key = keys[best]
+            
+            for key in expired:
+                self._remove(key)
+            
+            if best_key is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key].value
+    
+    def set(
+        self,
+        query_embedding: Sequence[float],
+        results: Any,
+        ttl: Optional[float] = None,
+        namespace: str = ""
+    ) -> None:
+        """
+        Store a value under a query embedding.
+        
+        Args:
+            query_embedding: Embedding of the query that produced the value
+            results: Value to cache
+            ttl: Time-to-live in seconds (defaults to instance ttl)
+            namespace: Cache namespace
+        """
+        ttl = self.ttl if ttl is None else ttl
+        
+        with self._lock:
+            embedding = self._normalize(query_embedding)
+            
+            # (Re)build the projection on first use or when the embedding model changes
+            if self._projection is None or embedding.shape[0] != self._projection.shape[0]:
+                self._reset_index(embedding.shape[0])
+            
+            key = next(self._keys)
+            signatures = self._signatures(embedding)
+            self._entries[key] = _CacheEntry(
+                embedding=embedding,
+                value=results,
+                namespace=namespace,
+                expires_at=time.monotonic() + ttl,
+                signatures=signatures
+            )
+            for table, signature in zip(self._buckets, signatures):
+                table.setdefault(signature, set()).add(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Invalidate all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [{} for _ in range(self.num_tables)]
+        logger.debug("Semantic cache cleared")
+    
+    def stats(self) -> Dict:
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache_size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+    
+    def _reset_index(self, dimension: int) -> None:
+        """Create a fresh random projection and drop entries indexed with the old one."""
+        rng = np.random.default_rng(self.seed)
+        self._projection = rng.standard_normal(
+            (dimension, self.num_tables * self.bits_per_table)
+        ).astype(np.float32)
+        self._entries.clear()
+        self._buckets = [{} for _ in range(self.num_tables)]
+    
+    def _signatures(self, embedding: np.ndarray) -> Tuple[int, ...]:
+        """Compute one packed random-projection signature per LSH table."""
+        bits = (embedding @ self._projection > 0).reshape(self.num_tables, self.bits_per_table)
+        packed = (bits.astype(np.uint64) * self._bit_weights).sum(axis=1, dtype=np.uint64)
+        return tuple(int(signature) for signature in packed)
+    
+    def _remove(self, key: int) -> None:
+        """Remove an entry and its LSH bucket references."""
+        entry = self._entries.pop(key)
+        for table, signature in zip(self._buckets, entry.signatures):
+            bucket = table.get(signature)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[signature]
+    
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
@@ -0,0 +1,25 @@
+"""
+Tag parsing helpers for Healthcare Copilot.
+"""
+
+import re
+from typing import List
+
+
+# Commas with any surrounding whitespace or repeated commas act as one separator
+_TAG_SPLIT = re.compile(r"[,\s]*,[,\s]*")
+
+
+def parse_tags(tags: str) -> List[str]:
+    """
+    Parse a comma-separated tag string.
+    
+    Args:
+        tags: Raw tag string, e.g. "billing, insurance"
+    
+    Returns:
+        List of non-empty tags with surrounding whitespace removed
+    """
+    if not tags:
+        return []
+    return [tag for tag in _TAG_SPLIT.split(tags.strip()) if tag]
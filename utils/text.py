@@ -0,0 +1,60 @@
+"""
+Word tokenization and overlap helpers for Healthcare Copilot metrics.
+"""
+
+from typing import AbstractSet, FrozenSet, Iterable
+
+
+def tokenize_words(text: str) -> FrozenSet[str]:
+    """
+    Split text into its set of lowercased whitespace-delimited words.
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        Distinct words; punctuation stays attached to words
+    """
+    return frozenset(text.lower().split())
+
+
+def covered_count(words: AbstractSet[str], word_sets: Iterable[AbstractSet[str]]) -> int:
+    """
+    Count the words that occur in at least one of several sets.
+    
+    Equivalent to len(words & union of word_sets) without building
+    the union: each set only removes the words still unmatched, so the work is
+    bounded by the size of words rather than of the (much larger) sets.
+    
+    Args:
+        words: Words to look up, e.g. an answer's words
+        word_sets: Sets to look them up in, e.g. each retrieved document's words
+    
+    Returns:
+        Number of words found in any of the sets
+    """
+    remaining = frozenset(words)
+    for word_set in word_sets:
+        if not remaining:
+            break
+        remaining = remaining - word_set
+    return len(words) - len(remaining)
+
+
+def grounded_fraction(words: AbstractSet[str], word_sets: Iterable[AbstractSet[str]]) -> float:
+    """
+    Fraction of words found in at least one of several sets.
+    
+    This is the word-overlap faithfulness kernel shared by the evaluation and
+    guardrails services.
+    
+    Args:
+        words: Words of the generated text
+        word_sets: Word sets of the source documents
+    
+    Returns:
+        Score between 0.0 and 1.0; 0.0 when there are no words
+    """
+    if not words:
+        return 0.0
+    return covered_count(words, word_sets) / len(words)